@@ -0,0 +1,131 @@
+# backup.py
+# Copias de seguridad en caliente de la base de datos de sesiones.
+#
+# Usa la API de backup incremental de SQLite: la copia avanza en pasos de
+# pocas páginas y libera el bloqueo entre paso y paso, de modo que el bot
+# puede seguir escribiendo mientras se hace la copia.
+#
+# Uso desde la línea de comandos (con el bot detenido para restaurar):
+#   python backup.py create
+#   python backup.py list
+#   python backup.py restore sessions-20250101-120000.db
+import argparse
+import logging
+import os
+import sqlite3
+import time
+
+import clock
+from config import BACKUP_DIR, BACKUP_KEEP
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_FILE = 'sessions.db'
+SNAPSHOT_PREFIX = 'sessions-'
+SNAPSHOT_SUFFIX = '.db'
+PAGES_PER_STEP = 64      # Páginas copiadas en cada paso
+STEP_SLEEP = 0.005       # Pausa tras cada paso (segundos) para dejar paso a los escritores
+
+
+def list_snapshots(backup_dir=BACKUP_DIR):
+    """Devuelve los nombres de las copias disponibles, de la más reciente a la más antigua"""
+    if not os.path.isdir(backup_dir):
+        return []
+    return sorted(
+        (name for name in os.listdir(backup_dir)
+         if name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX)),
+        reverse=True
+    )
+
+
+def _pace(status, remaining, total):
+    """Llamada tras cada paso de la copia: cede el bloqueo un momento a los escritores"""
+    if remaining:
+        time.sleep(STEP_SLEEP)
+
+
+def _copy_database(source_path, target_path):
+    """Copia una base de datos SQLite paso a paso y verifica el resultado"""
+    tmp_path = f"{target_path}.tmp"
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(tmp_path)
+    try:
+        # El parámetro `sleep` de backup() solo se aplica cuando un paso
+        # encuentra la base de datos ocupada; la pausa entre pasos va aquí
+        source.backup(target, pages=PAGES_PER_STEP, progress=_pace)
+        result = target.execute('PRAGMA quick_check').fetchone()
+        if not result or result[0] != 'ok':
+            raise sqlite3.DatabaseError(f"La copia no supera quick_check: {result}")
+    finally:
+        target.close()
+        source.close()
+    # Sustitución atómica: nunca queda una copia a medias con el nombre final
+    os.replace(tmp_path, target_path)
+
+
+def create_snapshot(db_file=DEFAULT_DB_FILE, backup_dir=BACKUP_DIR, keep=BACKUP_KEEP):
+    """Crea una copia de la base de datos y elimina las que exceden `keep`"""
+    os.makedirs(backup_dir, exist_ok=True)
+    name = f"{SNAPSHOT_PREFIX}{clock.now().strftime('%Y%m%d-%H%M%S')}{SNAPSHOT_SUFFIX}"
+    path = os.path.join(backup_dir, name)
+    _copy_database(db_file, path)
+
+    for old in list_snapshots(backup_dir)[keep:]:
+        try:
+            os.remove(os.path.join(backup_dir, old))
+        except OSError as e:
+            logger.error(f"No se pudo eliminar la copia antigua {old}: {str(e)}")
+
+    logger.info(f"Copia de seguridad creada: {path}")
+    return path
+
+
+def restore_snapshot(name, db_file=DEFAULT_DB_FILE, backup_dir=BACKUP_DIR):
+    """Restaura una copia sobre la base de datos (el bot debe estar detenido).
+
+    Antes de restaurar se guarda una copia del estado actual, por si hay que
+    deshacer la restauración.
+    """
+    path = os.path.join(backup_dir, os.path.basename(name))
+    if not os.path.isfile(path):
+        raise FileNotFoundError(path)
+
+    if os.path.isfile(db_file):
+        create_snapshot(db_file, backup_dir, keep=BACKUP_KEEP + 1)
+        # La base de datos funciona en modo WAL: se vuelca el diario y se
+        # eliminan sus ficheros para que no se apliquen sobre la copia restaurada
+        conn = sqlite3.connect(db_file)
+        try:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        finally:
+            conn.close()
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(db_file + suffix):
+                os.remove(db_file + suffix)
+    _copy_database(path, db_file)
+    logger.info(f"Base de datos restaurada desde {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copias de seguridad de la base de datos de sesiones")
+    parser.add_argument('--db', default=DEFAULT_DB_FILE, help="Fichero de base de datos")
+    parser.add_argument('--dir', default=BACKUP_DIR, help="Directorio de copias")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('create', help="Crea una copia ahora")
+    subparsers.add_parser('list', help="Lista las copias disponibles")
+    restore_parser = subparsers.add_parser('restore', help="Restaura una copia (con el bot detenido)")
+    restore_parser.add_argument('snapshot', help="Nombre de la copia (ver 'list')")
+    args = parser.parse_args()
+
+    if args.command == 'create':
+        print(create_snapshot(args.db, args.dir))
+    elif args.command == 'list':
+        for name in list_snapshots(args.dir):
+            print(name)
+    elif args.command == 'restore':
+        restore_snapshot(args.snapshot, args.db, args.dir)
+        print(f"Restaurada {args.snapshot} en {args.db}")
+
+
+if __name__ == "__main__":
+    main()
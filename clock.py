@@ -0,0 +1,68 @@
+# clock.py
+# Reloj del bot.
+#
+# Todo el código que depende de la hora actual la pide a este módulo en lugar
+# de llamar directamente a datetime.now(). En producción se usa el reloj del
+# sistema; el simulador (replay.py) lo sustituye por un reloj simulado que
+# avanza a saltos, de modo que horas o días de comportamiento (avisos,
+# transiciones de estado, limpieza de sesiones antiguas) se reproducen en
+# segundos.
+from datetime import datetime, timezone
+
+
+class SystemClock:
+    """Reloj real del sistema"""
+
+    def now(self, tz=None):
+        return datetime.now(tz)
+
+    def utcnow(self):
+        return datetime.utcnow()
+
+
+class SimulatedClock:
+    """Reloj que solo avanza cuando se le indica.
+
+    Guarda el instante actual en UTC; `now()` sin zona horaria devuelve la
+    hora local sin zona, igual que datetime.now().
+    """
+
+    def __init__(self, start):
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        self.current = start.astimezone(timezone.utc)
+
+    def now(self, tz=None):
+        if tz is None:
+            return self.current.astimezone().replace(tzinfo=None)
+        return self.current.astimezone(tz)
+
+    def utcnow(self):
+        return self.current.replace(tzinfo=None)
+
+    def advance_to(self, moment):
+        """Avanza hasta `moment` (UTC); nunca retrocede"""
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        self.current = max(self.current, moment.astimezone(timezone.utc))
+
+    def advance(self, delta):
+        self.current += delta
+
+
+_clock = SystemClock()
+
+
+def now(tz=None):
+    return _clock.now(tz)
+
+
+def utcnow():
+    return _clock.utcnow()
+
+
+def set_clock(new_clock):
+    """Sustituye el reloj global y devuelve el anterior"""
+    global _clock
+    previous, _clock = _clock, new_clock
+    return previous
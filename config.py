@@ -2,4 +2,10 @@ TOKEN = ''
 PAYPAL_LINK = 'https://paypal.me/i7ach1'
 DEFAULT_ALERT_TIME = 60  # Tiempo de aviso en minutos (1 hora)
 DEFAULT_TIMEZONE = 'Europe/Madrid'  # Zona horaria fija
+RECURRENCE_HORIZON_DAYS = 7  # Días por adelantado en los que se crean las ocurrencias de sesiones recurrentes
+ARCHIVE_RETENTION_DAYS = 365  # Días que se conservan las sesiones archivadas (0 = sin límite)
+BACKUP_DIR = 'backups'  # Directorio de copias de seguridad de la base de datos
+BACKUP_INTERVAL_HOURS = 6  # Cada cuántas horas se hace una copia en caliente
+BACKUP_KEEP = 8  # Número de copias que se conservan
+TRACE_FILE = ''  # Fichero donde grabar la traza para replay.py (vacío = sin traza)
 # Install Link: https://discord.com/oauth2/authorize?client_id=1313118498133905439
\ No newline at end of file
@@ -0,0 +1,443 @@
+# loadtest.py
+# Generador de carga offline para las interacciones del bot.
+#
+# Simula ráfagas de interacciones (botones de ReadyView, SessionSelectView y
+# comandos slash) contra una base de datos temporal, sin conectarse a Discord:
+# las interacciones son objetos de prueba que registran cuándo se responden.
+# Al terminar informa de la latencia de reconocimiento (p50/p95/p99), de las
+# esperas de escritura en SQLite y de las actualizaciones perdidas en el
+# read-modify-write de `ready_users`.
+#
+# Uso:
+#   python loadtest.py ready --users 50 --concurrency 50
+#   python loadtest.py mixed --users 200 --threads 4
+#   python loadtest.py select --users 100 --concurrency 20
+#   python loadtest.py commands --users 100 --latency-ms 80
+#   python loadtest.py all --json
+#   python loadtest.py ready --backend memory
+#
+# Con --threads N cada hilo ejecuta su propio bucle de eventos con su parte de
+# los usuarios, como varios procesos del bot compartiendo la base de datos.
+# Con --backend memory todo se guarda en MemorySessionStore (el SQLite temporal
+# solo recibe el esquema), lo que permite separar el coste de SQLite del de la
+# lógica del bot.
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+import pytz
+
+import clock
+import rol_sessions
+from config import DEFAULT_TIMEZONE
+from storage import MemorySessionStore, SQLiteSessionStore
+
+GUILD_ID = 900000000000000001
+ROLE_ID = 900000000000000002
+CHANNEL_ID = 900000000000000003
+CREATOR_ID = 900000000000000004
+FIRST_USER_ID = 800000000000000000
+SLOW_WRITE_SECONDS = 0.010  # Escrituras más lentas que esto cuentan como espera de bloqueo
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+# ===================================================================
+# MÉTRICAS E INSTRUMENTACIÓN DE SQLITE
+# ===================================================================
+class Metrics:
+    """Acumula latencias y contadores; compartido entre hilos"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.acks = []
+        self.writes = []
+        self.lock_errors = 0
+        self.errors = 0
+        self.unacked = 0
+
+    def add(self, name, value):
+        with self.lock:
+            getattr(self, name).append(value)
+
+    def count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+metrics = Metrics()
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor que mide la duración de las escrituras (incluye la espera del bloqueo)"""
+
+    def _timed(self, method, sql, *args):
+        start = time.perf_counter()
+        try:
+            return method(sql, *args)
+        except sqlite3.OperationalError as e:
+            if 'locked' in str(e):
+                metrics.count('lock_errors')
+            raise
+        finally:
+            if sql.lstrip().upper().startswith(WRITE_STATEMENTS):
+                metrics.add('writes', time.perf_counter() - start)
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class SqliteShim:
+    """Sustituye al módulo sqlite3 dentro de rol_sessions para instrumentar las conexiones"""
+
+    def __getattr__(self, name):
+        return getattr(sqlite3, name)
+
+    @staticmethod
+    def connect(*args, **kwargs):
+        kwargs.setdefault('factory', TimedConnection)
+        return sqlite3.connect(*args, **kwargs)
+
+
+def percentile(values, pct):
+    """Percentil por rango más cercano (0 si no hay valores)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+# ===================================================================
+# OBJETOS DE DISCORD SIMULADOS
+# ===================================================================
+class StubUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.bot = False
+        self.name = f"user{user_id % 100000}"
+        self.display_name = self.name
+        self.mention = f"<@{user_id}>"
+
+
+class StubRole:
+    def __init__(self, role_id, members):
+        self.id = role_id
+        self.name = "Jugadores"
+        self.mention = f"<@&{role_id}>"
+        self.members = members
+
+
+class StubMessage:
+    def __init__(self, message_id=0):
+        self.id = message_id
+
+    async def edit(self, **kwargs):
+        return self
+
+    async def delete(self):
+        pass
+
+    async def reply(self, *args, **kwargs):
+        return StubMessage()
+
+
+class StubChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.name = "partidas"
+        self.mention = f"<#{channel_id}>"
+
+    async def send(self, *args, **kwargs):
+        return StubMessage()
+
+    async def fetch_message(self, message_id):
+        return StubMessage(message_id)
+
+    def get_partial_message(self, message_id):
+        return StubMessage(message_id)
+
+
+class StubGuild:
+    def __init__(self, users):
+        self.id = GUILD_ID
+        self.name = "Servidor de pruebas"
+        self.members = users
+        self._members = {user.id: user for user in users}
+        self.role = StubRole(ROLE_ID, users)
+        self.channel = StubChannel(CHANNEL_ID)
+        self.roles = [self.role]
+        self.text_channels = [self.channel]
+
+    def get_role(self, role_id):
+        return self.role if role_id == ROLE_ID else None
+
+    def get_channel(self, channel_id):
+        return self.channel if channel_id == CHANNEL_ID else None
+
+    def get_member(self, user_id):
+        return self._members.get(user_id)
+
+
+class StubResponse:
+    """Respuesta de la interacción: el primer reconocimiento marca la latencia"""
+
+    def __init__(self, interaction, latency):
+        self._interaction = interaction
+        self._latency = latency
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def _ack(self, *args, **kwargs):
+        if self._done:
+            raise RuntimeError("La interacción ya fue respondida")
+        self._done = True
+        self._interaction.acked_at = time.perf_counter()
+        if self._latency:
+            await asyncio.sleep(self._latency)
+
+    send_message = edit_message = defer = send_modal = _ack
+
+
+class StubFollowup:
+    async def send(self, *args, **kwargs):
+        return StubMessage()
+
+
+class StubInteraction:
+    def __init__(self, user, guild, latency, data=None):
+        self.user = user
+        self.guild = guild
+        self.guild_id = guild.id
+        self.data = data or {}
+        self.message = StubMessage()
+        self.response = StubResponse(self, latency)
+        self.followup = StubFollowup()
+        self.acked_at = None
+
+
+# ===================================================================
+# ESCENARIOS
+# ===================================================================
+def create_session(name):
+    """Crea una sesión futura en la base de datos temporal y devuelve su ID"""
+    start = clock.now(pytz.timezone(DEFAULT_TIMEZONE)) + timedelta(hours=2)
+    session = {
+        "name": name,
+        "datetime": start.strftime("%d-%m-%Y %H:%M"),
+        "group": str(ROLE_ID),
+        "channel": str(CHANNEL_ID),
+        "creator_id": CREATOR_ID,
+        "guild_id": GUILD_ID,
+        "created_at": clock.now().strftime("%d-%m-%Y %H:%M"),
+        "notified": True,
+        "duration": 120,
+        "status": {"ready": [], "not_ready": []}
+    }
+    return rol_sessions.SessionManager.save_session(session)['session_id']
+
+
+def ready_actions(users, session_id, mixed):
+    """Cada usuario pulsa Listo (o, en modo mixto, uno de cada dos No disponible)"""
+    actions = []
+    for n, user in enumerate(users):
+        status = 'not_ready' if mixed and n % 2 else 'ready'
+
+        async def click(interaction, status=status):
+            view = rol_sessions.ReadyView(session_id)
+            button = view.ready_button if status == 'ready' else view.not_ready_button
+            await button.callback(interaction)
+        actions.append((user, click, None, status))
+    return actions
+
+
+def select_actions(users):
+    """Cada usuario abre el selector de /editsession y elige una sesión"""
+    entries = rol_sessions.session_index.search(GUILD_ID, '')
+    actions = []
+    for user in users:
+        idx = random.randrange(len(entries))
+
+        async def select(interaction):
+            view = rol_sessions.SessionSelectView(entries, 'edit', rol_sessions.guild_locales.get(GUILD_ID))
+            await view.session_selected(interaction)
+        actions.append((user, select, {'values': [str(idx)]}, None))
+    return actions
+
+
+def command_actions(users):
+    """Cada usuario lanza uno de los comandos slash de solo lectura"""
+    tree = rol_sessions.bot.tree
+    commands = [tree.get_command(name) for name in ('activesessions', 'stats', 'conflicts')]
+    actions = []
+    for user in users:
+        command = random.choice(commands)
+
+        async def run(interaction, command=command):
+            await command.callback(interaction)
+        actions.append((user, run, None, None))
+    return actions
+
+
+async def run_actions(actions, guild, concurrency, latency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(user, action, data):
+        async with semaphore:
+            interaction = StubInteraction(user, guild, latency, data)
+            start = time.perf_counter()
+            try:
+                await action(interaction)
+            except Exception:
+                metrics.count('errors')
+            if interaction.acked_at is None:
+                metrics.count('unacked')
+            else:
+                metrics.add('acks', interaction.acked_at - start)
+
+    await asyncio.gather(*(one(user, action, data) for user, action, data, _ in actions))
+
+
+def dispatch(actions, guild, concurrency, latency, threads):
+    """Ejecuta las acciones en uno o varios bucles de eventos"""
+    if threads <= 1:
+        asyncio.run(run_actions(actions, guild, concurrency, latency))
+        return
+    slices = [actions[i::threads] for i in range(threads)]
+    workers = [
+        threading.Thread(target=asyncio.run, args=(run_actions(part, guild, concurrency, latency),))
+        for part in slices
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def lost_updates(session_id, actions):
+    """Compara el estado guardado con el que deberían haber dejado las pulsaciones"""
+    row = rol_sessions.SessionManager.get_session(session_id)
+    session = rol_sessions.convert_db_to_session(row)
+    expected = {
+        'ready': {user.id for user, _, _, status in actions if status == 'ready'},
+        'not_ready': {user.id for user, _, _, status in actions if status == 'not_ready'},
+    }
+    return sum(len(expected[key] - set(session['status'][key])) for key in expected)
+
+
+def run_scenario(name, args):
+    global metrics
+    users = [StubUser(FIRST_USER_ID + n) for n in range(args.users)]
+    guild = StubGuild(users)
+
+    session_id = None
+    if name in ('ready', 'mixed'):
+        session_id = create_session(f"Carga {name} {time.time_ns()}")
+        actions = ready_actions(users, session_id, mixed=(name == 'mixed'))
+    elif name == 'select':
+        for n in range(args.sessions):
+            create_session(f"Selector {n}")
+        actions = select_actions(users)
+    else:
+        actions = command_actions(users)
+
+    # Solo se mide la ráfaga, no la preparación de las sesiones
+    metrics = Metrics()
+    start = time.perf_counter()
+    dispatch(actions, guild, args.concurrency, args.latency_ms / 1000, args.threads)
+    elapsed = time.perf_counter() - start
+
+    slow = [w for w in metrics.writes if w > SLOW_WRITE_SECONDS]
+    return {
+        'scenario': name,
+        'interactions': len(actions),
+        'concurrency': args.concurrency,
+        'threads': args.threads,
+        'backend': args.backend,
+        'elapsed_s': round(elapsed, 3),
+        'ack_ms': {
+            'p50': round(percentile(metrics.acks, 50) * 1000, 2),
+            'p95': round(percentile(metrics.acks, 95) * 1000, 2),
+            'p99': round(percentile(metrics.acks, 99) * 1000, 2),
+            'max': round(max(metrics.acks, default=0) * 1000, 2),
+        },
+        'errors': metrics.errors,
+        'unacked': metrics.unacked,
+        'writes': len(metrics.writes),
+        'write_p99_ms': round(percentile(metrics.writes, 99) * 1000, 2),
+        'lock_waits': len(slow),
+        'lock_wait_total_ms': round(sum(slow) * 1000, 2),
+        'lock_errors': metrics.lock_errors,
+        'lost_updates': lost_updates(session_id, actions) if session_id else None,
+    }
+
+
+def print_report(result):
+    ack = result['ack_ms']
+    print(f"{result['scenario']}: {result['interactions']} interacciones, concurrencia "
+          f"{result['concurrency']}, {result['threads']} hilo(s), almacén {result['backend']}, {result['elapsed_s']} s")
+    print(f"  reconocimiento p50 {ack['p50']} ms | p95 {ack['p95']} ms | p99 {ack['p99']} ms | "
+          f"max {ack['max']} ms | errores {result['errors']} | sin responder {result['unacked']}")
+    print(f"  escrituras {result['writes']} | p99 {result['write_p99_ms']} ms | esperas de bloqueo "
+          f"{result['lock_waits']} ({result['lock_wait_total_ms']} ms) | 'database is locked' {result['lock_errors']}")
+    if result['lost_updates'] is not None:
+        print(f"  actualizaciones perdidas en ready_users: {result['lost_updates']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga offline de las interacciones del bot")
+    parser.add_argument('scenario', choices=['ready', 'mixed', 'select', 'commands', 'all'])
+    parser.add_argument('--users', type=int, default=50, help="Usuarios simulados (una interacción cada uno)")
+    parser.add_argument('--concurrency', type=int, default=50, help="Interacciones simultáneas por bucle")
+    parser.add_argument('--threads', type=int, default=1, help="Bucles de eventos en paralelo")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Latencia simulada de cada respuesta a Discord")
+    parser.add_argument('--sessions', type=int, default=25, help="Sesiones creadas para el escenario select")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla para elegir sesiones y comandos")
+    parser.add_argument('--backend', choices=['sqlite', 'memory'], default='sqlite', help="Almacén de sesiones")
+    parser.add_argument('--json', action='store_true', help="Salida en JSON")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rol_sessions.DB_FILE = os.path.join(tmp, 'loadtest.db')
+        rol_sessions.sqlite3 = SqliteShim()
+        if args.backend == 'memory':
+            rol_sessions.store = MemorySessionStore()
+        else:
+            rol_sessions.store = SQLiteSessionStore(rol_sessions.DB_FILE, factory=TimedConnection)
+        rol_sessions.SessionManager.setup_files()
+
+        scenarios = ['ready', 'mixed', 'select', 'commands'] if args.scenario == 'all' else [args.scenario]
+        results = [run_scenario(name, args) for name in scenarios]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print_report(result)
+
+
+if __name__ == "__main__":
+    main()
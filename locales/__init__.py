@@ -0,0 +1,2 @@
+# locales
+# Un módulo por idioma con su diccionario TEXTS; translations.py los carga bajo demanda.
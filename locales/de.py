@@ -0,0 +1,195 @@
+# locales/de.py
+# Catálogo de textos: Deutsch
+TEXTS = {
+    'config_title': 'Bot-Konfiguration',
+    'config_desc': 'Wähle aus, was du konfigurieren möchtest:',
+    'config_timezone_desc': 'Zeitzone konfigurieren',
+    'config_prevtime_desc': 'Vorwarnzeit konfigurieren',
+    'config_lang_desc': 'Sprache des Bots konfigurieren',
+    'timezone_title': 'Zeitzonen-Konfiguration',
+    'timezone_examples': 'Beispiele für gültige Zeitzonen:',
+    'timezone_input': 'Bitte gib deine Zeitzone ein:',
+    'timezone_success': 'Zeitzone eingestellt auf:',
+    'timezone_error': 'Ungültige Zeitzone. Bitte verwende ein gültiges Format wie in den Beispielen.',
+    'prevtime_title': 'Konfiguration der Vorwarnzeit',
+    'prevtime_desc': 'Wie viele Minuten im Voraus möchtest du benachrichtigt werden?',
+    'prevtime_input': 'Bitte gib eine Zahl ein (zum Beispiel: 15)',
+    'prevtime_success': 'Vorwarnzeit eingestellt auf: {} Minuten',
+    'prevtime_error': 'Bitte gib eine gültige positive Zahl ein.',
+    'lang_title': 'Sprachkonfiguration',
+    'lang_desc': 'Verfügbare Sprachen:',
+    'lang_input': 'Bitte schreibe \'es\', \'en\', \'fr\' oder \'de\':',
+    'lang_success': 'Sprache eingestellt auf:',
+    'lang_error': 'Ungültige Sprache. Bitte verwende \'es\', \'en\', \'fr\' oder \'de\'',
+    'timeout_error': '⏰ Vorgang abgebrochen.',
+    'success_title': '✅ Erfolgreich',
+    'error_title': '❌ Fehler',
+    'new_session_name': 'Name der Sitzung?',
+    'new_session_datetime': 'Datum und Uhrzeit (Format TT-MM-JJJJ HH:MM)',
+    'new_session_datetime_error': 'Ungültiges Datums- oder Zeitformat. Verwende TT-MM-JJJJ HH:MM',
+    'new_session_name_error': 'Der Sitzungsname darf nicht leer sein',
+    'new_session_group': 'Zu benachrichtigende Gruppe (@gruppe)',
+    'new_session_channel': 'Kanal für die Benachrichtigung (#kanal)',
+    'new_session_success': 'Sitzung erfolgreich erstellt',
+    'active_sessions_title': 'Aktive Sitzungen',
+    'active_sessions_none': 'Keine',
+    'active_sessions_date': 'Datum:',
+    'active_sessions_group': 'Gruppe:',
+    'active_sessions_channel': 'Kanal:',
+    'purge_sessions_result': '{} alte Sitzungen wurden gelöscht',
+    'donate_dm': 'Danke, dass du über eine Spende nachdenkst! Du kannst hier spenden: {}',
+    'donate_response': 'Ich habe dir eine Direktnachricht mit den Spendeninformationen geschickt',
+    'donate_error': 'Ich konnte dir keine Direktnachricht senden. Bitte erlaube Direktnachrichten von Servermitgliedern',
+    'session_alert_title': 'Hinweis:',
+    'session_alert_in_minutes': 'Sitzung in {} Minuten',
+    'session_ready': 'Bereit:',
+    'session_not_ready': 'Nicht bereit:',
+    'session_in_progress': '⚔️ Sitzung läuft',
+    'session_ended': '🏁 Sitzung beendet',
+    'import_title': '📥 Sitzungsimport',
+    'import_result': 'Importierte Sitzungen: {}\nFehlerhafte Zeilen: {}',
+    'import_errors': 'Erste Fehler ({})',
+    'import_format_error': 'Format nicht unterstützt. Bitte hänge eine .csv- oder .ics-Datei an',
+    'import_group_error': 'Gruppe nicht gefunden',
+    'import_channel_error': 'Textkanal nicht gefunden',
+    'import_duplicate_error': 'Es gibt bereits eine Sitzung mit diesem Namen und Datum',
+    'session_group_missing': '⚠️ Gruppe gelöscht',
+    'dm_reminder': '⏰ Erinnerung: Die Sitzung **{}** auf **{}** beginnt in {} Minuten.',
+    'dm_optin': 'Du erhältst Sitzungserinnerungen per Direktnachricht.',
+    'dm_optout': 'Du erhältst keine Sitzungserinnerungen mehr per Direktnachricht.',
+    'reminders_success': 'Private Erinnerungen: {} (Vorlauf: {} Minuten)',
+    'reminders_mode_off': 'Deaktiviert',
+    'reminders_mode_ready': 'Nur bereite Spieler',
+    'reminders_mode_role': 'Die ganze Gruppe',
+    'digest_success_on': 'Sammelmodus aktiviert: gleichzeitige Hinweise in einem Kanal werden als eine Nachricht gesendet',
+    'digest_success_off': 'Sammelmodus deaktiviert: jede Sitzung erhält ihren eigenen Hinweis',
+    'refresh_success': 'Nachrichtenaktualisierung: alle {} Min. für geplante Sitzungen, {} Min. für bevorstehende und {} Min. für laufende',
+    'stages_success': 'Benachrichtigungsstufen eingestellt: {}',
+    'stages_default': 'die des Servers (oder die Vorwarnzeit)',
+    'conflict_warning': '⚠️ Überschneidet sich mit:',
+    'conflict_group': 'gleiche Gruppe',
+    'conflict_channel': 'gleicher Kanal',
+    'conflict_title': '⚠️ Überschneidende Sitzungen',
+    'conflict_none': 'Auf diesem Server gibt es keine überschneidenden Sitzungen.',
+    'stats_title': '📊 Teilnahme von {}',
+    'stats_none': 'Es gibt noch keine Teilnahmestatistiken.',
+    'stats_reliability': 'Zuverlässigkeit',
+    'stats_attended': 'Teilnahmen',
+    'stats_no_shows': 'Nicht erschienen',
+    'stats_declined': 'Absagen',
+    'stats_no_response': 'Keine Antwort',
+    'stats_sessions': 'Sitzungen',
+    'stats_lead': 'Durchschnittlicher Vorlauf',
+    'session_unroutable_channel': '⚠️ Der Kanal der Sitzung **{}** auf **{}** wurde gelöscht. Es werden keine Benachrichtigungen gesendet, bis du mit /editsession einen neuen Kanal zuweist.',
+    'session_unroutable_role': '⚠️ Die Gruppe der Sitzung **{}** auf **{}** wurde gelöscht. Es werden keine Benachrichtigungen gesendet, bis du mit /editsession eine neue Gruppe zuweist.',
+    'button_ready': 'Bereit',
+    'button_not_ready': 'Nicht verfügbar',
+    'button_new_session': 'Neue Sitzung erstellen',
+    'button_cancel': 'Abbrechen',
+    'button_confirm': 'Bestätigen',
+    'button_edit_datetime': 'Datum und Uhrzeit',
+    'button_edit_duration': 'Dauer',
+    'button_edit_group': 'Gruppe',
+    'button_edit_channel': 'Kanal',
+    'button_edit_stages': 'Hinweise',
+    'button_roster': 'Vollständige Liste',
+    'button_previous': 'Zurück',
+    'button_next': 'Weiter',
+    'creator_only': 'Nur der Ersteller der vorherigen Sitzung kann diese Schaltfläche verwenden.',
+    'select_session': 'Wähle eine Sitzung',
+    'select_session_date': 'Datum: {}',
+    'select_role': 'Wähle eine Rolle',
+    'select_channel': 'Wähle einen Kanal',
+    'group_updated': 'Die Gruppe wurde aktualisiert: {}',
+    'channel_updated': 'Der Kanal wurde aktualisiert: {}',
+    'datetime_updated': 'Datum und Uhrzeit wurden aktualisiert: {}',
+    'duration_updated': 'Die Dauer wurde aktualisiert: {}',
+    'modal_datetime_title': 'Datum und Uhrzeit bearbeiten',
+    'modal_datetime_label': 'Neues Datum und neue Uhrzeit',
+    'modal_duration_title': 'Dauer bearbeiten',
+    'modal_duration_label': 'Neue Dauer (in Minuten)',
+    'modal_duration_placeholder': 'Z. B.: 120 (2 Stunden)',
+    'modal_stages_title': 'Hinweise bearbeiten',
+    'modal_stages_label': 'Minuten im Voraus (durch Kommas getrennt)',
+    'modal_stages_placeholder': 'Z. B.: 1440,60,10 (leer = Servervorgaben)',
+    'modal_new_title': 'Neue Sitzung erstellen',
+    'modal_new_name': 'Name der Sitzung',
+    'modal_new_name_placeholder': 'Z. B.: Wöchentlicher Raid',
+    'modal_new_datetime': 'Datum und Uhrzeit (TT-MM-JJJJ HH:MM)',
+    'modal_new_datetime_placeholder': 'Z. B.: 15-02-2024 14:30',
+    'modal_new_duration': 'Dauer in Minuten',
+    'session_created': 'Die Sitzung **{}** wurde erstellt\n📅 Datum: {}\n⏱️ Dauer: {}\n👥 Gruppe: {}\n📢 Kanal: {}',
+    'recurrence_line': '🔁 Wiederholung: {}',
+    'recurrence_rule_weekly': 'Wöchentlich',
+    'recurrence_rule_interval': 'Alle N Tage',
+    'recurrence_rule_weekdays': 'Wochentage',
+    'recurrence_every_weeks': 'Alle {} Wochen',
+    'recurrence_every_days': 'Alle {} Tage',
+    'weekday_names': 'Mo,Di,Mi,Do,Fr,Sa,So',
+    'embed_datetime': '📅 Datum und Uhrzeit',
+    'embed_time_left': '⏰ Verbleibende Zeit',
+    'embed_duration': '⏱️ Dauer',
+    'embed_group': '👥 Gruppe',
+    'embed_created_by': 'Erstellt von {}',
+    'unknown_user': 'Unbekannter Benutzer',
+    'time_ended': 'Beendet',
+    'minutes': '{} Minuten',
+    'hours_one': '{} Stunde',
+    'hours_many': '{} Stunden',
+    'session_mention': 'Hey {}! Eure Sitzung **{}** beginnt in {} Minuten!',
+    'availability_ready': 'Du hast dich für diese Sitzung als verfügbar markiert.',
+    'availability_not_ready': 'Du hast dich für diese Sitzung als nicht verfügbar markiert.',
+    'delete_confirm_title': '🗑️ Löschen bestätigen',
+    'delete_confirm_desc': 'Möchtest du die Sitzung **{}** wirklich löschen?\n\nDiese Aktion kann nicht rückgängig gemacht werden.',
+    'edit_title': '✏️ Sitzung bearbeiten',
+    'edit_desc': '**Sitzung:** {}\n**Datum:** {}\n\nWähle aus, was du bearbeiten möchtest:',
+    'end_title': '🏁 Sitzung beendet',
+    'end_desc': 'Die Sitzung **{}** ist beendet.\n\nMöchtest du eine neue Sitzung planen?',
+    'weekdays_error': 'Ungültige Wochentage. Verwende zum Beispiel: mon,wed,fri',
+    'recurrence_stopped': 'Die Sitzung wird nicht mehr wiederholt. Bereits geplante Termine bleiben erhalten.',
+    'active_sessions_desc': 'Alle geplanten Sitzungen auf diesem Server:',
+    'active_sessions_in': 'In:',
+    'active_sessions_duration': 'Dauer:',
+    'status_in_progress': '🔴 Läuft',
+    'status_ended': '⚫ Beendet',
+    'status_imminent': '🟠 Steht bevor',
+    'status_scheduled': '🟡 Geplant',
+    'delete_title': '🗑️ Sitzung löschen',
+    'delete_desc': 'Wähle die Sitzung, die du löschen möchtest:',
+    'edit_select_desc': 'Wähle die Sitzung, die du bearbeiten möchtest:',
+    'picker_hint': '{} von {} angezeigt. Verwende die Option `session` des Befehls, um nach einer beliebigen Sitzung zu suchen.',
+    'history_title': '📚 Sitzungsverlauf',
+    'history_desc': 'Zuletzt beendete Sitzungen auf diesem Server:',
+    'backup_created': '💾 Sicherung erstellt: `{}`\n\nVerfügbare Sicherungen:\n```\n{}\n```\nUm eine wiederherzustellen, stoppe den Bot und führe `python backup.py restore <sicherung>` aus.',
+    'help_title': '📖 Bot-Hilfe',
+    'help_desc': 'Verfügbare Befehle:',
+    'help_sessions': 'Sitzungsverwaltung',
+    'help_config': 'Konfiguration',
+    'help_other': 'Sonstiges',
+    'help_footer': 'Tipp: Bestätige deine Teilnahme mit den Schaltflächen ✅ und ❌ in den Sitzungsnachrichten',
+    'help_newsession': 'Erstellt eine neue Sitzung mit Name, Datum, Gruppe, Kanal und Dauer. Mit der Option `repeat` wiederholt sie sich automatisch.',
+    'help_stoprecurrence': 'Beendet die Wiederholung einer wiederkehrenden Sitzung.',
+    'help_importsessions': 'Importiert Sitzungen gesammelt aus einer CSV- oder iCalendar-Datei (.ics).',
+    'help_exportsessions': 'Exportiert die Sitzungen des Servers als CSV oder iCalendar.',
+    'help_activesessions': 'Zeigt alle aktiven Sitzungen des Servers.',
+    'help_editsession': 'Bearbeitet eine bestehende Sitzung (Datum, Dauer, Gruppe, Kanal). Schreibe in die Option `session`, um sie nach Namen zu suchen.',
+    'help_sessionhistory': 'Zeigt die zuletzt beendeten Sitzungen.',
+    'help_conflicts': 'Zeigt Sitzungen, die sich in derselben Gruppe oder demselben Kanal überschneiden.',
+    'help_stats': 'Zeigt Zuverlässigkeit, Abwesenheiten und durchschnittlichen Vorlauf eines Benutzers oder einer Rolle.',
+    'help_deletesession': 'Löscht eine bestehende Sitzung. Schreibe in die Option `session`, um sie nach Namen zu suchen.',
+    'help_config_timezone': 'Legt die Zeitzone des Servers fest (z. B.: Europe/Berlin).',
+    'help_config_lang': 'Legt die Sprache des Bots fest (Español, English, Français, Deutsch).',
+    'help_config_prevtime': 'Legt fest, wie viele Minuten im Voraus Sitzungen angekündigt werden.',
+    'help_config_stages': 'Legt mehrere Benachrichtigungsstufen im Kanal fest (z. B.: 1440,60,10).',
+    'help_config_reminders': 'Aktiviert Erinnerungen per Direktnachricht und deren Vorlaufzeiten.',
+    'help_config_digest': 'Fasst gleichzeitige Hinweise im selben Kanal in einer Nachricht zusammen.',
+    'help_config_refresh': 'Legt fest, wie oft Sitzungsnachrichten je nach Status aktualisiert werden.',
+    'help_dmreminders': 'Schaltet private Erinnerungen für dich ein oder aus.',
+    'help_help': 'Zeigt diese Hilfenachricht.',
+    'help_donate': 'Zeigt Informationen zu Spenden.',
+    'digest_title': '📅 Kommende Sitzungen',
+    'digest_mention': 'Hey {}! {} Sitzungen beginnen gleich in diesem Kanal.',
+    'roster_more': '… und {} weitere',
+    'roster_title': 'Teilnahme · {}',
+    'roster_page': 'Seite {}/{}',
+}
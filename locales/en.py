@@ -0,0 +1,195 @@
+# locales/en.py
+# Catálogo de textos: English
+TEXTS = {
+    'config_title': 'Bot Configuration',
+    'config_desc': 'Select what you want to configure:',
+    'config_timezone_desc': 'Configure your timezone',
+    'config_prevtime_desc': 'Configure alert preview time',
+    'config_lang_desc': 'Configure bot language',
+    'timezone_title': 'Timezone Configuration',
+    'timezone_examples': 'Valid timezone examples:',
+    'timezone_input': 'Please enter your timezone:',
+    'timezone_success': 'Timezone set to:',
+    'timezone_error': 'Invalid timezone. Please use a valid format like the examples shown.',
+    'prevtime_title': 'Alert Time Configuration',
+    'prevtime_desc': 'How many minutes in advance do you want to receive alerts?',
+    'prevtime_input': 'Please enter a number (example: 15)',
+    'prevtime_success': 'Preview time set to: {} minutes',
+    'prevtime_error': 'Please enter a valid positive number.',
+    'lang_title': 'Language Configuration',
+    'lang_desc': 'Available languages:',
+    'lang_input': 'Please type \'es\', \'en\', \'fr\' or \'de\':',
+    'lang_success': 'Language set to:',
+    'lang_error': 'Invalid language. Please use \'es\' (Spanish), \'en\' (English), \'fr\' (French) or \'de\' (German)',
+    'timeout_error': '⏰ Operation Cancelled.',
+    'success_title': '✅ Success',
+    'error_title': '❌ Error',
+    'new_session_name': 'Session name?',
+    'new_session_datetime': 'Date and time (format DD-MM-YYYY HH:MM)',
+    'new_session_datetime_error': 'Incorrect date and time format. Use DD-MM-YYYY HH:MM',
+    'new_session_name_error': 'The session name cannot be empty',
+    'new_session_group': 'Target group (@group)',
+    'new_session_channel': 'Target channel (#channel)',
+    'new_session_success': 'Session created successfully',
+    'active_sessions_title': 'Active Sessions',
+    'active_sessions_none': 'None',
+    'active_sessions_date': 'Date:',
+    'active_sessions_group': 'Group:',
+    'active_sessions_channel': 'Channel:',
+    'purge_sessions_result': '{} old sessions have been deleted',
+    'donate_dm': 'Thank you for considering a donation! You can donate at: {}',
+    'donate_response': 'I\'ve sent you a private message with donation information',
+    'donate_error': 'Couldn\'t send you a private message. Please enable private messages from server members',
+    'session_alert_title': 'Alert:',
+    'session_alert_in_minutes': 'Session in {} minutes',
+    'session_ready': 'Ready:',
+    'session_not_ready': 'Not ready:',
+    'session_in_progress': '⚔️ Session in progress',
+    'session_ended': '🏁 Session ended',
+    'import_title': '📥 Session import',
+    'import_result': 'Sessions imported: {}\nRows with errors: {}',
+    'import_errors': 'First errors ({})',
+    'import_format_error': 'Unsupported format. Please attach a .csv or .ics file',
+    'import_group_error': 'Group not found',
+    'import_channel_error': 'Text channel not found',
+    'import_duplicate_error': 'A session with that name and date already exists',
+    'session_group_missing': '⚠️ Group deleted',
+    'dm_reminder': '⏰ Reminder: session **{}** in **{}** starts in {} minutes.',
+    'dm_optin': 'You will receive session reminders by direct message.',
+    'dm_optout': 'You will no longer receive session reminders by direct message.',
+    'reminders_success': 'Direct message reminders: {} (lead time: {} minutes)',
+    'reminders_mode_off': 'Off',
+    'reminders_mode_ready': 'Only ready players',
+    'reminders_mode_role': 'The whole group',
+    'digest_success_on': 'Digest mode enabled: alerts that coincide in a channel will be sent as a single message',
+    'digest_success_off': 'Digest mode disabled: each session gets its own alert',
+    'refresh_success': 'Message updates: every {} min for scheduled sessions, {} min for imminent ones and {} min for sessions in progress',
+    'stages_success': 'Reminder stages set to: {}',
+    'stages_default': 'server defaults (or the alert preview time)',
+    'conflict_warning': '⚠️ Overlaps with:',
+    'conflict_group': 'same group',
+    'conflict_channel': 'same channel',
+    'conflict_title': '⚠️ Overlapping sessions',
+    'conflict_none': 'There are no overlapping sessions in this server.',
+    'stats_title': '📊 Attendance for {}',
+    'stats_none': 'There are no attendance stats yet.',
+    'stats_reliability': 'Reliability',
+    'stats_attended': 'Attended',
+    'stats_no_shows': 'No-shows',
+    'stats_declined': 'Declined',
+    'stats_no_response': 'No response',
+    'stats_sessions': 'Sessions',
+    'stats_lead': 'Average lead time',
+    'session_unroutable_channel': '⚠️ The channel for session **{}** in **{}** was deleted. No alerts will be sent until you assign a new channel with /editsession.',
+    'session_unroutable_role': '⚠️ The group for session **{}** in **{}** was deleted. No alerts will be sent until you assign a new group with /editsession.',
+    'button_ready': 'Ready',
+    'button_not_ready': 'Not available',
+    'button_new_session': 'Create new session',
+    'button_cancel': 'Cancel',
+    'button_confirm': 'Confirm',
+    'button_edit_datetime': 'Date and Time',
+    'button_edit_duration': 'Duration',
+    'button_edit_group': 'Group',
+    'button_edit_channel': 'Channel',
+    'button_edit_stages': 'Alerts',
+    'button_roster': 'View full roster',
+    'button_previous': 'Previous',
+    'button_next': 'Next',
+    'creator_only': 'Only the creator of the previous session can use this button.',
+    'select_session': 'Select a session',
+    'select_session_date': 'Date: {}',
+    'select_role': 'Select a role',
+    'select_channel': 'Select a channel',
+    'group_updated': 'The group has been updated to: {}',
+    'channel_updated': 'The channel has been updated to: {}',
+    'datetime_updated': 'The date and time have been updated to: {}',
+    'duration_updated': 'The duration has been updated to: {}',
+    'modal_datetime_title': 'Edit Date and Time',
+    'modal_datetime_label': 'New date and time',
+    'modal_duration_title': 'Edit Duration',
+    'modal_duration_label': 'New duration (in minutes)',
+    'modal_duration_placeholder': 'E.g.: 120 (2 hours)',
+    'modal_stages_title': 'Edit Alerts',
+    'modal_stages_label': 'Minutes in advance (comma separated)',
+    'modal_stages_placeholder': 'E.g.: 1440,60,10 (empty = server defaults)',
+    'modal_new_title': 'Create New Session',
+    'modal_new_name': 'Session name',
+    'modal_new_name_placeholder': 'E.g.: Weekly raid',
+    'modal_new_datetime': 'Date and time (DD-MM-YYYY HH:MM)',
+    'modal_new_datetime_placeholder': 'E.g.: 15-02-2024 14:30',
+    'modal_new_duration': 'Duration in minutes',
+    'session_created': 'Session **{}** has been created\n📅 Date: {}\n⏱️ Duration: {}\n👥 Group: {}\n📢 Channel: {}',
+    'recurrence_line': '🔁 Repeats: {}',
+    'recurrence_rule_weekly': 'Weekly',
+    'recurrence_rule_interval': 'Every N days',
+    'recurrence_rule_weekdays': 'Days of the week',
+    'recurrence_every_weeks': 'Every {} weeks',
+    'recurrence_every_days': 'Every {} days',
+    'weekday_names': 'Mon,Tue,Wed,Thu,Fri,Sat,Sun',
+    'embed_datetime': '📅 Date and Time',
+    'embed_time_left': '⏰ Time left',
+    'embed_duration': '⏱️ Duration',
+    'embed_group': '👥 Group',
+    'embed_created_by': 'Created by {}',
+    'unknown_user': 'Unknown user',
+    'time_ended': 'Ended',
+    'minutes': '{} minutes',
+    'hours_one': '{} hour',
+    'hours_many': '{} hours',
+    'session_mention': 'Hey {}! Your **{}** session starts in {} minutes!',
+    'availability_ready': 'You have marked yourself as available for this session.',
+    'availability_not_ready': 'You have marked yourself as not available for this session.',
+    'delete_confirm_title': '🗑️ Confirm Deletion',
+    'delete_confirm_desc': 'Are you sure you want to delete session **{}**?\n\nThis action cannot be undone.',
+    'edit_title': '✏️ Edit Session',
+    'edit_desc': '**Session:** {}\n**Date:** {}\n\nSelect what you want to edit:',
+    'end_title': '🏁 Session Ended',
+    'end_desc': 'Session **{}** has ended.\n\nWould you like to schedule a new session?',
+    'weekdays_error': 'Invalid weekdays. Use for example: mon,wed,fri',
+    'recurrence_stopped': 'The session will no longer repeat. Occurrences already scheduled are kept.',
+    'active_sessions_desc': 'All sessions scheduled in this server:',
+    'active_sessions_in': 'In:',
+    'active_sessions_duration': 'Duration:',
+    'status_in_progress': '🔴 In progress',
+    'status_ended': '⚫ Ended',
+    'status_imminent': '🟠 Imminent',
+    'status_scheduled': '🟡 Scheduled',
+    'delete_title': '🗑️ Delete Session',
+    'delete_desc': 'Select the session you want to delete:',
+    'edit_select_desc': 'Select the session you want to edit:',
+    'picker_hint': 'Showing {} of {}. Use the command\'s `session` option to search for any session.',
+    'history_title': '📚 Session History',
+    'history_desc': 'Latest sessions ended in this server:',
+    'backup_created': '💾 Backup created: `{}`\n\nAvailable backups:\n```\n{}\n```\nTo restore one, stop the bot and run `python backup.py restore <backup>`.',
+    'help_title': '📖 Bot Help',
+    'help_desc': 'Available commands:',
+    'help_sessions': 'Session Management',
+    'help_config': 'Configuration',
+    'help_other': 'Other',
+    'help_footer': 'Tip: To confirm attendance, use the ✅ and ❌ buttons on session messages',
+    'help_newsession': 'Creates a new session. You can set its name, date, group, channel and duration. Use the `repeat` option to make it repeat automatically.',
+    'help_stoprecurrence': 'Stops a recurring session from repeating.',
+    'help_importsessions': 'Bulk-imports sessions from a CSV or iCalendar (.ics) file.',
+    'help_exportsessions': 'Exports the server\'s sessions to CSV or iCalendar.',
+    'help_activesessions': 'Shows all active sessions in the server.',
+    'help_editsession': 'Edits an existing session (date, duration, group, channel). Type in the `session` option to search it by name.',
+    'help_sessionhistory': 'Shows the latest ended sessions.',
+    'help_conflicts': 'Shows sessions that overlap in the same group or channel.',
+    'help_stats': 'Shows the reliability, no-shows and average lead time of a user or role.',
+    'help_deletesession': 'Deletes an existing session. Type in the `session` option to search it by name.',
+    'help_config_timezone': 'Sets the server timezone (e.g.: Europe/Madrid).',
+    'help_config_lang': 'Sets the bot language (Español, English, Français, Deutsch).',
+    'help_config_prevtime': 'Sets how many minutes in advance sessions are announced.',
+    'help_config_stages': 'Sets several alert stages in the channel (e.g.: 1440,60,10).',
+    'help_config_reminders': 'Enables direct message reminders and their lead times.',
+    'help_config_digest': 'Groups alerts that coincide in the same channel into a single message.',
+    'help_config_refresh': 'Sets how often session messages are updated depending on their state.',
+    'help_dmreminders': 'Turns direct message reminders on or off for you.',
+    'help_help': 'Shows this help message.',
+    'help_donate': 'Shows donation information.',
+    'digest_title': '📅 Upcoming sessions',
+    'digest_mention': 'Hey {}! {} sessions are about to start in this channel.',
+    'roster_more': '… and {} more',
+    'roster_title': 'Attendance · {}',
+    'roster_page': 'Page {}/{}',
+}
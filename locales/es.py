@@ -0,0 +1,195 @@
+# locales/es.py
+# Catálogo de textos: Español
+TEXTS = {
+    'config_title': 'Configuración del Bot',
+    'config_desc': 'Selecciona qué quieres configurar:',
+    'config_timezone_desc': 'Configura tu zona horaria',
+    'config_prevtime_desc': 'Configura el tiempo de aviso previo',
+    'config_lang_desc': 'Configura el idioma del bot',
+    'timezone_title': 'Configuración de Zona Horaria',
+    'timezone_examples': 'Ejemplos de zonas horarias válidas:',
+    'timezone_input': 'Por favor, introduce tu zona horaria:',
+    'timezone_success': 'Zona horaria configurada a:',
+    'timezone_error': 'Zona horaria no válida. Por favor, usa un formato válido como los ejemplos mostrados.',
+    'prevtime_title': 'Configuración de Tiempo de Aviso',
+    'prevtime_desc': '¿Con cuántos minutos de antelación quieres recibir los avisos?',
+    'prevtime_input': 'Por favor, introduce un número (por ejemplo: 15)',
+    'prevtime_success': 'Tiempo de aviso previo configurado a: {} minutos',
+    'prevtime_error': 'Por favor, introduce un número positivo válido.',
+    'lang_title': 'Configuración de Idioma',
+    'lang_desc': 'Idiomas disponibles:',
+    'lang_input': 'Por favor, escribe \'es\', \'en\', \'fr\' o \'de\':',
+    'lang_success': 'Idioma configurado a:',
+    'lang_error': 'Idioma no válido. Por favor, usa \'es\' (Español), \'en\' (English), \'fr\' (Français) o \'de\' (Deutsch)',
+    'timeout_error': '⏰ Operación Cancelada.',
+    'success_title': '✅ Configuración Exitosa',
+    'error_title': '❌ Error',
+    'new_session_name': '¿Nombre de la sesión?',
+    'new_session_datetime': 'Fecha y hora (formato DD-MM-YYYY HH:MM)',
+    'new_session_datetime_error': 'Formato de fecha y hora incorrecto. Usa DD-MM-YYYY HH:MM',
+    'new_session_name_error': 'El nombre de la sesión no puede estar vacío',
+    'new_session_group': 'Grupo al que avisa (@grupo)',
+    'new_session_channel': 'Canal en el que se manda el aviso (#canal)',
+    'new_session_success': 'Sesión creada correctamente',
+    'active_sessions_title': 'Sesiones Activas',
+    'active_sessions_none': 'Ninguno',
+    'active_sessions_date': 'Fecha:',
+    'active_sessions_group': 'Grupo:',
+    'active_sessions_channel': 'Canal:',
+    'purge_sessions_result': 'Se han eliminado {} sesiones antiguas',
+    'donate_dm': '¡Gracias por considerar una donación! Puedes donar en: {}',
+    'donate_response': 'Te he enviado un mensaje privado con la información de donación',
+    'donate_error': 'No pude enviarte un mensaje privado. Por favor, habilita los mensajes privados del servidor',
+    'session_alert_title': 'Aviso:',
+    'session_alert_in_minutes': 'Sesión en {} minutos',
+    'session_ready': 'Listos:',
+    'session_not_ready': 'No listos:',
+    'session_in_progress': '⚔️ Sesión en curso',
+    'session_ended': '🏁 Sesión finalizada',
+    'import_title': '📥 Importación de sesiones',
+    'import_result': 'Sesiones importadas: {}\nFilas con errores: {}',
+    'import_errors': 'Primeros errores ({})',
+    'import_format_error': 'Formato no soportado. Adjunta un fichero .csv o .ics',
+    'import_group_error': 'Grupo no encontrado',
+    'import_channel_error': 'Canal de texto no encontrado',
+    'import_duplicate_error': 'Ya existe una sesión con ese nombre y fecha',
+    'session_group_missing': '⚠️ Grupo eliminado',
+    'dm_reminder': '⏰ Recordatorio: la sesión **{}** en **{}** empieza en {} minutos.',
+    'dm_optin': 'Recibirás recordatorios de sesiones por mensaje privado.',
+    'dm_optout': 'Ya no recibirás recordatorios de sesiones por mensaje privado.',
+    'reminders_success': 'Recordatorios privados: {} (antelación: {} minutos)',
+    'reminders_mode_off': 'Desactivados',
+    'reminders_mode_ready': 'Solo jugadores listos',
+    'reminders_mode_role': 'Todo el grupo',
+    'digest_success_on': 'Modo resumen activado: los avisos que coincidan en un canal se enviarán en un solo mensaje',
+    'digest_success_off': 'Modo resumen desactivado: cada sesión tendrá su propio aviso',
+    'refresh_success': 'Actualización de mensajes: cada {} min las programadas, {} min las inminentes y {} min las que están en curso',
+    'stages_success': 'Etapas de aviso configuradas: {}',
+    'stages_default': 'las del servidor (o el tiempo de aviso previo)',
+    'conflict_warning': '⚠️ Se solapa con:',
+    'conflict_group': 'mismo grupo',
+    'conflict_channel': 'mismo canal',
+    'conflict_title': '⚠️ Sesiones solapadas',
+    'conflict_none': 'No hay sesiones solapadas en este servidor.',
+    'stats_title': '📊 Asistencia de {}',
+    'stats_none': 'Todavía no hay estadísticas de asistencia.',
+    'stats_reliability': 'Fiabilidad',
+    'stats_attended': 'Asistencias',
+    'stats_no_shows': 'Ausencias',
+    'stats_declined': 'Rechazos',
+    'stats_no_response': 'Sin respuesta',
+    'stats_sessions': 'Sesiones',
+    'stats_lead': 'Antelación media',
+    'session_unroutable_channel': '⚠️ El canal de la sesión **{}** en **{}** ha sido eliminado. No se enviarán avisos hasta que le asignes otro canal con /editsession.',
+    'session_unroutable_role': '⚠️ El grupo de la sesión **{}** en **{}** ha sido eliminado. No se enviarán avisos hasta que le asignes otro grupo con /editsession.',
+    'button_ready': 'Listo',
+    'button_not_ready': 'No disponible',
+    'button_new_session': 'Crear nueva sesión',
+    'button_cancel': 'Cancelar',
+    'button_confirm': 'Confirmar',
+    'button_edit_datetime': 'Fecha y Hora',
+    'button_edit_duration': 'Duración',
+    'button_edit_group': 'Grupo',
+    'button_edit_channel': 'Canal',
+    'button_edit_stages': 'Avisos',
+    'button_roster': 'Ver lista completa',
+    'button_previous': 'Anterior',
+    'button_next': 'Siguiente',
+    'creator_only': 'Solo el creador de la sesión anterior puede usar este botón.',
+    'select_session': 'Selecciona una sesión',
+    'select_session_date': 'Fecha: {}',
+    'select_role': 'Selecciona un rol',
+    'select_channel': 'Selecciona un canal',
+    'group_updated': 'El grupo se ha actualizado a: {}',
+    'channel_updated': 'El canal se ha actualizado a: {}',
+    'datetime_updated': 'La fecha y hora se han actualizado a: {}',
+    'duration_updated': 'La duración se ha actualizado a: {}',
+    'modal_datetime_title': 'Editar Fecha y Hora',
+    'modal_datetime_label': 'Nueva fecha y hora',
+    'modal_duration_title': 'Editar Duración',
+    'modal_duration_label': 'Nueva duración (en minutos)',
+    'modal_duration_placeholder': 'Ej: 120 (2 horas)',
+    'modal_stages_title': 'Editar Avisos',
+    'modal_stages_label': 'Minutos de antelación (separados por comas)',
+    'modal_stages_placeholder': 'Ej: 1440,60,10 (vacío = los del servidor)',
+    'modal_new_title': 'Crear Nueva Sesión',
+    'modal_new_name': 'Nombre de la sesión',
+    'modal_new_name_placeholder': 'Ej: Raid semanal',
+    'modal_new_datetime': 'Fecha y hora (DD-MM-YYYY HH:MM)',
+    'modal_new_datetime_placeholder': 'Ej: 15-02-2024 14:30',
+    'modal_new_duration': 'Duración en minutos',
+    'session_created': 'Se ha creado la sesión **{}**\n📅 Fecha: {}\n⏱️ Duración: {}\n👥 Grupo: {}\n📢 Canal: {}',
+    'recurrence_line': '🔁 Repetición: {}',
+    'recurrence_rule_weekly': 'Semanal',
+    'recurrence_rule_interval': 'Cada N días',
+    'recurrence_rule_weekdays': 'Días de la semana',
+    'recurrence_every_weeks': 'Cada {} semanas',
+    'recurrence_every_days': 'Cada {} días',
+    'weekday_names': 'lun,mar,mié,jue,vie,sáb,dom',
+    'embed_datetime': '📅 Fecha y Hora',
+    'embed_time_left': '⏰ Tiempo restante',
+    'embed_duration': '⏱️ Duración',
+    'embed_group': '👥 Grupo',
+    'embed_created_by': 'Creada por {}',
+    'unknown_user': 'Usuario desconocido',
+    'time_ended': 'Finalizada',
+    'minutes': '{} minutos',
+    'hours_one': '{} hora',
+    'hours_many': '{} horas',
+    'session_mention': '¡Hey {}! Vuestra sesión de **{}** comenzará en {} minutos!',
+    'availability_ready': 'Has marcado que estás disponible para esta sesión.',
+    'availability_not_ready': 'Has marcado que no estás disponible para esta sesión.',
+    'delete_confirm_title': '🗑️ Confirmar Eliminación',
+    'delete_confirm_desc': '¿Estás seguro de que quieres eliminar la sesión **{}**?\n\nEsta acción no se puede deshacer.',
+    'edit_title': '✏️ Editar Sesión',
+    'edit_desc': '**Sesión:** {}\n**Fecha:** {}\n\nSelecciona qué quieres editar:',
+    'end_title': '🏁 Sesión Finalizada',
+    'end_desc': 'La sesión **{}** ha finalizado.\n\n¿Deseas programar una nueva sesión?',
+    'weekdays_error': 'Días de la semana no válidos. Usa por ejemplo: lun,mie,vie',
+    'recurrence_stopped': 'La sesión ya no se repetirá. Las ocurrencias ya programadas se mantienen.',
+    'active_sessions_desc': 'Lista de todas las sesiones programadas en este servidor:',
+    'active_sessions_in': 'En:',
+    'active_sessions_duration': 'Duración:',
+    'status_in_progress': '🔴 En curso',
+    'status_ended': '⚫ Finalizada',
+    'status_imminent': '🟠 Inminente',
+    'status_scheduled': '🟡 Programada',
+    'delete_title': '🗑️ Eliminar Sesión',
+    'delete_desc': 'Selecciona la sesión que deseas eliminar:',
+    'edit_select_desc': 'Selecciona la sesión que deseas modificar:',
+    'picker_hint': 'Mostrando {} de {}. Usa la opción `session` del comando para buscar cualquier sesión.',
+    'history_title': '📚 Historial de Sesiones',
+    'history_desc': 'Últimas sesiones finalizadas en este servidor:',
+    'backup_created': '💾 Copia creada: `{}`\n\nCopias disponibles:\n```\n{}\n```\nPara restaurar una, detén el bot y ejecuta `python backup.py restore <copia>`.',
+    'help_title': '📖 Ayuda del Bot',
+    'help_desc': 'Lista de comandos disponibles:',
+    'help_sessions': 'Gestión de Sesiones',
+    'help_config': 'Configuración',
+    'help_other': 'Otros',
+    'help_footer': 'Tip: Para confirmar asistencia, usa los botones ✅ y ❌ en los mensajes de sesión',
+    'help_newsession': 'Crea una nueva sesión. Podrás establecer nombre, fecha, grupo, canal y duración. Usa la opción `repeat` para que se repita automáticamente.',
+    'help_stoprecurrence': 'Detiene la repetición de una sesión recurrente.',
+    'help_importsessions': 'Importa sesiones en bloque desde un fichero CSV o iCalendar (.ics).',
+    'help_exportsessions': 'Exporta las sesiones del servidor a CSV o iCalendar.',
+    'help_activesessions': 'Muestra todas las sesiones activas en el servidor.',
+    'help_editsession': 'Permite modificar una sesión existente (fecha, duración, grupo, canal). Escribe en la opción `session` para buscarla por nombre.',
+    'help_sessionhistory': 'Muestra las últimas sesiones finalizadas.',
+    'help_conflicts': 'Muestra las sesiones que se solapan en el mismo grupo o canal.',
+    'help_stats': 'Muestra la fiabilidad, ausencias y antelación media de un usuario o rol.',
+    'help_deletesession': 'Elimina una sesión existente. Escribe en la opción `session` para buscarla por nombre.',
+    'help_config_timezone': 'Configura la zona horaria del servidor (Ej: Europe/Madrid).',
+    'help_config_lang': 'Configura el idioma del bot (Español, English, Français, Deutsch).',
+    'help_config_prevtime': 'Configura con cuántos minutos de antelación se avisa de las sesiones.',
+    'help_config_stages': 'Configura varias etapas de aviso en el canal (Ej: 1440,60,10).',
+    'help_config_reminders': 'Activa recordatorios por mensaje privado y sus tiempos de antelación.',
+    'help_config_digest': 'Agrupa en un solo mensaje los avisos que coinciden en el mismo canal.',
+    'help_config_refresh': 'Ajusta cada cuánto se actualizan los mensajes de sesión según su estado.',
+    'help_dmreminders': 'Activa o desactiva los recordatorios privados para ti.',
+    'help_help': 'Muestra este mensaje de ayuda.',
+    'help_donate': 'Muestra información sobre donaciones.',
+    'digest_title': '📅 Próximas sesiones',
+    'digest_mention': '¡Hey {}! {} sesiones están a punto de empezar en este canal.',
+    'roster_more': '… y {} más',
+    'roster_title': 'Asistencia · {}',
+    'roster_page': 'Página {}/{}',
+}
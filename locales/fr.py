@@ -0,0 +1,195 @@
+# locales/fr.py
+# Catálogo de textos: Français
+TEXTS = {
+    'config_title': 'Configuration du Bot',
+    'config_desc': 'Choisis ce que tu veux configurer :',
+    'config_timezone_desc': 'Configure ton fuseau horaire',
+    'config_prevtime_desc': 'Configure le délai de préavis',
+    'config_lang_desc': 'Configure la langue du bot',
+    'timezone_title': 'Configuration du Fuseau Horaire',
+    'timezone_examples': 'Exemples de fuseaux horaires valides :',
+    'timezone_input': 'Indique ton fuseau horaire :',
+    'timezone_success': 'Fuseau horaire configuré sur :',
+    'timezone_error': 'Fuseau horaire non valide. Utilise un format valide comme dans les exemples.',
+    'prevtime_title': 'Configuration du Délai de Préavis',
+    'prevtime_desc': 'Combien de minutes à l\'avance veux-tu recevoir les avis ?',
+    'prevtime_input': 'Indique un nombre (par exemple : 15)',
+    'prevtime_success': 'Délai de préavis configuré sur : {} minutes',
+    'prevtime_error': 'Indique un nombre positif valide.',
+    'lang_title': 'Configuration de la Langue',
+    'lang_desc': 'Langues disponibles :',
+    'lang_input': 'Écris \'es\', \'en\', \'fr\' ou \'de\' :',
+    'lang_success': 'Langue configurée sur :',
+    'lang_error': 'Langue non valide. Utilise \'es\', \'en\', \'fr\' ou \'de\'',
+    'timeout_error': '⏰ Opération Annulée.',
+    'success_title': '✅ Configuration Réussie',
+    'error_title': '❌ Erreur',
+    'new_session_name': 'Nom de la session ?',
+    'new_session_datetime': 'Date et heure (format JJ-MM-AAAA HH:MM)',
+    'new_session_datetime_error': 'Format de date et heure incorrect. Utilise JJ-MM-AAAA HH:MM',
+    'new_session_name_error': 'Le nom de la session ne peut pas être vide',
+    'new_session_group': 'Groupe à prévenir (@groupe)',
+    'new_session_channel': 'Salon où envoyer l\'avis (#salon)',
+    'new_session_success': 'Session créée avec succès',
+    'active_sessions_title': 'Sessions Actives',
+    'active_sessions_none': 'Aucune',
+    'active_sessions_date': 'Date :',
+    'active_sessions_group': 'Groupe :',
+    'active_sessions_channel': 'Salon :',
+    'purge_sessions_result': '{} anciennes sessions ont été supprimées',
+    'donate_dm': 'Merci de penser à faire un don ! Tu peux donner ici : {}',
+    'donate_response': 'Je t\'ai envoyé un message privé avec les informations pour faire un don',
+    'donate_error': 'Je n\'ai pas pu t\'envoyer de message privé. Active les messages privés des membres du serveur',
+    'session_alert_title': 'Avis :',
+    'session_alert_in_minutes': 'Session dans {} minutes',
+    'session_ready': 'Prêts :',
+    'session_not_ready': 'Pas prêts :',
+    'session_in_progress': '⚔️ Session en cours',
+    'session_ended': '🏁 Session terminée',
+    'import_title': '📥 Importation de sessions',
+    'import_result': 'Sessions importées : {}\nLignes en erreur : {}',
+    'import_errors': 'Premières erreurs ({})',
+    'import_format_error': 'Format non pris en charge. Joins un fichier .csv ou .ics',
+    'import_group_error': 'Groupe introuvable',
+    'import_channel_error': 'Salon textuel introuvable',
+    'import_duplicate_error': 'Une session avec ce nom et cette date existe déjà',
+    'session_group_missing': '⚠️ Groupe supprimé',
+    'dm_reminder': '⏰ Rappel : la session **{}** sur **{}** commence dans {} minutes.',
+    'dm_optin': 'Tu recevras les rappels de sessions par message privé.',
+    'dm_optout': 'Tu ne recevras plus les rappels de sessions par message privé.',
+    'reminders_success': 'Rappels privés : {} (préavis : {} minutes)',
+    'reminders_mode_off': 'Désactivés',
+    'reminders_mode_ready': 'Seulement les joueurs prêts',
+    'reminders_mode_role': 'Tout le groupe',
+    'digest_success_on': 'Mode résumé activé : les alertes simultanées d\'un salon seront envoyées en un seul message',
+    'digest_success_off': 'Mode résumé désactivé : chaque session aura sa propre alerte',
+    'refresh_success': 'Mise à jour des messages : toutes les {} min pour les sessions programmées, {} min pour les imminentes et {} min pour celles en cours',
+    'stages_success': 'Étapes d\'avis configurées : {}',
+    'stages_default': 'celles du serveur (ou le délai de préavis)',
+    'conflict_warning': '⚠️ Chevauche :',
+    'conflict_group': 'même groupe',
+    'conflict_channel': 'même salon',
+    'conflict_title': '⚠️ Sessions qui se chevauchent',
+    'conflict_none': 'Aucune session ne se chevauche sur ce serveur.',
+    'stats_title': '📊 Présence de {}',
+    'stats_none': 'Pas encore de statistiques de présence.',
+    'stats_reliability': 'Fiabilité',
+    'stats_attended': 'Présences',
+    'stats_no_shows': 'Absences',
+    'stats_declined': 'Refus',
+    'stats_no_response': 'Sans réponse',
+    'stats_sessions': 'Sessions',
+    'stats_lead': 'Préavis moyen',
+    'session_unroutable_channel': '⚠️ Le salon de la session **{}** sur **{}** a été supprimé. Aucun avis ne sera envoyé tant que tu ne lui auras pas attribué un autre salon avec /editsession.',
+    'session_unroutable_role': '⚠️ Le groupe de la session **{}** sur **{}** a été supprimé. Aucun avis ne sera envoyé tant que tu ne lui auras pas attribué un autre groupe avec /editsession.',
+    'button_ready': 'Prêt',
+    'button_not_ready': 'Indisponible',
+    'button_new_session': 'Créer une nouvelle session',
+    'button_cancel': 'Annuler',
+    'button_confirm': 'Confirmer',
+    'button_edit_datetime': 'Date et Heure',
+    'button_edit_duration': 'Durée',
+    'button_edit_group': 'Groupe',
+    'button_edit_channel': 'Salon',
+    'button_edit_stages': 'Avis',
+    'button_roster': 'Voir la liste complète',
+    'button_previous': 'Précédent',
+    'button_next': 'Suivant',
+    'creator_only': 'Seul le créateur de la session précédente peut utiliser ce bouton.',
+    'select_session': 'Choisis une session',
+    'select_session_date': 'Date : {}',
+    'select_role': 'Choisis un rôle',
+    'select_channel': 'Choisis un salon',
+    'group_updated': 'Le groupe a été mis à jour : {}',
+    'channel_updated': 'Le salon a été mis à jour : {}',
+    'datetime_updated': 'La date et l\'heure ont été mises à jour : {}',
+    'duration_updated': 'La durée a été mise à jour : {}',
+    'modal_datetime_title': 'Modifier la Date et l\'Heure',
+    'modal_datetime_label': 'Nouvelle date et heure',
+    'modal_duration_title': 'Modifier la Durée',
+    'modal_duration_label': 'Nouvelle durée (en minutes)',
+    'modal_duration_placeholder': 'Ex : 120 (2 heures)',
+    'modal_stages_title': 'Modifier les Avis',
+    'modal_stages_label': 'Minutes à l\'avance (séparées par des virgules)',
+    'modal_stages_placeholder': 'Ex : 1440,60,10 (vide = ceux du serveur)',
+    'modal_new_title': 'Créer une Nouvelle Session',
+    'modal_new_name': 'Nom de la session',
+    'modal_new_name_placeholder': 'Ex : Raid hebdomadaire',
+    'modal_new_datetime': 'Date et heure (JJ-MM-AAAA HH:MM)',
+    'modal_new_datetime_placeholder': 'Ex : 15-02-2024 14:30',
+    'modal_new_duration': 'Durée en minutes',
+    'session_created': 'La session **{}** a été créée\n📅 Date : {}\n⏱️ Durée : {}\n👥 Groupe : {}\n📢 Salon : {}',
+    'recurrence_line': '🔁 Répétition : {}',
+    'recurrence_rule_weekly': 'Hebdomadaire',
+    'recurrence_rule_interval': 'Tous les N jours',
+    'recurrence_rule_weekdays': 'Jours de la semaine',
+    'recurrence_every_weeks': 'Toutes les {} semaines',
+    'recurrence_every_days': 'Tous les {} jours',
+    'weekday_names': 'lun,mar,mer,jeu,ven,sam,dim',
+    'embed_datetime': '📅 Date et Heure',
+    'embed_time_left': '⏰ Temps restant',
+    'embed_duration': '⏱️ Durée',
+    'embed_group': '👥 Groupe',
+    'embed_created_by': 'Créée par {}',
+    'unknown_user': 'Utilisateur inconnu',
+    'time_ended': 'Terminée',
+    'minutes': '{} minutes',
+    'hours_one': '{} heure',
+    'hours_many': '{} heures',
+    'session_mention': 'Hé {} ! Votre session **{}** commence dans {} minutes !',
+    'availability_ready': 'Tu as indiqué que tu es disponible pour cette session.',
+    'availability_not_ready': 'Tu as indiqué que tu n\'es pas disponible pour cette session.',
+    'delete_confirm_title': '🗑️ Confirmer la Suppression',
+    'delete_confirm_desc': 'Es-tu sûr de vouloir supprimer la session **{}** ?\n\nCette action est irréversible.',
+    'edit_title': '✏️ Modifier la Session',
+    'edit_desc': '**Session :** {}\n**Date :** {}\n\nChoisis ce que tu veux modifier :',
+    'end_title': '🏁 Session Terminée',
+    'end_desc': 'La session **{}** est terminée.\n\nVeux-tu programmer une nouvelle session ?',
+    'weekdays_error': 'Jours de la semaine non valides. Utilise par exemple : mon,wed,fri',
+    'recurrence_stopped': 'La session ne se répétera plus. Les occurrences déjà programmées sont conservées.',
+    'active_sessions_desc': 'Liste de toutes les sessions programmées sur ce serveur :',
+    'active_sessions_in': 'Dans :',
+    'active_sessions_duration': 'Durée :',
+    'status_in_progress': '🔴 En cours',
+    'status_ended': '⚫ Terminée',
+    'status_imminent': '🟠 Imminente',
+    'status_scheduled': '🟡 Programmée',
+    'delete_title': '🗑️ Supprimer une Session',
+    'delete_desc': 'Choisis la session à supprimer :',
+    'edit_select_desc': 'Choisis la session à modifier :',
+    'picker_hint': '{} sur {} affichées. Utilise l\'option `session` de la commande pour rechercher n\'importe quelle session.',
+    'history_title': '📚 Historique des Sessions',
+    'history_desc': 'Dernières sessions terminées sur ce serveur :',
+    'backup_created': '💾 Sauvegarde créée : `{}`\n\nSauvegardes disponibles :\n```\n{}\n```\nPour en restaurer une, arrête le bot et exécute `python backup.py restore <sauvegarde>`.',
+    'help_title': '📖 Aide du Bot',
+    'help_desc': 'Liste des commandes disponibles :',
+    'help_sessions': 'Gestion des Sessions',
+    'help_config': 'Configuration',
+    'help_other': 'Autres',
+    'help_footer': 'Astuce : pour confirmer ta présence, utilise les boutons ✅ et ❌ des messages de session',
+    'help_newsession': 'Crée une nouvelle session : nom, date, groupe, salon et durée. Utilise l\'option `repeat` pour qu\'elle se répète automatiquement.',
+    'help_stoprecurrence': 'Arrête la répétition d\'une session récurrente.',
+    'help_importsessions': 'Importe des sessions en masse depuis un fichier CSV ou iCalendar (.ics).',
+    'help_exportsessions': 'Exporte les sessions du serveur en CSV ou iCalendar.',
+    'help_activesessions': 'Affiche toutes les sessions actives du serveur.',
+    'help_editsession': 'Modifie une session existante (date, durée, groupe, salon). Écris dans l\'option `session` pour la chercher par nom.',
+    'help_sessionhistory': 'Affiche les dernières sessions terminées.',
+    'help_conflicts': 'Affiche les sessions qui se chevauchent dans le même groupe ou salon.',
+    'help_stats': 'Affiche la fiabilité, les absences et le préavis moyen d\'un utilisateur ou d\'un rôle.',
+    'help_deletesession': 'Supprime une session existante. Écris dans l\'option `session` pour la chercher par nom.',
+    'help_config_timezone': 'Configure le fuseau horaire du serveur (ex : Europe/Paris).',
+    'help_config_lang': 'Configure la langue du bot (Español, English, Français, Deutsch).',
+    'help_config_prevtime': 'Configure combien de minutes à l\'avance les sessions sont annoncées.',
+    'help_config_stages': 'Configure plusieurs étapes d\'avis dans le salon (ex : 1440,60,10).',
+    'help_config_reminders': 'Active les rappels par message privé et leurs délais.',
+    'help_config_digest': 'Regroupe en un seul message les alertes simultanées d\'un même salon.',
+    'help_config_refresh': 'Règle la fréquence de mise à jour des messages de session selon leur état.',
+    'help_dmreminders': 'Active ou désactive les rappels privés pour toi.',
+    'help_help': 'Affiche ce message d\'aide.',
+    'help_donate': 'Affiche les informations pour faire un don.',
+    'digest_title': '📅 Prochaines sessions',
+    'digest_mention': 'Hé {} ! {} sessions vont bientôt commencer dans ce salon.',
+    'roster_more': '… et {} de plus',
+    'roster_title': 'Présence · {}',
+    'roster_page': 'Page {}/{}',
+}
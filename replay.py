@@ -0,0 +1,502 @@
+# replay.py
+# Simulador de trazas de producción con reloj acelerado.
+#
+# Reproduce una traza grabada por el bot (TRACE_FILE, ver tracing.py) contra
+# una copia de la base de datos y un Discord simulado. El reloj del bot se
+# sustituye por uno simulado (clock.SimulatedClock) y las tareas programadas
+# se ejecutan en su instante simulado, de modo que una semana de avisos,
+# transiciones de estado y limpieza de sesiones se recorre en minutos.
+#
+# Al terminar informa de la duración de cada ciclo de las tareas (comparada
+# con la grabada en producción), de la latencia de las interacciones, de los
+# mensajes enviados y editados, y de los servidores que más tiempo consumen.
+#
+# Uso:
+#   python replay.py bot-trace.jsonl
+#   python replay.py bot-trace.jsonl --speed 0 --profile replay.prof
+#   python replay.py bot-trace.jsonl --hours 24 --json
+#   python replay.py bot-trace.jsonl --db backups/sessions-20250101-120000.db
+#
+# --speed es el factor de aceleración (1000 = un minuto simulado cada 60 ms);
+# con 0 la simulación avanza tan rápido como puede.
+import argparse
+import asyncio
+import cProfile
+import io
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+import clock
+import rol_sessions
+from config import BACKUP_DIR
+from loadtest import StubChannel, StubInteraction, StubMessage, StubRole, StubUser, percentile
+from storage import SQLiteSessionStore
+from tracing import read_trace
+
+# Tareas programadas del bot y su periodo. La copia de seguridad no se simula.
+TASKS = [
+    ('manage_sessions', timedelta(minutes=1)),
+    ('process_outbox', timedelta(seconds=10)),
+    ('compact_archive_task', timedelta(hours=24)),
+]
+# Comandos que no se reproducen: escriben fuera de la copia o necesitan un adjunto
+SKIPPED_COMMANDS = {'backup'}
+ATTACHMENT_OPTION = 11
+USER_OPTIONS = (6, 9)
+CHANNEL_OPTION = 7
+ROLE_OPTION = 8
+
+counters = Counter()
+
+
+# ===================================================================
+# DISCORD SIMULADO
+# ===================================================================
+# A diferencia de loadtest.py, cualquier ID de rol, canal o miembro existe
+# salvo que la traza indique que se eliminó.
+class ReplayMessage(StubMessage):
+    async def edit(self, **kwargs):
+        counters['messages_edited'] += 1
+        return self
+
+    async def reply(self, *args, **kwargs):
+        counters['messages_sent'] += 1
+        return ReplayMessage(next_message_id())
+
+
+class ReplayChannel(StubChannel):
+    def __init__(self, guild, channel_id):
+        super().__init__(channel_id)
+        self.guild = guild
+
+    async def send(self, *args, **kwargs):
+        counters['messages_sent'] += 1
+        return ReplayMessage(next_message_id())
+
+    async def fetch_message(self, message_id):
+        counters['messages_fetched'] += 1
+        return ReplayMessage(message_id)
+
+    def get_partial_message(self, message_id):
+        return ReplayMessage(message_id)
+
+
+class ReplayUser(StubUser):
+    async def send(self, *args, **kwargs):
+        counters['dms_sent'] += 1
+
+
+class ReplayRole(StubRole):
+    def __init__(self, guild, role_id):
+        super().__init__(role_id, [])
+        self.guild = guild
+
+
+class ReplayGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.name = f"Servidor {guild_id}"
+        self._roles = {}
+        self._channels = {}
+        self._members = {}
+        self.deleted = set()
+
+    @property
+    def roles(self):
+        return list(self._roles.values())
+
+    @property
+    def text_channels(self):
+        return list(self._channels.values())
+
+    def get_role(self, role_id):
+        if role_id in self.deleted:
+            return None
+        if role_id not in self._roles:
+            self._roles[role_id] = ReplayRole(self, role_id)
+        return self._roles[role_id]
+
+    def get_channel(self, channel_id):
+        if channel_id in self.deleted:
+            return None
+        if channel_id not in self._channels:
+            self._channels[channel_id] = ReplayChannel(self, channel_id)
+        return self._channels[channel_id]
+
+    def get_member(self, user_id):
+        if user_id not in self._members:
+            self._members[user_id] = ReplayUser(user_id)
+        return self._members[user_id]
+
+
+class ReplayWorld:
+    """Servidores simulados; los eliminados dejan de existir para el bot"""
+
+    def __init__(self):
+        self.guilds = {}
+        self.removed = set()
+
+    def get_guild(self, guild_id):
+        guild_id = int(guild_id)
+        if guild_id in self.removed:
+            return None
+        if guild_id not in self.guilds:
+            self.guilds[guild_id] = ReplayGuild(guild_id)
+        return self.guilds[guild_id]
+
+
+class ReplayInteraction(StubInteraction):
+    def __init__(self, user, guild, channel_id=None):
+        super().__init__(user, guild, 0)
+        self.channel_id = channel_id
+        self.channel = guild.get_channel(channel_id) if channel_id else None
+        self.message = ReplayMessage(next_message_id())
+
+
+_message_ids = iter(range(10 ** 17, 10 ** 18))
+
+
+def next_message_id():
+    return next(_message_ids)
+
+
+# ===================================================================
+# TRADUCCIÓN DE IDS
+# ===================================================================
+class IdMap:
+    """Traduce los IDs de la traza a los de la simulación.
+
+    Las sesiones creadas desde la interfaz conservan su ID. Las ocurrencias de
+    reglas recurrentes las crea el planificador simulado con IDs nuevos: se
+    localizan por regla y fecha la primera vez que la traza las menciona.
+    """
+
+    def __init__(self):
+        self.recurrences = {}
+        self.occurrences = {}   # ID en la traza -> (guild_id, recurrence_id de la traza, fecha)
+        self.sessions = {}
+        self.unmatched = 0
+
+    def recurrence(self, recurrence_id):
+        return self.recurrences.get(int(recurrence_id), int(recurrence_id))
+
+    def session(self, session_id):
+        session_id = int(session_id)
+        if session_id in self.sessions:
+            return self.sessions[session_id]
+        if session_id not in self.occurrences:
+            return session_id
+        guild_id, recurrence_id, occurrence = self.occurrences[session_id]
+        recurrence_id = self.recurrence(recurrence_id)
+        for attempt in range(2):
+            for row in rol_sessions.store.guild_sessions(guild_id):
+                session = rol_sessions.convert_db_to_session(row)
+                if session['recurrence_id'] == recurrence_id and session['datetime'] == occurrence:
+                    self.sessions[session_id] = session['session_id']
+                    return session['session_id']
+            if attempt == 0:
+                # El planificador simulado puede ir unos segundos por detrás del real
+                rol_sessions.RecurrenceManager.materialize_due()
+        self.unmatched += 1
+        self.sessions[session_id] = session_id
+        return session_id
+
+
+# ===================================================================
+# REPRODUCCIÓN DE EVENTOS
+# ===================================================================
+class Replayer:
+    def __init__(self, world):
+        self.world = world
+        self.ids = IdMap()
+        self.events = Counter()
+        self.errors = Counter()
+        self.skipped = Counter()
+        self.acks = []
+        self.ticks = defaultdict(list)              # tarea -> duraciones reales en la simulación (s)
+        self.production_ticks = defaultdict(list)   # tarea -> duraciones grabadas en producción (s)
+
+    async def run_task(self, name):
+        task = getattr(rol_sessions, name)
+        started = time.perf_counter()
+        await task.coro()
+        self.ticks[name].append(time.perf_counter() - started)
+
+    async def apply(self, event):
+        kind = event['type']
+        if kind == 'tick':
+            self.production_ticks[event['task']].append(event['elapsed_ms'] / 1000)
+            return
+        handler = getattr(self, f"on_{kind}", None)
+        if handler is None:
+            self.skipped[kind] += 1
+            return
+        self.events[kind] += 1
+        try:
+            await handler(event)
+        except Exception as e:
+            self.errors[kind] += 1
+            rol_sessions.logger.error(f"Error reproduciendo {kind}: {str(e)}")
+
+    async def interact(self, event, action):
+        guild = self.world.get_guild(event['guild_id'])
+        user = guild.get_member(int(event['user_id']))
+        interaction = ReplayInteraction(user, guild, event.get('channel_id'))
+        started = time.perf_counter()
+        await action(interaction)
+        if interaction.acked_at is not None:
+            self.acks.append(interaction.acked_at - started)
+
+    async def on_availability(self, event):
+        session_id = self.ids.session(event['session_id'])
+        await self.interact(event, lambda interaction: rol_sessions.handle_availability(
+            interaction, session_id, event['status']
+        ))
+
+    async def on_command(self, event):
+        parts = event['name'].split()
+        command = rol_sessions.bot.tree.get_command(parts[0])
+        for part in parts[1:]:
+            command = command.get_command(part) if command else None
+        if command is None or parts[0] in SKIPPED_COMMANDS:
+            self.skipped['command'] += 1
+            return
+        guild = self.world.get_guild(event['guild_id'])
+        kwargs = {}
+        for name, option_type, value in event['options']:
+            if option_type == ATTACHMENT_OPTION:
+                self.skipped['command'] += 1
+                return
+            if option_type in USER_OPTIONS:
+                value = guild.get_member(int(value))
+            elif option_type == CHANNEL_OPTION:
+                value = guild.get_channel(int(value))
+            elif option_type == ROLE_OPTION:
+                value = guild.get_role(int(value))
+            elif name == 'session' and str(value).isdigit():
+                value = str(self.ids.session(value))
+            elif name == 'recurrence' and str(value).isdigit():
+                value = str(self.ids.recurrence(value))
+            kwargs[name] = value
+        await self.interact(event, lambda interaction: command.callback(interaction, **kwargs))
+
+    async def on_session_saved(self, event):
+        fields = dict(event['fields'])
+        fields.pop('version', None)
+        if 'session_id' in fields:
+            fields['session_id'] = self.ids.session(fields['session_id'])
+        if fields.get('recurrence_id') is not None:
+            fields['recurrence_id'] = self.ids.recurrence(fields['recurrence_id'])
+        rol_sessions.SessionManager.save_session(fields)
+
+    async def on_session_deleted(self, event):
+        rol_sessions.SessionManager.delete_session(self.ids.session(event['session_id']))
+
+    async def on_sessions_imported(self, event):
+        created_at = clock.now().strftime("%d-%m-%Y %H:%M")
+        for row in event['sessions']:
+            rol_sessions.SessionManager.save_session(dict(
+                row, guild_id=event['guild_id'], creator_id=event['creator_id'], created_at=created_at,
+                notified=False, status={'ready': [], 'not_ready': []}
+            ))
+
+    async def on_recurrence_created(self, event):
+        first_occurrence = datetime.fromisoformat(event['first_occurrence'])
+        recurrence_id = rol_sessions.RecurrenceManager.create_recurrence(
+            event['rule'], event['session'], first_occurrence
+        )
+        if recurrence_id is not None:
+            self.ids.recurrences[int(event['recurrence_id'])] = recurrence_id
+
+    async def on_occurrence_created(self, event):
+        self.ids.occurrences[int(event['session_id'])] = (event['guild_id'], event['recurrence_id'], event['datetime'])
+
+    async def on_channel_deleted(self, event):
+        guild = self.world.get_guild(event['guild_id'])
+        channel = guild.get_channel(int(event['channel_id']))
+        guild.deleted.add(channel.id)
+        await rol_sessions.on_guild_channel_delete(channel)
+
+    async def on_role_deleted(self, event):
+        guild = self.world.get_guild(event['guild_id'])
+        role = guild.get_role(int(event['role_id']))
+        guild.deleted.add(role.id)
+        await rol_sessions.on_guild_role_delete(role)
+
+    async def on_guild_removed(self, event):
+        guild = self.world.get_guild(event['guild_id'])
+        self.world.removed.add(guild.id)
+        await rol_sessions.on_guild_remove(guild)
+
+
+def recorded_session_ids(events):
+    for event in events:
+        if event.get('session_id') is not None:
+            yield int(event['session_id'])
+        if (event.get('fields') or {}).get('session_id') is not None:
+            yield int(event['fields']['session_id'])
+        for row in event.get('sessions', ()):
+            yield int(row['session_id'])
+
+
+def parse_time(text):
+    moment = datetime.fromisoformat(text)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+async def simulate(events, start, end, speed, replayer):
+    """Avanza el reloj simulado evento a evento y ejecuta las tareas en su instante"""
+    sim_clock = clock.SimulatedClock(start)
+    clock.set_clock(sim_clock)
+    next_runs = {name: start for name, _ in TASKS}
+    periods = dict(TASKS)
+    wall_start = time.perf_counter()
+    position = 0
+
+    while True:
+        next_event = parse_time(events[position]['t']) if position < len(events) else None
+        task_name = min(next_runs, key=next_runs.get)
+        moment = next_runs[task_name]
+        if next_event is not None and next_event < moment:
+            moment = next_event
+        if moment > end:
+            break
+
+        if speed:
+            # Ritmo acelerado: el instante simulado se traduce a tiempo real
+            delay = (moment - start).total_seconds() / speed - (time.perf_counter() - wall_start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        sim_clock.advance_to(moment)
+
+        if next_event is not None and next_event == moment:
+            await replayer.apply(events[position])
+            position += 1
+        else:
+            await replayer.run_task(task_name)
+            next_runs[task_name] = moment + periods[task_name]
+
+    return time.perf_counter() - wall_start
+
+
+def tick_summary(durations):
+    return {
+        'count': len(durations),
+        'p50_ms': round(percentile(durations, 50) * 1000, 2),
+        'p99_ms': round(percentile(durations, 99) * 1000, 2),
+        'max_ms': round(max(durations, default=0) * 1000, 2),
+    }
+
+
+def build_report(replayer, start, end, elapsed):
+    simulated = (end - start).total_seconds()
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'simulated_s': round(simulated, 1),
+        'elapsed_s': round(elapsed, 2),
+        'speedup': round(simulated / elapsed, 1) if elapsed else None,
+        'events': dict(replayer.events),
+        'errors': dict(replayer.errors),
+        'skipped': dict(replayer.skipped),
+        'unmatched_sessions': replayer.ids.unmatched,
+        'ack_ms': {
+            'p50': round(percentile(replayer.acks, 50) * 1000, 2),
+            'p99': round(percentile(replayer.acks, 99) * 1000, 2),
+            'max': round(max(replayer.acks, default=0) * 1000, 2),
+        },
+        'ticks': {name: tick_summary(durations) for name, durations in replayer.ticks.items()},
+        'production_ticks': {name: tick_summary(durations) for name, durations in replayer.production_ticks.items()},
+        'discord': dict(counters),
+        'top_guilds': [
+            {'guild_id': guild_id, 'busy_s': round(metrics['busy'], 3), 'refreshes': metrics['refreshes'],
+             'deliveries': metrics['deliveries'], 'deferred': metrics['deferred']}
+            for guild_id, metrics in rol_sessions.guild_scheduler.top()
+        ],
+    }
+
+
+def print_report(report):
+    print(f"Simulado {report['start']} → {report['end']} ({report['simulated_s'] / 3600:.1f} h) "
+          f"en {report['elapsed_s']} s (x{report['speedup']})")
+    print(f"  eventos {report['events']} | errores {report['errors']} | omitidos {report['skipped']} | "
+          f"sesiones sin traducir {report['unmatched_sessions']}")
+    ack = report['ack_ms']
+    print(f"  interacciones: reconocimiento p50 {ack['p50']} ms | p99 {ack['p99']} ms | max {ack['max']} ms")
+    for name, summary in report['ticks'].items():
+        production = report['production_ticks'].get(name)
+        line = (f"  {name}: {summary['count']} ciclos | p50 {summary['p50_ms']} ms | "
+                f"p99 {summary['p99_ms']} ms | max {summary['max_ms']} ms")
+        if production:
+            line += f" (producción: p50 {production['p50_ms']} ms | p99 {production['p99_ms']} ms)"
+        print(line)
+    print(f"  Discord: {report['discord']}")
+    for entry in report['top_guilds']:
+        print(f"  servidor {entry['guild_id']}: {entry['busy_s']} s | {entry['refreshes']} refrescos | "
+              f"{entry['deliveries']} entregas | {entry['deferred']} aplazados")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduce una traza de producción con el reloj acelerado")
+    parser.add_argument('trace', help="Fichero de traza (TRACE_FILE)")
+    parser.add_argument('--db', help="Base de datos de partida (por defecto, la copia indicada en la traza)")
+    parser.add_argument('--backup-dir', default=BACKUP_DIR, help="Directorio de copias de seguridad")
+    parser.add_argument('--speed', type=float, default=1000, help="Factor de aceleración (0 = sin pausas)")
+    parser.add_argument('--hours', type=float, help="Simular solo las primeras N horas de la traza")
+    parser.add_argument('--profile', help="Guarda el perfil de cProfile en este fichero")
+    parser.add_argument('--json', action='store_true', help="Salida en JSON")
+    args = parser.parse_args()
+
+    events = list(read_trace(args.trace))
+    header = next((event for event in events if event['type'] == 'start'), None)
+    events = [event for event in events if event['type'] != 'start']
+    if header is None and not args.db:
+        parser.error("La traza no tiene cabecera 'start'; indica la base de datos con --db")
+    source_db = args.db or os.path.join(args.backup_dir, header['snapshot'])
+
+    start = parse_time(header['t'] if header else events[0]['t'])
+    end = parse_time(events[-1]['t']) if events else start
+    if args.hours:
+        end = min(end, start + timedelta(hours=args.hours))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rol_sessions.DB_FILE = os.path.join(tmp, 'replay.db')
+        shutil.copy(source_db, rol_sessions.DB_FILE)
+        rol_sessions.store = SQLiteSessionStore(rol_sessions.DB_FILE)
+        rol_sessions.trace_recorder.path = None
+        world = ReplayWorld()
+        rol_sessions.bot.get_guild = world.get_guild
+
+        clock.set_clock(clock.SimulatedClock(start))
+        rol_sessions.SessionManager.setup_files()
+        # Las sesiones creadas durante la traza conservan su ID: los nuevos van por encima
+        rol_sessions.session_ids.seed(max(recorded_session_ids(events), default=0))
+
+        replayer = Replayer(world)
+        profiler = cProfile.Profile() if args.profile else None
+        if profiler:
+            profiler.enable()
+        elapsed = asyncio.run(simulate(events, start, end, args.speed, replayer))
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        report = build_report(replayer, start, end, elapsed)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+        if profiler:
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(25)
+            print(output.getvalue())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,30 @@
 import os
+import io
+import re
+import csv
+import asyncio
+import tempfile
+import time
+from collections import OrderedDict, defaultdict
 from datetime import datetime, timedelta
 import pytz
+import aiohttp
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
 from discord.ui import Button, View, Select, Modal, TextInput
-from translations import TEXTS
-from config import TOKEN, PAYPAL_LINK, DEFAULT_ALERT_TIME, DEFAULT_TIMEZONE
+from translations import DEFAULT_LANG, LANGUAGES, load_catalog
+from config import (TOKEN, PAYPAL_LINK, DEFAULT_ALERT_TIME, DEFAULT_TIMEZONE, RECURRENCE_HORIZON_DAYS,
+                    ARCHIVE_RETENTION_DAYS, BACKUP_INTERVAL_HOURS, TRACE_FILE)
+from backup import create_snapshot, list_snapshots
+from tracing import TraceRecorder
+import clock
+from storage import SQLiteSessionStore, SessionConflict, COLUMN_INDEX, JOURNAL_COLUMNS, build_session_row
 import logging
 import sqlite3
+import bisect
+import difflib
+import unicodedata
 
 # ===================================================================
 # CONFIGURACIÓN DE LOGGING Y CONSTANTES
@@ -23,6 +39,12 @@ logger = logging.getLogger(__name__)
 # Constante para fichero de base de datos
 DB_FILE = 'sessions.db'
 
+# Almacenamiento de sesiones, configuración y asistencia (ver storage.py)
+store = SQLiteSessionStore(DB_FILE)
+
+# Traza de eventos para el simulador (ver tracing.py y replay.py)
+trace_recorder = TraceRecorder(TRACE_FILE)
+
 # Configuración inicial del bot
 intents = discord.Intents.default()
 intents.message_content = True
@@ -34,9 +56,26 @@ bot = commands.Bot(command_prefix='!', intents=intents, description="Bot para ge
 # ===================================================================
 # CLASES DE INTERFAZ DE USUARIO (UI)
 # ===================================================================
-class ReadyView(View):
-    def __init__(self, session_id, timeout=None):
+class LocalizedView(View):
+    """Vista cuyos botones toman la etiqueta del catálogo del servidor.
+
+    LABELS relaciona el nombre de cada botón con su clave de traducción. Sin
+    catálogo se quedan las etiquetas por defecto (p. ej. al registrar las
+    vistas persistentes al arrancar; el mensaje ya guarda sus etiquetas).
+    """
+    LABELS = {}
+
+    def __init__(self, locale=None, timeout=None):
         super().__init__(timeout=timeout)
+        if locale:
+            for attribute, key in self.LABELS.items():
+                getattr(self, attribute).label = locale(key)
+
+class ReadyView(LocalizedView):
+    LABELS = {'ready_button': 'button_ready', 'not_ready_button': 'button_not_ready', 'roster_button': 'button_roster'}
+
+    def __init__(self, session_id, timeout=None, locale=None):
+        super().__init__(locale, timeout=timeout)
         self.session_id = session_id
     
     @discord.ui.button(label="Listo", style=discord.ButtonStyle.primary, emoji="✅", custom_id="ready")
@@ -47,47 +86,111 @@ class ReadyView(View):
     async def not_ready_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         await handle_availability(interaction, self.session_id, "not_ready")
 
-class NewSessionAfterEndView(View):
-    def __init__(self, previous_session, timeout=None):
+    @discord.ui.button(label="Ver lista completa", style=discord.ButtonStyle.secondary, emoji="👥", custom_id="roster")
+    async def roster_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await show_full_roster(interaction, self.session_id)
+
+class RosterView(LocalizedView):
+    """Lista completa de asistencia (mensaje efímero), paginada"""
+    LABELS = {'previous_button': 'button_previous', 'next_button': 'button_next'}
+
+    def __init__(self, session, locale, timeout=300):
+        super().__init__(locale, timeout=timeout)
+        self.session = session
+        self.locale = locale
+        self.page = 0
+        self.pages = RosterRenderer.page_count(session)
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.previous_button.disabled = self.page == 0
+        self.next_button.disabled = self.page >= self.pages - 1
+
+    async def _show(self, interaction, page):
+        self.page = page
+        self._update_buttons()
+        await interaction.response.edit_message(
+            embed=create_roster_embed(self.session, self.page, self.locale), view=self
+        )
+
+    @discord.ui.button(label="Anterior", style=discord.ButtonStyle.secondary, emoji="◀️")
+    async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, max(self.page - 1, 0))
+
+    @discord.ui.button(label="Siguiente", style=discord.ButtonStyle.secondary, emoji="▶️")
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, min(self.page + 1, self.pages - 1))
+
+class DigestView(View):
+    """Botones de disponibilidad de un mensaje resumen: una fila por sesión"""
+    def __init__(self, sessions, locale, timeout=None):
         super().__init__(timeout=timeout)
+        self.session_ids = [session['session_id'] for session in sessions]
+        for row, session in enumerate(sessions):
+            ready_button = Button(
+                label=f"{locale('button_ready')} · {session['name']}"[:80],
+                style=discord.ButtonStyle.primary, emoji="✅",
+                custom_id=f"digest_ready:{session['session_id']}", row=row
+            )
+            not_ready_button = Button(
+                label=locale('button_not_ready'),
+                style=discord.ButtonStyle.primary, emoji="❌",
+                custom_id=f"digest_not_ready:{session['session_id']}", row=row
+            )
+            ready_button.callback = self._availability(session['session_id'], "ready")
+            not_ready_button.callback = self._availability(session['session_id'], "not_ready")
+            self.add_item(ready_button)
+            self.add_item(not_ready_button)
+
+    def _availability(self, session_id, status):
+        async def callback(interaction: discord.Interaction):
+            await handle_availability(interaction, session_id, status, digest=self.session_ids)
+        return callback
+
+class NewSessionAfterEndView(LocalizedView):
+    LABELS = {'new_session_button': 'button_new_session', 'cancel_button': 'button_cancel'}
+
+    def __init__(self, previous_session, timeout=None, locale=None):
+        super().__init__(locale, timeout=timeout)
         self.previous_session = previous_session
     
     @discord.ui.button(label="Crear nueva sesión", style=discord.ButtonStyle.primary, emoji="📅", custom_id="new_session_after_end")
     async def new_session_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Verificar que solo el creador pueda usar este botón
         if interaction.user.id != self.previous_session['creator_id']:
-            await interaction.response.send_message("Solo el creador de la sesión anterior puede usar este botón.", ephemeral=True)
+            await interaction.response.send_message(get_text('creator_only', interaction.guild.id), ephemeral=True)
             return
         
         # Abrir modal para crear nueva sesión
-        modal = NewSessionModal()
+        modal = NewSessionModal(locale=guild_locales.get(interaction.guild.id))
         await interaction.response.send_modal(modal)
 
     @discord.ui.button(label="Cancelar", style=discord.ButtonStyle.secondary, emoji="❌", custom_id="cancel_new_session")
     async def cancel_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         if interaction.user.id != self.previous_session['creator_id']:
-            await interaction.response.send_message("Solo el creador de la sesión anterior puede usar este botón.", ephemeral=True)
+            await interaction.response.send_message(get_text('creator_only', interaction.guild.id), ephemeral=True)
             return
         
         await interaction.message.delete()
 
 class SessionSelectView(View):
-    def __init__(self, sessions, action_type, timeout=None):
+    def __init__(self, sessions, action_type, locale, timeout=None):
         super().__init__(timeout=timeout)
-        self.sessions = sessions
+        # Solo se guardan los IDs; la fila completa se carga al seleccionar
+        self.session_ids = [session_id for session_id, _, _ in sessions[:25]]
         self.action_type = action_type
         
-        # Crear menú desplegable con las sesiones
+        # Crear menú desplegable con las sesiones (entradas del índice: id, nombre, fecha)
         options = []
-        for idx, session in enumerate(sessions[:25]):  # Limitar a 25 opciones
+        for idx, (session_id, name, session_datetime) in enumerate(sessions[:25]):  # Limitar a 25 opciones
             options.append(discord.SelectOption(
-                label=session[2],  # Nombre de la sesión
-                description=f"Fecha: {session[3]}",
+                label=name[:100],
+                description=locale('select_session_date', session_datetime),
                 value=str(idx)
             ))
             
         select = Select(
-            placeholder="Selecciona una sesión",
+            placeholder=locale('select_session'),
             options=options,
             custom_id="session_select"
         )
@@ -95,13 +198,16 @@ class SessionSelectView(View):
         self.add_item(select)
         
         # Botón de cancelar
-        cancel_button = Button(label="Cancelar", style=discord.ButtonStyle.secondary, custom_id="cancel")
+        cancel_button = Button(label=locale('button_cancel'), style=discord.ButtonStyle.secondary, custom_id="cancel")
         cancel_button.callback = self.cancel_action
         self.add_item(cancel_button)
     
     async def session_selected(self, interaction: discord.Interaction):
         idx = int(interaction.data["values"][0])
-        session = self.sessions[idx]
+        session = SessionManager.get_session(self.session_ids[idx], interaction.guild.id)
+        if not session:
+            await interaction.response.edit_message(content=get_text('active_sessions_none', interaction.guild.id), embed=None, view=None)
+            return
         
         if self.action_type == "delete":
             await show_delete_confirmation(interaction, session)
@@ -115,9 +221,11 @@ class SessionSelectView(View):
             color=discord.Color.blue()
         )
         await interaction.response.edit_message(embed=embed, view=None)
-class ConfirmView(View):
-    def __init__(self, session_id, action_type, timeout=None):
-        super().__init__(timeout=timeout)
+class ConfirmView(LocalizedView):
+    LABELS = {'confirm_button': 'button_confirm', 'cancel_button': 'button_cancel'}
+
+    def __init__(self, session_id, action_type, timeout=None, locale=None):
+        super().__init__(locale, timeout=timeout)
         self.session_id = session_id
         self.action_type = action_type
     
@@ -135,37 +243,45 @@ class ConfirmView(View):
         )
         await interaction.response.edit_message(embed=embed, view=None)
 
-class EditOptionsView(View):
-    def __init__(self, session, timeout=None):
-        super().__init__(timeout=timeout)
+class EditOptionsView(LocalizedView):
+    LABELS = {
+        'edit_datetime': 'button_edit_datetime', 'edit_duration': 'button_edit_duration',
+        'edit_group': 'button_edit_group', 'edit_channel': 'button_edit_channel',
+        'edit_stages': 'button_edit_stages', 'cancel_edit': 'button_cancel',
+    }
+
+    def __init__(self, session, timeout=None, locale=None):
+        self.locale = locale or guild_locales.get(session[1])
+        super().__init__(self.locale, timeout=timeout)
         self.session = session
     
     @discord.ui.button(label="Fecha y Hora", style=discord.ButtonStyle.primary, emoji="📅", row=0)
     async def edit_datetime(self, interaction: discord.Interaction, button: discord.ui.Button):
-        modal = DateTimeModal(self.session)
+        modal = DateTimeModal(self.session, self.locale)
         await interaction.response.send_modal(modal)
     
     @discord.ui.button(label="Duración", style=discord.ButtonStyle.primary, emoji="⏱️", row=0)
     async def edit_duration(self, interaction: discord.Interaction, button: discord.ui.Button):
-        modal = DurationModal(self.session)
+        modal = DurationModal(self.session, self.locale)
         await interaction.response.send_modal(modal)
     
     @discord.ui.button(label="Grupo", style=discord.ButtonStyle.primary, emoji="👥", row=0)
     async def edit_group(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.send_message(get_text('new_session_group', interaction.guild.id), ephemeral=True)
-        role_view = RoleSelectView(interaction.guild, self.session[4])
+        role_view = RoleSelectView(self.session[4], locale=self.locale)
         role_msg = await interaction.followup.send(view=role_view, wait=True, ephemeral=True)
         
         await role_view.wait()
         if role_view.value:
-            session_data = convert_db_to_session(self.session)
-            session_data['group'] = role_view.value
-            
-            if SessionManager.save_session(session_data):
+            # Solo se escriben los campos editados
+            session_data = SessionManager.save_session({
+                'session_id': self.session[0], 'group': role_view.value, 'unroutable': False
+            })
+            if session_data:
                 role = interaction.guild.get_role(int(role_view.value))
                 embed = discord.Embed(
                     title=get_text('success_title', interaction.guild.id),
-                    description=f"El grupo se ha actualizado a: {role.mention}",
+                    description=self.locale('group_updated', role.mention),
                     color=discord.Color.green()
                 )
                 await role_msg.edit(embed=embed, view=None)
@@ -177,19 +293,20 @@ class EditOptionsView(View):
     @discord.ui.button(label="Canal", style=discord.ButtonStyle.primary, emoji="📢", row=0)
     async def edit_channel(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.send_message(get_text('new_session_channel', interaction.guild.id), ephemeral=True)
-        channel_view = ChannelSelectView(interaction.guild, self.session[5])
+        channel_view = ChannelSelectView(self.session[5], locale=self.locale)
         channel_msg = await interaction.followup.send(view=channel_view, wait=True, ephemeral=True)
         
         await channel_view.wait()
         if channel_view.value:
-            session_data = convert_db_to_session(self.session)
-            session_data['channel'] = channel_view.value
-            
-            if SessionManager.save_session(session_data):
+            # Solo se escriben los campos editados
+            session_data = SessionManager.save_session({
+                'session_id': self.session[0], 'channel': channel_view.value, 'unroutable': False
+            })
+            if session_data:
                 channel = interaction.guild.get_channel(int(channel_view.value))
                 embed = discord.Embed(
                     title=get_text('success_title', interaction.guild.id),
-                    description=f"El canal se ha actualizado a: {channel.mention}",
+                    description=self.locale('channel_updated', channel.mention),
                     color=discord.Color.green()
                 )
                 await channel_msg.edit(embed=embed, view=None)
@@ -199,6 +316,11 @@ class EditOptionsView(View):
         else:
             await channel_msg.edit(content=get_text('error_title', interaction.guild.id), view=None)
     
+    @discord.ui.button(label="Avisos", style=discord.ButtonStyle.primary, emoji="🔔", row=1)
+    async def edit_stages(self, interaction: discord.Interaction, button: discord.ui.Button):
+        modal = ReminderStagesModal(self.session, self.locale)
+        await interaction.response.send_modal(modal)
+    
     @discord.ui.button(label="Cancelar", style=discord.ButtonStyle.secondary, emoji="❌", row=1)
     async def cancel_edit(self, interaction: discord.Interaction, button: discord.ui.Button):
         embed = discord.Embed(
@@ -208,12 +330,13 @@ class EditOptionsView(View):
         )
         await interaction.response.edit_message(embed=embed, view=None)
 
-class DateTimeModal(Modal, title="Editar Fecha y Hora"):
-    def __init__(self, session):
-        super().__init__()
+class DateTimeModal(Modal):
+    def __init__(self, session, locale):
+        super().__init__(title=locale('modal_datetime_title'))
         self.session = session
+        self.locale = locale
         self.datetime_input = TextInput(
-            label="Nueva fecha y hora",
+            label=locale('modal_datetime_label'),
             placeholder="DD-MM-YYYY HH:MM",
             default=self.session[3],
             required=True
@@ -232,34 +355,32 @@ class DateTimeModal(Modal, title="Editar Fecha y Hora"):
                 'datetime': new_datetime.strftime("%d-%m-%Y %H:%M")
             }
             
-            if SessionManager.save_session(update_data):
+            session_data = SessionManager.save_session(update_data)
+            if session_data:
+                overlap_warning = describe_overlaps(
+                    interaction.guild.id, update_data['datetime'], self.session[12],
+                    self.session[4], self.session[5], exclude=session_id
+                )
                 embed = discord.Embed(
                     title=get_text('success_title', interaction.guild.id),
-                    description=f"La fecha y hora se han actualizado a: {new_datetime.strftime('%d-%m-%Y %H:%M')}",
+                    description=self.locale('datetime_updated', new_datetime.strftime('%d-%m-%Y %H:%M'))
+                                + overlap_warning,
                     color=discord.Color.green()
                 )
                 await interaction.response.send_message(embed=embed, ephemeral=True)
                 
-                # Cargar la sesión actualizada para actualizar el mensaje
-                conn = sqlite3.connect(DB_FILE)
-                c = conn.cursor()
-                c.execute('SELECT * FROM sessions WHERE session_id = ?', (session_id,))
-                updated_session = c.fetchone()
-                conn.close()
-                
-                if updated_session:
-                    session_data = convert_db_to_session(updated_session)
-                    # Actualizar el mensaje de la sesión si existe
-                    await update_session_message(session_data)
+                # Actualizar el mensaje de la sesión si existe
+                await update_session_message(session_data)
             else:
                 await interaction.response.send_message(get_text('error_title', interaction.guild.id), ephemeral=True)
         except ValueError:
             await interaction.response.send_message(get_text('new_session_datetime_error', interaction.guild.id), ephemeral=True)
 
-class DurationModal(Modal, title="Editar Duración"):
-    def __init__(self, session):
-        super().__init__()
+class DurationModal(Modal):
+    def __init__(self, session, locale):
+        super().__init__(title=locale('modal_duration_title'))
         self.session = session
+        self.locale = locale
         
         # Obtener duración actual, por defecto 120 minutos
         current_duration = "120"
@@ -267,8 +388,8 @@ class DurationModal(Modal, title="Editar Duración"):
             current_duration = str(session[12])
             
         self.duration_input = TextInput(
-            label="Nueva duración (en minutos)",
-            placeholder="Ej: 120 (2 horas)",
+            label=locale('modal_duration_label'),
+            placeholder=locale('modal_duration_placeholder'),
             default=current_duration,
             required=True
         )
@@ -294,56 +415,77 @@ class DurationModal(Modal, title="Editar Duración"):
                 'duration': new_duration
             }
             
-            if SessionManager.save_session(update_data):
+            session_data = SessionManager.save_session(update_data)
+            if session_data:
+                overlap_warning = describe_overlaps(
+                    interaction.guild.id, self.session[3], new_duration,
+                    self.session[4], self.session[5], exclude=session_id
+                )
                 embed = discord.Embed(
                     title=get_text('success_title', interaction.guild.id),
-                    description=f"La duración se ha actualizado a: {format_duration(new_duration)}",
+                    description=self.locale('duration_updated', format_duration(new_duration, self.locale))
+                                + overlap_warning,
                     color=discord.Color.green()
                 )
                 await interaction.response.send_message(embed=embed, ephemeral=True)
                 
-                # Cargar la sesión actualizada para actualizar el mensaje
-                conn = sqlite3.connect(DB_FILE)
-                c = conn.cursor()
-                c.execute('SELECT * FROM sessions WHERE session_id = ?', (session_id,))
-                updated_session = c.fetchone()
-                conn.close()
-                
-                if updated_session:
-                    session_data = convert_db_to_session(updated_session)
-                    # Actualizar el mensaje de la sesión si existe
-                    await update_session_message(session_data)
+                # Actualizar el mensaje de la sesión si existe
+                await update_session_message(session_data)
             else:
                 await interaction.response.send_message(get_text('error_title', interaction.guild.id), ephemeral=True)
         except Exception as e:
             logger.error(f"Error al actualizar duración: {str(e)}")
             await interaction.response.send_message(get_text('error_title', interaction.guild.id), ephemeral=True)
 
+class ReminderStagesModal(Modal):
+    def __init__(self, session, locale):
+        super().__init__(title=locale('modal_stages_title'))
+        self.session = session
+        
+        self.stages_input = TextInput(
+            label=locale('modal_stages_label'),
+            placeholder=locale('modal_stages_placeholder'),
+            default=session[COLUMN_INDEX['reminder_stages']] or "",
+            required=False
+        )
+        self.add_item(self.stages_input)
+    async def on_submit(self, interaction: discord.Interaction):
+        stages = None
+        if self.stages_input.value.strip():
+            parsed = parse_reminder_offsets(self.stages_input.value)
+            if parsed is None:
+                await interaction.response.send_message(get_text('prevtime_error', interaction.guild.id), ephemeral=True)
+                return
+            stages = ','.join(map(str, parsed))
+        
+        if SessionManager.save_session({'session_id': self.session[0], 'reminder_stages': stages}):
+            embed = discord.Embed(
+                title=get_text('success_title', interaction.guild.id),
+                description=get_text('stages_success', interaction.guild.id, stages or get_text('stages_default', interaction.guild.id)),
+                color=discord.Color.green()
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        else:
+            await interaction.response.send_message(get_text('error_title', interaction.guild.id), ephemeral=True)
+
 class RoleSelectView(View):
-    def __init__(self, guild, selected_role=None):
+    """Selector de rol usando el componente nativo de Discord.
+
+    El cliente de Discord lista y filtra los roles del servidor, así que el bot
+    no construye opciones y no hay límite de 25 por menú ni de 5 filas por vista.
+    """
+    def __init__(self, selected_role=None, locale=None):
         super().__init__()
         self.value = None
         
-        # Crear opciones para el menú desplegable
-        options = []
-        for role in guild.roles:
-            if not role.is_default():  # Excluir el rol @everyone
-                options.append(
-                    discord.SelectOption(
-                        label=role.name,
-                        value=str(role.id),
-                        default=(selected_role and str(role.id) == selected_role)
-                    )
-                )
-        # Dividir en grupos de 25 si hay más roles
-        for i in range(0, len(options), 25):
-            select = Select(
-                placeholder="Selecciona un rol",
-                options=options[i:i+25],
-                row=i//25
-            )
-            select.callback = self.select_callback
-            self.add_item(select)
+        select = discord.ui.RoleSelect(
+            placeholder=(locale or load_catalog(DEFAULT_LANG))('select_role'),
+            min_values=1,
+            max_values=1,
+            default_values=[discord.Object(id=int(selected_role), type=discord.Role)] if selected_role else []
+        )
+        select.callback = self.select_callback
+        self.add_item(select)
     
     async def select_callback(self, interaction: discord.Interaction):
         self.value = interaction.data["values"][0]
@@ -351,53 +493,45 @@ class RoleSelectView(View):
         self.stop()
 
 class ChannelSelectView(View):
-    def __init__(self, guild, selected_channel=None):
+    """Selector de canal de texto usando el componente nativo de Discord"""
+    def __init__(self, selected_channel=None, locale=None):
         super().__init__()
         self.value = None
         
-        # Crear opciones para el menú desplegable
-        options = []
-        for channel in guild.channels:
-            if isinstance(channel, discord.TextChannel):  # Solo canales de texto
-                options.append(
-                    discord.SelectOption(
-                        label=channel.name,
-                        value=str(channel.id),
-                        default=(selected_channel and str(channel.id) == selected_channel)
-                    )
-                )
-        
-        # Dividir en grupos de 25 si hay más canales
-        for i in range(0, len(options), 25):
-            select = Select(
-                placeholder="Selecciona un canal",
-                options=options[i:i+25],
-                row=i//25
-            )
-            select.callback = self.select_callback
-            self.add_item(select)
+        select = discord.ui.ChannelSelect(
+            placeholder=(locale or load_catalog(DEFAULT_LANG))('select_channel'),
+            channel_types=[discord.ChannelType.text],
+            min_values=1,
+            max_values=1,
+            default_values=[discord.Object(id=int(selected_channel), type=discord.TextChannel)] if selected_channel else []
+        )
+        select.callback = self.select_callback
+        self.add_item(select)
     
     async def select_callback(self, interaction: discord.Interaction):
         self.value = interaction.data["values"][0]
         await interaction.response.defer()
         self.stop()
 # Modificar NewSessionModal para usar los nuevos selectores y añadir duración
-class NewSessionModal(Modal, title="Crear Nueva Sesión"):
-    def __init__(self):
-        super().__init__()
+class NewSessionModal(Modal):
+    def __init__(self, recurrence=None, locale=None):
+        locale = locale or load_catalog(DEFAULT_LANG)
+        super().__init__(title=locale('modal_new_title'))
+        self.recurrence = recurrence
+        self.locale = locale
         self.name_input = TextInput(
-            label="Nombre de la sesión",
-            placeholder="Ej: Raid semanal",
+            label=locale('modal_new_name'),
+            placeholder=locale('modal_new_name_placeholder'),
             required=True
         )
         self.datetime_input = TextInput(
-            label="Fecha y hora (DD-MM-YYYY HH:MM)",
-            placeholder="Ej: 15-02-2024 14:30",
+            label=locale('modal_new_datetime'),
+            placeholder=locale('modal_new_datetime_placeholder'),
             required=True
         )
         self.duration_input = TextInput(
-            label="Duración en minutos",
-            placeholder="Ej: 120 (2 horas)",
+            label=locale('modal_new_duration'),
+            placeholder=locale('modal_duration_placeholder'),
             default="120",
             required=True
         )
@@ -407,32 +541,20 @@ class NewSessionModal(Modal, title="Crear Nueva Sesión"):
 
     async def on_submit(self, interaction: discord.Interaction):
         try:
-            # Validar fecha
-            try:
-                session_datetime = datetime.strptime(self.datetime_input.value, "%d-%m-%Y %H:%M")
-            except ValueError:
-                await interaction.response.send_message(get_text('new_session_datetime_error', interaction.guild.id), ephemeral=True)
-                return
-            
-            # Validar duración
-            try:
-                duration = int(self.duration_input.value)
-                if duration <= 0:
-                    await interaction.response.send_message(get_text('prevtime_error', interaction.guild.id), ephemeral=True)
-                    return
-            except ValueError:
-                await interaction.response.send_message(get_text('prevtime_error', interaction.guild.id), ephemeral=True)
-                return
-            # Verificar si es futura
+            # Validar nombre, fecha, duración y que la sesión sea futura
             server_config = SessionManager.load_config(interaction.guild.id)
-            time_diff = calculate_time_difference(session_datetime, server_config['timezone'])
-            if time_diff <= 0:
-                await interaction.response.send_message(get_text('new_session_datetime_error', interaction.guild.id), ephemeral=True)
+            try:
+                name = validate_session_name(self.name_input.value)
+                session_datetime, duration = validate_session_input(
+                    self.datetime_input.value, self.duration_input.value, server_config['timezone']
+                )
+            except ValueError as e:
+                await interaction.response.send_message(get_text(str(e), interaction.guild.id), ephemeral=True)
                 return
 
             # Solicitar rol
             await interaction.response.send_message(get_text('new_session_group', interaction.guild.id), ephemeral=True)
-            role_view = RoleSelectView(interaction.guild)
+            role_view = RoleSelectView(locale=self.locale)
             role_msg = await interaction.followup.send(view=role_view, wait=True, ephemeral=True)
             await role_view.wait()
             
@@ -441,7 +563,7 @@ class NewSessionModal(Modal, title="Crear Nueva Sesión"):
                 return
             
             # Solicitar canal
-            channel_view = ChannelSelectView(interaction.guild)
+            channel_view = ChannelSelectView(locale=self.locale)
             channel_msg = await interaction.followup.send(get_text('new_session_channel', interaction.guild.id), view=channel_view, ephemeral=True)
             await channel_view.wait()
             
@@ -451,13 +573,13 @@ class NewSessionModal(Modal, title="Crear Nueva Sesión"):
 
             # Crear sesión
             session_data = {
-                "name": self.name_input.value,
+                "name": name,
                 "datetime": session_datetime.strftime("%d-%m-%Y %H:%M"),
                 "group": role_view.value,
                 "channel": channel_view.value,
                 "creator_id": interaction.user.id,
                 "guild_id": interaction.guild.id,
-                "created_at": datetime.now().strftime("%d-%m-%Y %H:%M"),
+                "created_at": clock.now().strftime("%d-%m-%Y %H:%M"),
                 "notified": False,
                 "duration": duration,
                 "status": {
@@ -465,21 +587,38 @@ class NewSessionModal(Modal, title="Crear Nueva Sesión"):
                     "not_ready": []
                 }
             }
+            
+            # Guardar la regla de repetición y enlazar esta primera ocurrencia
+            recurrence_line = ""
+            if self.recurrence:
+                recurrence_id = RecurrenceManager.create_recurrence(self.recurrence, session_data, session_datetime)
+                if recurrence_id is None:
+                    await interaction.followup.send(get_text('error_title', interaction.guild.id), ephemeral=True)
+                    return
+                session_data['recurrence_id'] = recurrence_id
+                recurrence_line = "\n" + self.locale('recurrence_line', RecurrenceManager.describe_rule(self.recurrence, self.locale))
+            
+            # Avisar (sin bloquear) si choca con otra sesión del mismo grupo o canal
+            overlap_warning = describe_overlaps(
+                interaction.guild.id, session_data['datetime'], duration, role_view.value, channel_view.value
+            )
+            
             if SessionManager.save_session(session_data):
                 role = interaction.guild.get_role(int(role_view.value))
                 channel = interaction.guild.get_channel(int(channel_view.value))
                 
                 embed = discord.Embed(
                     title=get_text('success_title', interaction.guild.id),
-                    description=f"Se ha creado la sesión **{self.name_input.value}**\n"
-                               f"📅 Fecha: {session_datetime.strftime('%d-%m-%Y %H:%M')}\n"
-                               f"⏱️ Duración: {format_duration(duration)}\n"
-                               f"👥 Grupo: {role.mention}\n"
-                               f"📢 Canal: {channel.mention}",
+                    description=self.locale(
+                        'session_created', self.name_input.value, session_datetime.strftime('%d-%m-%Y %H:%M'),
+                        format_duration(duration, self.locale), role.mention, channel.mention
+                    ) + recurrence_line + overlap_warning,
                     color=discord.Color.green()
                 )
                 await interaction.followup.send(embed=embed)
             else:
+                if session_data.get('recurrence_id'):
+                    RecurrenceManager.stop_recurrence(session_data['recurrence_id'], interaction.guild.id)
                 await interaction.followup.send(get_text('error_title', interaction.guild.id), ephemeral=True)
 
         except Exception as e:
@@ -489,13 +628,42 @@ class NewSessionModal(Modal, title="Crear Nueva Sesión"):
 # ===================================================================
 # GESTIÓN DE BASE DE DATOS Y SESIONES
 # ===================================================================
+class SessionIdGenerator:
+    """Genera IDs enteros de sesión crecientes, al estilo de los snowflakes.
+
+    Los bits altos son milisegundos desde EPOCH y los 12 bajos una secuencia
+    dentro del mismo milisegundo. Si el reloj retrocede se sigue contando desde
+    el último ID emitido, así que los IDs nunca se repiten ni decrecen.
+    """
+    EPOCH = datetime(2024, 1, 1)
+    SEQUENCE_BITS = 12
+
+    def __init__(self):
+        self._last = 0
+
+    def seed(self, last_id):
+        """Continúa a partir del mayor ID ya guardado"""
+        self._last = max(self._last, int(last_id or 0))
+
+    def next(self):
+        millis = int((clock.utcnow() - self.EPOCH).total_seconds() * 1000)
+        candidate = millis << self.SEQUENCE_BITS
+        self._last = max(candidate, self._last + 1)
+        return self._last
+
+session_ids = SessionIdGenerator()
+
 class DatabaseManager:
     @staticmethod
     def setup_database():
+        conn = sqlite3.connect(DB_FILE)
         try:
-            conn = sqlite3.connect(DB_FILE)
             c = conn.cursor()
             
+            # Permite devolver espacio libre poco a poco al compactar el archivo
+            # (solo tiene efecto en bases de datos nuevas)
+            c.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            
             # Tabla de configuración
             c.execute('''
                 CREATE TABLE IF NOT EXISTS config (
@@ -509,7 +677,7 @@ class DatabaseManager:
             # Tabla de sesiones con campo de duración
             c.execute('''
                 CREATE TABLE IF NOT EXISTS sessions (
-                    session_id TEXT PRIMARY KEY,
+                    session_id INTEGER PRIMARY KEY,
                     guild_id TEXT,
                     name TEXT,
                     datetime TEXT,
@@ -526,65 +694,338 @@ class DatabaseManager:
                 )
             ''')
             
+            # Índice para listados y búsquedas por servidor
+            c.execute('CREATE INDEX IF NOT EXISTS idx_sessions_guild ON sessions (guild_id)')
+            
+            # Sesiones recurrentes: la regla se guarda una vez y las ocurrencias
+            # se materializan en `sessions` solo dentro del horizonte
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS recurrences (
+                    recurrence_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    guild_id TEXT,
+                    name TEXT,
+                    rule_type TEXT,
+                    interval INTEGER DEFAULT 1,
+                    weekdays TEXT,
+                    group_id TEXT,
+                    channel_id TEXT,
+                    creator_id TEXT,
+                    duration INTEGER DEFAULT 120,
+                    next_at TEXT,
+                    active INTEGER DEFAULT 1
+                )
+            ''')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_recurrences_next ON recurrences (active, next_at)')
+            DatabaseManager.add_column_if_missing(c, 'sessions', 'recurrence_id', 'INTEGER')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_sessions_recurrence ON sessions (recurrence_id, datetime)')
+            DatabaseManager.add_column_if_missing(c, 'config', 'dm_mode', "TEXT DEFAULT 'off'")
+            DatabaseManager.add_column_if_missing(c, 'config', 'dm_offsets', "TEXT DEFAULT '60'")
+            
+            # Recordatorios por mensaje privado: usuarios que no quieren recibirlos
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS dm_optout (
+                    user_id TEXT PRIMARY KEY
+                )
+            ''')
+            
+            # Etapas de aviso: por servidor (config) o por sesión, precalculadas como
+            # disparadores con su instante en UTC
+            DatabaseManager.add_column_if_missing(c, 'config', 'reminder_stages', "TEXT DEFAULT ''")
+            DatabaseManager.add_column_if_missing(c, 'config', 'digest_mode', "TEXT DEFAULT 'off'")
+            DatabaseManager.add_column_if_missing(c, 'config', 'refresh_scheduled', 'INTEGER DEFAULT 15')
+            DatabaseManager.add_column_if_missing(c, 'config', 'refresh_imminent', 'INTEGER DEFAULT 1')
+            DatabaseManager.add_column_if_missing(c, 'config', 'refresh_in_progress', 'INTEGER DEFAULT 10')
+            DatabaseManager.add_column_if_missing(c, 'sessions', 'reminder_stages', 'TEXT')
+            # Sustituye al registro de recordatorios privados enviados
+            c.execute('DROP TRIGGER IF EXISTS trg_sessions_dm_delete')
+            c.execute('DROP TABLE IF EXISTS dm_reminders_sent')
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS reminder_triggers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id INTEGER,
+                    kind TEXT,
+                    stage_minutes INTEGER,
+                    fire_at TEXT,
+                    fired INTEGER DEFAULT 0,
+                    UNIQUE (session_id, kind, stage_minutes, fire_at)
+                )
+            ''')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_triggers_due ON reminder_triggers (fired, fire_at)')
+            c.execute('''
+                CREATE TRIGGER IF NOT EXISTS trg_sessions_triggers_delete AFTER DELETE ON sessions
+                BEGIN
+                    DELETE FROM reminder_triggers WHERE session_id = OLD.session_id;
+                END
+            ''')
+            # Sesiones cuyo canal o grupo ya no existe: el planificador las ignora
+            DatabaseManager.add_column_if_missing(c, 'sessions', 'unroutable', 'INTEGER DEFAULT 0')
+            # Versión de la fila para el control optimista de concurrencia
+            DatabaseManager.add_column_if_missing(c, 'sessions', 'version', 'INTEGER DEFAULT 0')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_sessions_channel ON sessions (channel_id)')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_sessions_group ON sessions (group_id)')
+            
+            # Archivo de sesiones finalizadas: formato compacto y fecha ordenable
+            # (YYYY-MM-DD HH:MM). Las consultas del día a día nunca lo leen.
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS sessions_archive (
+                    session_id TEXT PRIMARY KEY,
+                    guild_id TEXT,
+                    name TEXT,
+                    starts_at TEXT,
+                    duration INTEGER,
+                    group_id TEXT,
+                    channel_id TEXT,
+                    creator_id TEXT,
+                    ready_users TEXT,
+                    not_ready_users TEXT,
+                    archived_at TEXT
+                )
+            ''')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_archive_guild ON sessions_archive (guild_id, starts_at)')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_archive_starts ON sessions_archive (starts_at)')
+            
+            # Bandeja de salida de notificaciones (avisos y mensajes de fin de sesión)
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS notification_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idempotency_key TEXT UNIQUE,
+                    kind TEXT,
+                    session_id INTEGER,
+                    status TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    next_attempt_at TEXT,
+                    last_error TEXT,
+                    created_at TEXT,
+                    sent_at TEXT
+                )
+            ''')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_outbox_pending ON notification_outbox (status, next_attempt_at)')
+            # Servidor de la notificación, para repartir la entrega por turnos
+            DatabaseManager.add_column_if_missing(c, 'notification_outbox', 'guild_id', 'TEXT')
+            
+            # Pasar de IDs de texto derivados del nombre a IDs enteros (una sola vez).
+            # Va antes de crear las tablas que guardan IDs enteros de sesión.
+            DatabaseManager.migrate_session_ids(c)
+            
+            # Diario de cambios y estado de renderizado de los mensajes
+            SessionJournal.setup(c)
+            
+            # Estadísticas de asistencia
+            AttendanceStats.setup(c)
+            
             conn.commit()
             conn.close()
-        except sqlite3.OperationalError:
-            # La columna ya existe, ignorar el error
-            pass
         except Exception as e:
+            # Una migración a medias no debe dejar el bot funcionando con el esquema antiguo
+            conn.rollback()
+            conn.close()
             logger.error(f"Error en setup_database: {str(e)}")
+            raise
+
+    @staticmethod
+    def add_column_if_missing(cursor, table, column, definition):
+        """Añade una columna a una tabla existente si todavía no la tiene"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+    @staticmethod
+    def table_exists(cursor, table):
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+        return cursor.fetchone() is not None
+
+    # Tablas auxiliares que guardan el ID de una sesión activa
+    SESSION_ID_REFERENCES = (
+        'session_journal', 'message_renders', 'reminder_triggers',
+        'notification_outbox', 'attendance_marks', 'attendance_finalized'
+    )
+
+    @staticmethod
+    def migrate_session_ids(cursor):
+        """Reconstruye `sessions` con `session_id INTEGER PRIMARY KEY`.
+
+        Las bases de datos antiguas usan como clave `{guild}_{nombre}`. Se asigna
+        a cada fila un ID generado, se copia la tabla conservando columnas,
+        índices y triggers, y se reescriben las referencias de las tablas
+        auxiliares. Los mensajes se marcan como pendientes de repintar para que
+        sus botones queden enlazados al nuevo ID.
+        """
+        cursor.execute('PRAGMA table_info(sessions)')
+        columns = cursor.fetchall()
+        if not any(col[1] == 'session_id' and col[2].upper() == 'TEXT' for col in columns):
+            return
+
+        cursor.execute('SELECT session_id FROM sessions ORDER BY rowid')
+        mapping = [(old_id, session_ids.next()) for (old_id,) in cursor.fetchall()]
+        cursor.execute("SELECT type, sql FROM sqlite_master WHERE tbl_name = 'sessions' AND sql IS NOT NULL AND type IN ('index', 'trigger')")
+        dependents = cursor.fetchall()
+
+        definitions = []
+        for _, name, col_type, notnull, default, _ in columns:
+            if name == 'session_id':
+                definitions.append('session_id INTEGER PRIMARY KEY')
+                continue
+            definition = f"{name} {col_type}"
+            if notnull:
+                definition += " NOT NULL"
+            if default is not None:
+                definition += f" DEFAULT {default}"
+            definitions.append(definition)
+        others = ', '.join(col[1] for col in columns if col[1] != 'session_id')
+
+        cursor.execute('CREATE TEMP TABLE session_id_map (old_id TEXT PRIMARY KEY, new_id INTEGER)')
+        cursor.executemany('INSERT INTO session_id_map (old_id, new_id) VALUES (?, ?)', mapping)
+        cursor.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'sessions' AND type = 'trigger'")
+        for (trigger_name,) in cursor.fetchall():
+            cursor.execute(f'DROP TRIGGER {trigger_name}')
+        cursor.execute(f'CREATE TABLE sessions_new ({", ".join(definitions)})')
+        cursor.execute(f'''
+            INSERT INTO sessions_new (session_id, {others})
+            SELECT m.new_id, {", ".join("s." + col[1] for col in columns if col[1] != 'session_id')}
+            FROM sessions s JOIN session_id_map m ON m.old_id = s.session_id
+        ''')
+        cursor.execute('DROP TABLE sessions')
+        cursor.execute('ALTER TABLE sessions_new RENAME TO sessions')
+        for _, sql in dependents:
+            cursor.execute(sql)
+
+        # La clave de idempotencia incluye el ID ("tipo:sesión:fecha"): se reescribe
+        # antes de cambiar la columna para no volver a enviar avisos ya entregados
+        cursor.execute('''
+            UPDATE notification_outbox SET idempotency_key =
+                kind || ':' || (SELECT new_id FROM session_id_map WHERE old_id = notification_outbox.session_id)
+                || substr(idempotency_key, length(kind) + length(session_id) + 2)
+            WHERE session_id IN (SELECT old_id FROM session_id_map)
+        ''')
+        for table in DatabaseManager.SESSION_ID_REFERENCES:
+            # En una base de datos antigua puede que aún no existan
+            if not DatabaseManager.table_exists(cursor, table):
+                continue
+            cursor.execute(f'''
+                UPDATE {table} SET session_id = (
+                    SELECT new_id FROM session_id_map WHERE old_id = {table}.session_id
+                ) WHERE session_id IN (SELECT old_id FROM session_id_map)
+            ''')
+        if DatabaseManager.table_exists(cursor, 'message_renders'):
+            cursor.execute('UPDATE message_renders SET dirty = 1')
+        cursor.execute('DROP TABLE session_id_map')
+        logger.info(f"Migración de IDs de sesión: {len(mapping)} sesiones con ID entero")
+
+    ARCHIVE_BATCH_SIZE = 500
 
     @staticmethod
     def clean_old_sessions():
+        """Mueve al archivo las sesiones que terminaron hace más de 24 horas"""
         try:
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            
             # Calcular la fecha de corte (24 horas atrás)
-            cutoff_date = datetime.now() - timedelta(days=1)
+            cutoff_date = clock.now() - timedelta(days=1)
             
             # Obtener todas las sesiones
-            c.execute('SELECT session_id, datetime FROM sessions')
-            sessions = c.fetchall()
+            sessions = store.session_starts()
             
-            # Filtrar y eliminar solo las sesiones que ya ocurrieron
-            sessions_to_delete = []
+            # Filtrar y archivar solo las sesiones que ya ocurrieron
+            sessions_to_archive = []
             for session in sessions:
                 session_id, session_datetime_str = session
                 try:
                     session_datetime = datetime.strptime(session_datetime_str, "%d-%m-%Y %H:%M")
                     # Comparar correctamente las fechas como objetos datetime
                     if session_datetime < cutoff_date:
-                        sessions_to_delete.append(session_id)
+                        sessions_to_archive.append(session_id)
                 except ValueError:
                     # Si hay un error al parsear la fecha, registrarlo
                     logger.error(f"Error al parsear fecha de sesión {session_id}: {session_datetime_str}")
-                # Eliminar las sesiones identificadas
-            if sessions_to_delete:
-                placeholders = ','.join(['?'] * len(sessions_to_delete))
-                c.execute(f'DELETE FROM sessions WHERE session_id IN ({placeholders})', sessions_to_delete)
-                deleted_count = c.rowcount
-                conn.commit()
+            
+            # Mover por lotes: cada lote se copia al archivo y se borra en la misma transacción
+            archived_count = 0
+            archived_at = clock.now().strftime("%Y-%m-%d %H:%M")
+            batch_size = DatabaseManager.ARCHIVE_BATCH_SIZE
+            for i in range(0, len(sessions_to_archive), batch_size):
+                batch = sessions_to_archive[i:i + batch_size]
+                archived_count += store.archive_sessions(batch, archived_at)
                 
-                if deleted_count > 0:
-                    logger.info(f"Limpieza automática: {deleted_count} sesiones antiguas eliminadas")
+                for session_id in batch:
+                    session_index.remove(session_id)
+                    session_intervals.remove(session_id)
+            
+            if archived_count > 0:
+                logger.info(f"Limpieza automática: {archived_count} sesiones antiguas archivadas")
             else:
-                logger.debug("Limpieza automática: No hay sesiones antiguas para eliminar")
-                
-            conn.close()
+                logger.debug("Limpieza automática: No hay sesiones antiguas para archivar")
         except Exception as e:
             logger.error(f"Error en clean_old_sessions: {str(e)}")
 
+    @staticmethod
+    def compact_archive():
+        """Aplica la retención del archivo y libera el espacio de las filas borradas"""
+        try:
+            expired_count = 0
+            if ARCHIVE_RETENTION_DAYS:
+                cutoff = (clock.now() - timedelta(days=ARCHIVE_RETENTION_DAYS)).strftime("%Y-%m-%d %H:%M")
+                # Borrar por lotes para no bloquear a los escritores durante mucho tiempo
+                while True:
+                    expired = store.expire_archive(cutoff, DatabaseManager.ARCHIVE_BATCH_SIZE)
+                    if expired <= 0:
+                        break
+                    expired_count += expired
+            
+            store.compact()
+            
+            if expired_count > 0:
+                logger.info(f"Compactación del archivo: {expired_count} sesiones archivadas eliminadas por retención")
+        except Exception as e:
+            logger.error(f"Error en compact_archive: {str(e)}")
+
+    @staticmethod
+    def load_archived_sessions(guild_id, limit=10):
+        """Devuelve las últimas sesiones archivadas de un servidor"""
+        try:
+            return store.archived_sessions(guild_id, limit)
+        except Exception as e:
+            logger.error(f"Error cargando archivo de sesiones: {str(e)}")
+            return []
+
+    @staticmethod
+    def register_persistent_views(bot_instance):
+        """Enlaza los botones de los mensajes de sesión ya publicados tras arrancar.
+
+        bot.add_view asocia la vista a su mensaje sin ninguna petición a Discord,
+        así los botones responden desde el primer momento aunque el mensaje no
+        se vuelva a editar. Los mensajes resumen reciben su DigestView.
+        """
+        try:
+            by_message = defaultdict(list)
+            for session in SessionManager.load_sessions():
+                if session.get('notified') and session.get('message_id'):
+                    by_message[session['message_id']].append(session)
+
+            # El mensaje ya guarda sus etiquetas: basta el catálogo por defecto
+            locale = load_catalog(DEFAULT_LANG)
+            for message_id, members in by_message.items():
+                if len(members) > 1:
+                    view = DigestView(members, locale)
+                else:
+                    view = ReadyView(members[0]['session_id'], timeout=None)
+                bot_instance.add_view(view, message_id=int(message_id))
+            if by_message:
+                logger.info(f"Vistas persistentes registradas para {len(by_message)} mensajes")
+        except Exception as e:
+            logger.error(f"Error registrando vistas persistentes: {str(e)}")
+
     @staticmethod
     async def recreate_session_messages(bot_instance):
-        """Recrea los mensajes de sesiones activas al reiniciar el bot"""
+        """Reconcilia los mensajes de sesiones tras arrancar o reconectar.
+
+        Solo se tocan las sesiones que el diario marca como desactualizadas:
+        cambiaron desde el último renderizado correcto o su estado visual
+        (programada, inminente, en curso, finalizada) ha cambiado desde entonces.
+        """
         try:
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('SELECT * FROM sessions WHERE notified = 1')
-            sessions = c.fetchall()
-            conn.close()
+            sessions = SessionJournal.stale_sessions()
+            if sessions:
+                logger.info(f"Reconciliación: {len(sessions)} mensajes de sesión desactualizados")
 
+            digest_messages = set()
             for session in sessions:
                 try:
                     guild = bot_instance.get_guild(int(session[1]))  # guild_id
@@ -592,50 +1033,44 @@ class DatabaseManager:
                         continue
 
                     channel = guild.get_channel(int(session[5]))  # channel_id
-                    if not channel:
+                    if not channel or not channel_permissions.allowed(channel):
+                        continue
+
+                    # Mensaje resumen compartido con otras sesiones: se repinta entero una sola vez
+                    if session[11] in digest_messages:
+                        continue
+                    members = SessionManager.message_sessions(guild.id, session[11]) if session[11] else []
+                    if len(members) > 1:
+                        digest_messages.add(session[11])
+                        await update_digest_message(members)
                         continue
 
+                    session_data = convert_db_to_session(session)
+                    version = SessionJournal.current_version(session_data['session_id'])
+                    server_config = SessionManager.load_config(guild.id)
+                    time_diff = calculate_time_difference(
+                        datetime.strptime(session_data['datetime'], "%d-%m-%Y %H:%M"),
+                        server_config['timezone']
+                    )
+
                     # No eliminamos el mensaje anterior, solo lo actualizamos
                     message_id = session[11]  # message_id
-                    old_message = None
                     if message_id:
                         try:
                             old_message = await channel.fetch_message(int(message_id))
                             if old_message:
-                                session_data = convert_db_to_session(session)
-                                server_config = SessionManager.load_config(guild.id)
-                                time_diff = calculate_time_difference(
-                                    datetime.strptime(session_data['datetime'], "%d-%m-%Y %H:%M"),
-                                    server_config['timezone']
-                                )
-
-                                embed = create_session_embed(session_data, guild, time_diff)
-                                view = ReadyView(session[0], timeout=None)
+                                locale = guild_locales.get(guild.id)
+                                embed = create_session_embed(session_data, guild, time_diff, locale)
+                                view = ReadyView(session[0], timeout=None, locale=locale)
                                 await old_message.edit(embed=embed, view=view)
+                                SessionJournal.record_render(session_data, message_id, version)
                                 continue
                         except discord.NotFound:
                             pass
 
                     # Si no se encontró el mensaje, crear uno nuevo
-                    session_data = convert_db_to_session(session)
-                    server_config = SessionManager.load_config(guild.id)
-                    time_diff = calculate_time_difference(
-                        datetime.strptime(session_data['datetime'], "%d-%m-%Y %H:%M"),
-                        server_config['timezone']
-                    )
-
                     if time_diff > 0:
-                        new_message = await send_session_notification(session_data, guild, channel, time_diff)
-                        if new_message:
-                            conn = sqlite3.connect(DB_FILE)
-                            c = conn.cursor()
-                            c.execute('''
-                                UPDATE sessions 
-                                SET message_id = ? 
-                                WHERE session_id = ?
-                            ''', (str(new_message.id), session[0]))
-                            conn.commit()
-                            conn.close()
+                        await send_session_notification(session_data, guild, channel, time_diff)
 
                 except Exception as e:
                     logger.error(f"Error recreando mensaje para sesión {session[2]}: {str(e)}")
@@ -648,146 +1083,1416 @@ class SessionManager:
     def setup_files():
         try:            
             DatabaseManager.setup_database()
+        except Exception:
+            # Esquema sin migrar: no se arranca con los IDs antiguos
+            logger.error("No se pudo preparar la base de datos; se detiene el arranque")
+            raise
+        try:
+            store.setup()
+            session_ids.seed(store.max_session_id())
         except Exception as e:
             logger.error(f"Error en setup_files: {str(e)}")
 
+    # Valores por defecto de cada columna de la tabla config
+    CONFIG_DEFAULTS = {
+        "prevtime": DEFAULT_ALERT_TIME,
+        "timezone": DEFAULT_TIMEZONE,
+        "lang": "es",
+        "dm_mode": "off",       # off | ready | role
+        "dm_offsets": "60",     # Minutos antes del inicio, separados por comas
+        "reminder_stages": "",  # Etapas de aviso en canal; vacío = solo prevtime
+        "digest_mode": "off",   # on = agrupar los avisos que coinciden en un canal
+        "refresh_scheduled": 15,    # Minutos entre refrescos según el estado (ver RefreshPolicy)
+        "refresh_imminent": 1,
+        "refresh_in_progress": 10,
+    }
+
     @staticmethod
     def load_config(guild_id):
+        config = dict(SessionManager.CONFIG_DEFAULTS)
         try:
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('SELECT * FROM config WHERE guild_id = ?', (str(guild_id),))
-            result = c.fetchone()
-            conn.close()
-            
+            result = store.load_config(guild_id)
             if result:
-                return {
-                    "prevtime": result[1],
-                    "timezone": result[2],
-                    "lang": result[3]
-                }
-            return {"prevtime": DEFAULT_ALERT_TIME, "timezone": DEFAULT_TIMEZONE, "lang": "es"}
+                config.update({
+                    key: value for key, value in result.items()
+                    if key in config and value is not None
+                })
+            return config
         except Exception as e:
             logger.error(f"Error cargando configuración: {str(e)}")
-            return {"prevtime": DEFAULT_ALERT_TIME, "timezone": DEFAULT_TIMEZONE, "lang": "es"}
+            return config
 
     @staticmethod
     def save_config(guild_id, config_data):
         try:
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('''
-                INSERT OR REPLACE INTO config (guild_id, prevtime, timezone, lang)
-                VALUES (?, ?, ?, ?)
-            ''', (str(guild_id), config_data['prevtime'], config_data['timezone'], config_data['lang']))
-            conn.commit()
-            conn.close()
+            store.save_config(guild_id, {
+                key: config_data.get(key, default) for key, default in SessionManager.CONFIG_DEFAULTS.items()
+            })
+            guild_locales.invalidate(guild_id)
             return True
         except Exception as e:
             logger.error(f"Error guardando configuración: {str(e)}")
             return False
     @staticmethod
-    def save_session(session_data, message_id=None):
+    def save_session(session_data, message_id=None, trace=True):
+        """Guarda una sesión y devuelve su dict actualizado (o None si falla).
+
+        Sin session_id se crea una sesión nueva. Con session_id solo se
+        escriben los campos presentes, en un único UPDATE; así una edición no
+        pisa las listas de disponibilidad que otro usuario acaba de cambiar.
+        Si además trae 'version', el UPDATE solo se aplica si la fila no ha
+        cambiado desde que se leyó. Si la sesión ya no existe no se guarda nada.
+
+        Las escrituras del propio planificador pasan trace=False: el simulador
+        las vuelve a generar y no deben grabarse en la traza.
+        """
         try:
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
+            changes = convert_session_to_db(session_data)
+            if message_id:
+                changes['message_id'] = message_id
+            session_id = session_data.get('session_id')
+            expected_version = session_data.get('version')
             
-            # Verificar si tenemos un session_id explícito o necesitamos generarlo
-            if 'session_id' in session_data:
-                session_id = session_data['session_id']
+            is_new = session_id is None
+            if is_new:
+                session_id = session_ids.next()
+                row = build_session_row(session_id, changes)
+                store.insert_session(row)
             else:
-                session_id = f"{session_data['guild_id']}_{session_data['name'].lower().replace(' ', '_')}"
-            
-            # Primero verificar si la sesión ya existe para preservar datos
-            c.execute('SELECT * FROM sessions WHERE session_id = ?', (session_id,))
-            existing_session = c.fetchone()
+                row = store.update_session(session_id, changes, expected_version)
+                if row is None:
+                    # Cambiada por otro (con 'version') o eliminada mientras se editaba o
+                    # se enviaba su aviso: no se crea una fila nueva con datos parciales
+                    if expected_version is not None:
+                        logger.warning(f"La sesión {session_id} cambió mientras se editaba; no se guarda")
+                    else:
+                        logger.warning(f"La sesión {session_id} ya no existe; no se guarda")
+                    return None
             
-            if existing_session:
-                # Si estamos actualizando una sesión existente, primero obtenemos todos los datos actuales
-                existing_data = convert_db_to_session(existing_session)
-                
-                # Actualizamos solo los campos que vienen en session_data
-                for key in session_data:
-                    if key in existing_data and key != 'session_id':
-                        existing_data[key] = session_data[key]
-                
-                # Usamos los datos combinados
-                session_data = existing_data
-            
-            c.execute('''
-                INSERT OR REPLACE INTO sessions 
-                (session_id, guild_id, name, datetime, group_id, channel_id, 
-                creator_id, created_at, notified, ready_users, not_ready_users, message_id, duration)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                session_id,
-                str(session_data['guild_id']),
-                session_data['name'],
-                session_data['datetime'],
-                session_data['group'],
-                session_data['channel'],
-                str(session_data['creator_id']),
-                session_data['created_at'],
-                1 if session_data.get('notified', False) else 0,
-                ','.join(map(str, session_data['status']['ready'])),
-                ','.join(map(str, session_data['status']['not_ready'])),
-                message_id or session_data.get('message_id'),
-                session_data.get('duration', 120)  # Valor por defecto de 120 minutos
-            ))
-            
-            conn.commit()
-            conn.close()
-            return True
+            session = convert_db_to_session(row)
+            SessionManager._refresh_indexes(session, is_new or 'datetime' in changes or 'reminder_stages' in changes)
+            if trace:
+                trace_recorder.record('session_saved', session_id=session_id, insert=is_new,
+                                      fields=session_data, message_id=message_id)
+            return session
         except Exception as e:
             logger.error(f"Error guardando sesión: {str(e)}")
-            return False
+            return None
+
+    @staticmethod
+    def update_session(session_id, apply, retries=5):
+        """Lectura-modificación-escritura con control optimista de concurrencia.
+
+        `apply(session)` modifica el dict leído y devuelve los campos que hay que
+        guardar, o None si no hay nada que cambiar. Si otra escritura se adelanta
+        entre la lectura y el UPDATE, se vuelve a leer y se reintenta.
+        Devuelve (sesión, cambiada) o (None, False) si la sesión no existe;
+        lanza SessionConflict si se agotan los reintentos.
+        """
+        for _ in range(retries):
+            row = store.get_session(session_id)
+            if not row:
+                return None, False
+            session = convert_db_to_session(row)
+            changes = apply(session)
+            if not changes:
+                return session, False
+            row = store.update_session(session_id, convert_session_to_db(changes), session['version'])
+            if row:
+                session = convert_db_to_session(row)
+                SessionManager._refresh_indexes(session, 'datetime' in changes or 'reminder_stages' in changes)
+                return session, True
+        raise SessionConflict(f"Demasiados conflictos actualizando la sesión {session_id}")
+
+    @staticmethod
+    def _refresh_indexes(session, reschedule):
+        """Mantiene al día los índices en memoria y, si cambia el calendario, los avisos"""
+        session_index.add(session['guild_id'], session['session_id'], session['name'], session['datetime'])
+        if session['unroutable']:
+            session_intervals.remove(session['session_id'])
+        else:
+            session_intervals.add(session['guild_id'], session['session_id'], session['datetime'],
+                                  session['duration'], session['group'], session['channel'])
+        if reschedule:
+            ReminderTriggers.rebuild([session])
 
     @staticmethod
     def load_sessions():
+        """Carga las sesiones que el planificador debe procesar (con canal y grupo válidos)"""
         try:
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('SELECT * FROM sessions')
-            results = c.fetchall()
-            conn.close()
-            
-            sessions = []
-            for result in results:
-                sessions.append(convert_db_to_session(result))
-            return sessions
+            return [convert_db_to_session(result) for result in store.routable_sessions()]
         except Exception as e:
             logger.error(f"Error cargando sesiones: {str(e)}")
             return []
     @staticmethod
+    def message_sessions(guild_id, message_id):
+        """Sesiones enrutables de un servidor publicadas en el mismo mensaje (resumen)"""
+        try:
+            return [
+                convert_db_to_session(row) for row in store.iter_guild_sessions(guild_id)
+                if row[11] == str(message_id) and not row[15]
+            ]
+        except Exception as e:
+            logger.error(f"Error buscando las sesiones del mensaje {message_id}: {str(e)}")
+            return []
+    @staticmethod
+    def mark_unroutable(column, value, guild_id):
+        """Marca como no enrutables las sesiones de un servidor cuyo canal, grupo
+        o ID coincide con `value` y cancela sus notificaciones pendientes (y, si
+        es un canal o grupo, desactiva también las reglas recurrentes que lo usan).
+
+        Devuelve las filas recién marcadas como (session_id, name, creator_id).
+        """
+        if column not in ('channel_id', 'group_id', 'session_id'):
+            raise ValueError(column)
+        try:
+            affected = store.mark_unroutable(column, value, guild_id)
+            if affected:
+                store.cancel_notifications([row[0] for row in affected], 'unroutable')
+            if column != 'session_id':
+                # Las reglas recurrentes tampoco pueden generar ocurrencias válidas
+                store.deactivate_recurrences(guild_id, column, value)
+            for row in affected:
+                session_intervals.remove(row[0])
+            return affected
+        except Exception as e:
+            logger.error(f"Error marcando sesiones no enrutables: {str(e)}")
+            return []
+
+    @staticmethod
+    def purge_guild(guild_id):
+        """Retira las sesiones de un servidor del que se ha salido el bot.
+
+        Se mueven al archivo como las sesiones finalizadas, así su historial
+        sigue disponible si el bot vuelve al servidor (y la retención del
+        archivo acaba eliminándolo).
+        """
+        try:
+            session_ids_to_archive = [row[0] for row in store.guild_sessions(guild_id)]
+            archived_at = clock.now().strftime("%Y-%m-%d %H:%M")
+            archived = 0
+            batch_size = DatabaseManager.ARCHIVE_BATCH_SIZE
+            for i in range(0, len(session_ids_to_archive), batch_size):
+                archived += store.archive_sessions(session_ids_to_archive[i:i + batch_size], archived_at)
+            store.deactivate_recurrences(guild_id)
+            session_index.drop_guild(guild_id)
+            session_intervals.drop_guild(guild_id)
+            return archived
+        except Exception as e:
+            logger.error(f"Error archivando sesiones del servidor {guild_id}: {str(e)}")
+            return 0
+
+    @staticmethod
+    def get_session(session_id, guild_id=None):
+        """Devuelve la fila de una sesión (opcionalmente restringida a un servidor)"""
+        try:
+            return store.get_session(session_id, guild_id)
+        except Exception as e:
+            logger.error(f"Error cargando sesión {session_id}: {str(e)}")
+            return None
+
+    @staticmethod
     def delete_session(session_id):
         try:
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
-            deleted = c.rowcount > 0
-            conn.commit()
-            conn.close()
+            deleted = store.delete_session(session_id)
+            session_index.remove(session_id)
+            session_intervals.remove(session_id)
+            trace_recorder.record('session_deleted', session_id=session_id)
             return deleted
         except Exception as e:
             logger.error(f"Error eliminando sesión: {str(e)}")
             return False
 
-# ===================================================================
-# FUNCIONES AUXILIARES Y UTILIDADES
-# ===================================================================
-# Funciones auxiliares
-def get_text(key, guild_id, *args):
-   config = SessionManager.load_config(guild_id)
-   lang = config.get('lang', 'es')
-   text = TEXTS[lang][key]
-   if args:
-       return text.format(*args)
-   return text
+class RecurrenceManager:
+    """Gestiona las reglas de sesiones recurrentes.
 
-def calculate_time_difference(session_time, guild_timezone):
-   try:
+    Solo se guarda la regla y la fecha de la siguiente ocurrencia pendiente
+    (`next_at`, formato ordenable YYYY-MM-DD HH:MM). En cada ciclo el
+    planificador consulta por rango las reglas cuyo `next_at` entra en el
+    horizonte y crea únicamente esas ocurrencias como sesiones normales, con
+    su propia asistencia y mensaje.
+    """
+    NEXT_AT_FORMAT = "%Y-%m-%d %H:%M"
+    # Clave del catálogo con el nombre de cada tipo de regla
+    RULE_LABELS = {
+        'weekly': 'recurrence_rule_weekly',
+        'interval': 'recurrence_rule_interval',
+        'weekdays': 'recurrence_rule_weekdays',
+    }
+    WEEKDAY_ALIASES = {
+        'lun': 0, 'mon': 0, 'mar': 1, 'tue': 1, 'mie': 2, 'wed': 2, 'jue': 3, 'thu': 3,
+        'vie': 4, 'fri': 4, 'sab': 5, 'sat': 5, 'dom': 6, 'sun': 6,
+    }
+
+    @staticmethod
+    def build_rule(rule_type, interval=1, weekdays=None):
+        """Valida los parámetros del comando y devuelve la regla, o None si no es válida"""
+        rule = {'rule_type': rule_type, 'interval': max(1, int(interval or 1)), 'weekdays': []}
+        if rule_type == 'weekdays':
+            for part in (weekdays or '').split(','):
+                part = normalize_search_text(part)
+                if part.isdigit() and 0 <= int(part) <= 6:
+                    rule['weekdays'].append(int(part))
+                elif part[:3] in RecurrenceManager.WEEKDAY_ALIASES:
+                    rule['weekdays'].append(RecurrenceManager.WEEKDAY_ALIASES[part[:3]])
+                elif part:
+                    return None
+            if not rule['weekdays']:
+                return None
+            rule['weekdays'] = sorted(set(rule['weekdays']))
+        elif rule_type not in ('weekly', 'interval'):
+            return None
+        return rule
+
+    @staticmethod
+    def describe_rule(rule, locale=None):
+        locale = locale or load_catalog(DEFAULT_LANG)
+        if rule['rule_type'] == 'weekdays':
+            names = locale('weekday_names').split(',')
+            return ", ".join(names[d] for d in rule['weekdays'])
+        if rule['rule_type'] == 'weekly':
+            if rule['interval'] == 1:
+                return locale('recurrence_rule_weekly')
+            return locale('recurrence_every_weeks', rule['interval'])
+        return locale('recurrence_every_days', rule['interval'])
+
+    @staticmethod
+    def next_occurrence(rule, current):
+        """Calcula la ocurrencia siguiente a `current` (hora local del servidor)"""
+        if rule['rule_type'] == 'weekdays':
+            for offset in range(1, 8):
+                candidate = current + timedelta(days=offset)
+                if candidate.weekday() in rule['weekdays']:
+                    return candidate
+        if rule['rule_type'] == 'weekly':
+            return current + timedelta(weeks=rule['interval'])
+        return current + timedelta(days=rule['interval'])
+
+    @staticmethod
+    def create_recurrence(rule, session_data, first_occurrence):
+        """Guarda la regla; la primera ocurrencia la crea el propio flujo de /newsession"""
+        try:
+            next_at = RecurrenceManager.next_occurrence(rule, first_occurrence)
+            recurrence_id = store.create_recurrence({
+                'guild_id': str(session_data['guild_id']),
+                'name': session_data['name'],
+                'rule_type': rule['rule_type'],
+                'interval': rule['interval'],
+                'weekdays': ','.join(map(str, rule['weekdays'])),
+                'group_id': session_data['group'],
+                'channel_id': session_data['channel'],
+                'creator_id': str(session_data['creator_id']),
+                'duration': session_data.get('duration', 120),
+                'next_at': next_at.strftime(RecurrenceManager.NEXT_AT_FORMAT)
+            })
+            trace_recorder.record('recurrence_created', recurrence_id=recurrence_id, rule=rule,
+                                  session=session_data, first_occurrence=first_occurrence)
+            return recurrence_id
+        except Exception as e:
+            logger.error(f"Error guardando recurrencia: {str(e)}")
+            return None
+
+    @staticmethod
+    def stop_recurrence(recurrence_id, guild_id):
+        """Desactiva una regla; las ocurrencias ya creadas se mantienen"""
+        try:
+            return store.stop_recurrence(recurrence_id, guild_id)
+        except Exception as e:
+            logger.error(f"Error desactivando recurrencia: {str(e)}")
+            return False
+
+    @staticmethod
+    def search_recurrences(guild_id, query, limit=25):
+        try:
+            return store.search_recurrences(guild_id, query, limit)
+        except Exception as e:
+            logger.error(f"Error buscando recurrencias: {str(e)}")
+            return []
+
+    @staticmethod
+    def occurrence_exists(recurrence_id, occurrence):
+        """Comprueba si ya se creó la ocurrencia de una regla en esa fecha"""
+        return store.occurrence_exists(recurrence_id, occurrence.strftime("%d-%m-%Y %H:%M"))
+
+    @staticmethod
+    def materialize_due():
+        """Crea las ocurrencias que entran en el horizonte y avanza `next_at`.
+
+        El trabajo de cada ciclo es proporcional a las ocurrencias próximas: las
+        reglas cuyo `next_at` queda fuera del horizonte ni siquiera se leen.
+        Devuelve el número de ocurrencias guardadas.
+        """
+        try:
+            # `next_at` está en la hora local de cada servidor: la consulta usa la
+            # hora UTC más el mayor adelanto posible (UTC+14) y cada regla se
+            # compara después con el horizonte en la zona de su servidor
+            latest = clock.now(pytz.utc).replace(tzinfo=None) + timedelta(days=RECURRENCE_HORIZON_DAYS, hours=14)
+            due = store.due_recurrences(latest.strftime(RecurrenceManager.NEXT_AT_FORMAT))
+
+            created = 0
+            for (recurrence_id, guild_id, name, rule_type, interval, weekdays,
+                 group_id, channel_id, creator_id, duration, next_at) in due:
+                rule = {
+                    'rule_type': rule_type,
+                    'interval': interval or 1,
+                    'weekdays': [int(d) for d in (weekdays or '').split(',') if d]
+                }
+                timezone = SessionManager.load_config(guild_id)['timezone']
+                try:
+                    tz = pytz.timezone(timezone)
+                except pytz.exceptions.UnknownTimeZoneError:
+                    tz = pytz.timezone(DEFAULT_TIMEZONE)
+                horizon = clock.now(tz).replace(tzinfo=None) + timedelta(days=RECURRENCE_HORIZON_DAYS)
+                occurrence = datetime.strptime(next_at, RecurrenceManager.NEXT_AT_FORMAT)
+                if occurrence > horizon:
+                    continue
+                while occurrence <= horizon:
+                    # Las ocurrencias que ya pasaron (p. ej. con el bot apagado) se saltan
+                    if (calculate_time_difference(occurrence, timezone) > 0
+                            and not RecurrenceManager.occurrence_exists(recurrence_id, occurrence)):
+                        occurrence_session = SessionManager.save_session({
+                            "name": name,
+                            "datetime": occurrence.strftime("%d-%m-%Y %H:%M"),
+                            "group": group_id,
+                            "channel": channel_id,
+                            "creator_id": int(creator_id),
+                            "guild_id": int(guild_id),
+                            "created_at": clock.now().strftime("%d-%m-%Y %H:%M"),
+                            "notified": False,
+                            "duration": duration,
+                            "recurrence_id": recurrence_id,
+                            "status": {
+                                "ready": [],
+                                "not_ready": []
+                            }
+                        }, trace=False)
+                        if occurrence_session:
+                            # Solo para que el simulador traduzca el ID a su propia ocurrencia
+                            trace_recorder.record('occurrence_created', session_id=occurrence_session['session_id'],
+                                                  guild_id=guild_id, recurrence_id=recurrence_id,
+                                                  datetime=occurrence_session['datetime'])
+                            created += 1
+                    occurrence = RecurrenceManager.next_occurrence(rule, occurrence)
+
+                store.set_recurrence_next(recurrence_id, occurrence.strftime(RecurrenceManager.NEXT_AT_FORMAT))
+
+            if created:
+                logger.info(f"Recurrencias: {created} ocurrencias creadas")
+            return created
+        except Exception as e:
+            logger.error(f"Error en materialize_due: {str(e)}")
+            return 0
+
+class NotificationOutbox:
+    """Bandeja de salida persistente para avisos y mensajes de fin de sesión.
+
+    Los cambios de estado de una sesión encolan una notificación con una clave
+    de idempotencia (tipo, sesión y fecha), de modo que volver a encolar es
+    inocuo. Un worker vacía la cola con reintentos y espera exponencial; cada
+    envío a Discord lleva un nonce derivado del ID de la fila, así que un
+    reintento tras un reinicio no duplica el mensaje.
+
+    Cada lote se toma por turnos entre servidores (la primera pendiente de
+    cada servidor, luego la segunda...), para que una ráfaga de avisos de un
+    servidor grande no retrase los de los demás.
+
+    Las entregas a canales sin permisos se aplazan PAUSED_DELAY sin contar
+    como intento, y se adelantan en cuanto se recuperan (ver ChannelPermissions).
+    """
+    MAX_ATTEMPTS = 6
+    BATCH_SIZE = 20
+    TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+    PAUSED_DELAY = timedelta(minutes=5)
+    PAUSED_ERROR = 'missing channel permissions'
+
+    @staticmethod
+    def enqueue(kind, session, suffix=None):
+        try:
+            store.enqueue_notification(
+                f"{kind}:{session['session_id']}:{session['datetime']}" + (f":{suffix}" if suffix is not None else ""),
+                kind, session['session_id'], session['guild_id'],
+                clock.now().strftime(NotificationOutbox.TIME_FORMAT)
+            )
+        except Exception as e:
+            logger.error(f"Error encolando notificación {kind}: {str(e)}")
+
+    @staticmethod
+    def _finish(outbox_id, status, error=None, session_id=None, session_changes=None):
+        """Cierra una entrada y, en la misma transacción, marca la sesión"""
+        store.finish_notification(outbox_id, status, error, clock.now().strftime(NotificationOutbox.TIME_FORMAT),
+                                  session_id, session_changes)
+
+    @staticmethod
+    def _retry(outbox_id, attempts, error):
+        attempts += 1
+        if attempts >= NotificationOutbox.MAX_ATTEMPTS:
+            logger.error(f"Notificación {outbox_id} descartada tras {attempts} intentos: {error}")
+            NotificationOutbox._finish(outbox_id, 'failed', error)
+            return
+        delay = min(30 * 2 ** attempts, 3600)
+        next_attempt = (clock.now() + timedelta(seconds=delay)).strftime(NotificationOutbox.TIME_FORMAT)
+        store.retry_notification(outbox_id, attempts, next_attempt, error)
+
+    @staticmethod
+    def _defer(outbox_id, error):
+        """Aplaza una entrega sin contarla como intento (canal en pausa)"""
+        next_attempt = (clock.now() + NotificationOutbox.PAUSED_DELAY).strftime(NotificationOutbox.TIME_FORMAT)
+        store.defer_notification(outbox_id, next_attempt, error)
+
+    @staticmethod
+    def resume_guild(guild_id):
+        """Adelanta las entregas aplazadas por falta de permisos en un servidor"""
+        try:
+            store.resume_notifications(guild_id, clock.now().strftime(NotificationOutbox.TIME_FORMAT),
+                                       NotificationOutbox.PAUSED_ERROR)
+        except Exception as e:
+            logger.error(f"Error reanudando la bandeja de salida del servidor {guild_id}: {str(e)}")
+
+    @staticmethod
+    async def drain(bot_instance):
+        """Procesa las notificaciones pendientes cuyo turno ha llegado"""
+        try:
+            pending = store.pending_notifications(clock.now().strftime(NotificationOutbox.TIME_FORMAT),
+                                                  NotificationOutbox.BATCH_SIZE)
+        except Exception as e:
+            logger.error(f"Error leyendo la bandeja de salida: {str(e)}")
+            return
+
+        digests, pending = NotificationOutbox._group_digests(pending)
+        for entries in digests:
+            started = time.monotonic()
+            try:
+                await NotificationOutbox._deliver_digest(bot_instance, entries)
+            except Exception as e:
+                logger.error(f"Error entregando resumen de avisos: {str(e)}")
+                for outbox_id, _, _, attempts, _ in entries:
+                    NotificationOutbox._retry(outbox_id, attempts, str(e))
+            guild_scheduler.record(entries[0][4], time.monotonic() - started, 'deliveries')
+
+        for outbox_id, kind, session_id, attempts, guild_id in pending:
+            started = time.monotonic()
+            try:
+                await NotificationOutbox._deliver(bot_instance, outbox_id, kind, session_id, attempts)
+            except Exception as e:
+                logger.error(f"Error entregando notificación {outbox_id}: {str(e)}")
+                NotificationOutbox._retry(outbox_id, attempts, str(e))
+            if guild_id:
+                guild_scheduler.record(guild_id, time.monotonic() - started, 'deliveries')
+
+    @staticmethod
+    def _group_digests(pending):
+        """Separa los avisos de servidores con modo resumen que coinciden en un canal.
+
+        Devuelve (resúmenes, resto): cada resumen es una lista de 2 a
+        DIGEST_MAX_SESSIONS entradas del mismo canal; el resto se entrega
+        una a una.
+        """
+        digest_guilds = {}
+        channels = defaultdict(list)
+        rest = []
+        for entry in pending:
+            outbox_id, kind, session_id, attempts, guild_id = entry
+            if kind != 'alert' or not guild_id:
+                rest.append(entry)
+                continue
+            if guild_id not in digest_guilds:
+                digest_guilds[guild_id] = SessionManager.load_config(guild_id).get('digest_mode') == 'on'
+            row = SessionManager.get_session(session_id) if digest_guilds[guild_id] else None
+            if not row or row[8] or row[15]:  # notified / unroutable: se resuelve en _deliver
+                rest.append(entry)
+                continue
+            channels[(guild_id, row[5])].append(entry)
+
+        digests = []
+        for entries in channels.values():
+            for start in range(0, len(entries), DIGEST_MAX_SESSIONS):
+                chunk = entries[start:start + DIGEST_MAX_SESSIONS]
+                if len(chunk) > 1:
+                    digests.append(chunk)
+                else:
+                    rest.extend(chunk)
+        rest.sort(key=lambda entry: entry[0])
+        return digests, rest
+
+    @staticmethod
+    async def _deliver_digest(bot_instance, entries):
+        """Entrega varios avisos del mismo canal en un único mensaje resumen"""
+        sessions = []
+        for outbox_id, _, session_id, attempts, _ in entries:
+            row = SessionManager.get_session(session_id)
+            if row:
+                sessions.append(convert_db_to_session(row))
+            else:
+                NotificationOutbox._finish(outbox_id, 'cancelled', 'session deleted')
+        if not sessions:
+            return
+
+        guild = bot_instance.get_guild(int(sessions[0]['guild_id']))
+        channel = guild.get_channel(int(sessions[0]['channel'])) if guild else None
+        if guild and not channel:
+            # Canal eliminado: sus sesiones dejan de ser enrutables y se cancelan sus avisos
+            affected = SessionManager.mark_unroutable('channel_id', sessions[0]['channel'], guild.id)
+            await notify_unroutable_sessions(guild, affected, 'session_unroutable_channel')
+            return
+        if channel and not channel_permissions.allowed(channel):
+            for outbox_id, _, _, _, _ in entries:
+                NotificationOutbox._defer(outbox_id, NotificationOutbox.PAUSED_ERROR)
+            return
+        message = None
+        if channel:
+            message = await send_digest_notification(sessions, guild, channel, nonce=f"rs{entries[0][0]}d")
+        delivered = {session['session_id'] for session in sessions}
+        for outbox_id, _, session_id, attempts, _ in entries:
+            if session_id not in delivered:
+                continue
+            if message:
+                NotificationOutbox._finish(outbox_id, 'sent')
+            else:
+                NotificationOutbox._retry(outbox_id, attempts, 'digest send failed')
+
+    @staticmethod
+    async def _deliver(bot_instance, outbox_id, kind, session_id, attempts):
+        row = SessionManager.get_session(session_id)
+        if not row:
+            NotificationOutbox._finish(outbox_id, 'cancelled', 'session deleted')
+            return
+        session = convert_db_to_session(row)
+        nonce = f"rs{outbox_id}"
+
+        # Ya entregada (p. ej. por la recuperación al arrancar)
+        if (kind == 'alert' and session['notified']) or (kind == 'end_prompt' and session['end_notification_sent']):
+            NotificationOutbox._finish(outbox_id, 'sent')
+            return
+
+        guild = bot_instance.get_guild(int(session['guild_id']))
+        channel = guild.get_channel(int(session['channel'])) if guild else None
+        if not channel:
+            NotificationOutbox._retry(outbox_id, attempts, 'guild or channel unavailable')
+            return
+        if not channel_permissions.allowed(channel):
+            NotificationOutbox._defer(outbox_id, NotificationOutbox.PAUSED_ERROR)
+            return
+
+        if kind == 'alert':
+            server_config = SessionManager.load_config(session['guild_id'])
+            time_diff = calculate_time_difference(
+                datetime.strptime(session['datetime'], "%d-%m-%Y %H:%M"),
+                server_config['timezone']
+            )
+            message = await send_session_notification(session, guild, channel, time_diff, nonce=nonce)
+            if message:
+                NotificationOutbox._finish(outbox_id, 'sent')
+            else:
+                NotificationOutbox._retry(outbox_id, attempts, 'send failed')
+        elif kind == 'stage':
+            server_config = SessionManager.load_config(session['guild_id'])
+            time_diff = calculate_time_difference(
+                datetime.strptime(session['datetime'], "%d-%m-%Y %H:%M"),
+                server_config['timezone']
+            )
+            if time_diff <= 0:
+                NotificationOutbox._finish(outbox_id, 'cancelled', 'session started')
+            elif await send_stage_reminder(session, guild, channel, time_diff, nonce=nonce):
+                NotificationOutbox._finish(outbox_id, 'sent')
+            else:
+                NotificationOutbox._retry(outbox_id, attempts, 'send failed')
+        elif kind == 'end_prompt':
+            if await send_end_prompt(session, guild, channel, nonce=nonce):
+                NotificationOutbox._finish(outbox_id, 'sent', session_id=session_id,
+                                           session_changes={'end_notification_sent': 1})
+            else:
+                NotificationOutbox._retry(outbox_id, attempts, 'send failed')
+
+    @staticmethod
+    def prune(days=7):
+        """Elimina las entradas ya cerradas más antiguas que `days` días"""
+        try:
+            store.prune_notifications((clock.now() - timedelta(days=days)).strftime(NotificationOutbox.TIME_FORMAT))
+        except Exception as e:
+            logger.error(f"Error limpiando la bandeja de salida: {str(e)}")
+
+class SessionJournal:
+    """Diario de cambios de sesiones y estado de renderizado de sus mensajes.
+
+    Unos triggers de SQLite incrementan `session_journal.version` cada vez que
+    cambia un dato visible de la sesión y marcan su fila de `message_renders`
+    como sucia. Tras cada renderizado correcto se guarda la versión pintada y
+    el instante en que caduca el tramo de estado actual (programada, inminente,
+    en curso, finalizada). Al reconectar solo se revisan las filas sucias o
+    con el tramo caducado, ambas consultas por índice.
+    """
+    TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+    NEVER = "9999-12-31 23:59:59"
+    IMMINENT_MINUTES = 15
+
+    @staticmethod
+    def setup(cursor):
+        """Crea las tablas y triggers del diario (llamado desde setup_database)"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS session_journal (
+                session_id INTEGER PRIMARY KEY,
+                version INTEGER DEFAULT 0,
+                changed_at TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS message_renders (
+                session_id INTEGER PRIMARY KEY,
+                message_id TEXT,
+                rendered_version INTEGER DEFAULT 0,
+                bucket_until TEXT,
+                dirty INTEGER DEFAULT 0,
+                rendered_at TEXT
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_renders_dirty ON message_renders (dirty)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_renders_bucket ON message_renders (bucket_until)')
+
+        bump = '''
+            INSERT INTO session_journal (session_id, version, changed_at)
+            VALUES (NEW.session_id, 1, datetime('now'))
+            ON CONFLICT(session_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+            UPDATE message_renders SET dirty = 1 WHERE session_id = NEW.session_id;
+        '''
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_sessions_journal_insert AFTER INSERT ON sessions
+            BEGIN {bump} END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_sessions_journal_update
+            AFTER UPDATE OF {', '.join(JOURNAL_COLUMNS)}
+            ON sessions
+            BEGIN {bump} END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_sessions_journal_delete AFTER DELETE ON sessions
+            BEGIN
+                DELETE FROM session_journal WHERE session_id = OLD.session_id;
+                DELETE FROM message_renders WHERE session_id = OLD.session_id;
+            END
+        ''')
+
+        # Los mensajes publicados que el diario aún no conoce (al crearlo, o si un
+        # arranque anterior falló antes de registrarlos) se revisan una vez
+        cursor.execute('''
+            INSERT OR IGNORE INTO message_renders (session_id, message_id, rendered_version, bucket_until, dirty)
+            SELECT session_id, message_id, 0, '', 1 FROM sessions WHERE notified = 1
+        ''')
+
+    @staticmethod
+    def current_version(session_id):
+        """Versión actual de la sesión; se lee antes de renderizar"""
+        try:
+            return store.journal_version(session_id)
+        except Exception as e:
+            logger.error(f"Error leyendo versión de sesión {session_id}: {str(e)}")
+            return 0
+
+    @staticmethod
+    def bucket_until(session, guild_timezone):
+        """Instante (UTC) en el que cambia el estado visual de la sesión"""
+        try:
+            tz = pytz.timezone(guild_timezone)
+        except pytz.exceptions.UnknownTimeZoneError:
+            tz = pytz.timezone(DEFAULT_TIMEZONE)
+        start = tz.localize(datetime.strptime(session['datetime'], "%d-%m-%Y %H:%M")).astimezone(pytz.utc)
+        boundaries = [
+            start - timedelta(minutes=SessionJournal.IMMINENT_MINUTES),
+            start,
+            start + timedelta(minutes=session.get('duration', 120)),
+        ]
+        now = clock.now(pytz.utc)
+        for boundary in boundaries:
+            if boundary > now:
+                return boundary.strftime(SessionJournal.TIME_FORMAT)
+        return SessionJournal.NEVER
+
+    @staticmethod
+    def record_render(session, message_id, version):
+        """Registra que `message_id` muestra la versión `version` de la sesión.
+
+        Si la sesión cambió mientras se enviaba el mensaje, la fila queda sucia.
+        """
+        try:
+            timezone = SessionManager.load_config(session['guild_id'])['timezone']
+            store.record_render(session['session_id'], message_id, version,
+                                SessionJournal.bucket_until(session, timezone),
+                                clock.now().strftime(SessionJournal.TIME_FORMAT))
+        except Exception as e:
+            logger.error(f"Error registrando renderizado de sesión {session.get('session_id')}: {str(e)}")
+
+    @staticmethod
+    def clean_renders():
+        """Último renderizado de los mensajes que siguen al día: sin cambios
+        posteriores y sin haber cambiado de estado visual desde entonces.
+
+        Devuelve {session_id: (message_id, rendered_at)}.
+        """
+        try:
+            return store.clean_renders(clock.now(pytz.utc).strftime(SessionJournal.TIME_FORMAT))
+        except Exception as e:
+            logger.error(f"Error leyendo renderizados: {str(e)}")
+            return {}
+
+    @staticmethod
+    def stale_sessions():
+        """Filas de sesiones cuyo mensaje no refleja su estado actual"""
+        return store.stale_sessions(clock.now(pytz.utc).strftime(SessionJournal.TIME_FORMAT))
+
+class ReminderTriggers:
+    """Disparadores precalculados de los avisos de cada sesión.
+
+    Cada etapa de aviso (minutos antes del inicio) se guarda como una fila con
+    su instante de disparo en UTC (`fire_at`). Las etapas de canal salen de la
+    propia sesión, de `config.reminder_stages` o, en su defecto, de
+    `config.prevtime`; las etapas por mensaje privado, de `config.dm_offsets`.
+    En cada ciclo basta una consulta por rango sobre el índice (fired, fire_at),
+    así que añadir etapas no añade trabajo por ciclo.
+    """
+    TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+    BATCH_SIZE = 500
+
+    @staticmethod
+    def stages_for(session, config):
+        channel_stages = (
+            parse_reminder_offsets(session.get('reminder_stages'))
+            or parse_reminder_offsets(config.get('reminder_stages'))
+            or [int(config.get('prevtime') or DEFAULT_ALERT_TIME)]
+        )
+        dm_stages = []
+        if config.get('dm_mode', 'off') != 'off':
+            dm_stages = parse_reminder_offsets(config.get('dm_offsets')) or []
+        return {'channel': channel_stages, 'dm': dm_stages}
+
+    @staticmethod
+    def _rows(session, config):
+        try:
+            tz = pytz.timezone(config['timezone'])
+        except pytz.exceptions.UnknownTimeZoneError:
+            tz = pytz.timezone(DEFAULT_TIMEZONE)
+        start = tz.localize(datetime.strptime(session['datetime'], "%d-%m-%Y %H:%M")).astimezone(pytz.utc)
+        now = clock.now(pytz.utc)
+        if start <= now:
+            return []
+
+        rows = []
+        for kind, stages in ReminderTriggers.stages_for(session, config).items():
+            future = [stage for stage in stages if start - timedelta(minutes=stage) > now]
+            past = [stage for stage in stages if start - timedelta(minutes=stage) <= now]
+            # Las etapas ya vencidas no se rearman: subir prevtime o las etapas de una
+            # sesión repetiría un aviso ya entregado. La única excepción es el anuncio
+            # en el canal de una sesión aún sin publicar (p. ej. creada dentro del
+            # margen de aviso), que se dispara una vez con la etapa más cercana.
+            if kind != 'channel' or session.get('notified'):
+                past = []
+            for stage in future + ([min(past)] if past else []):
+                fire_at = (start - timedelta(minutes=stage)).strftime(ReminderTriggers.TIME_FORMAT)
+                rows.append((kind, stage, fire_at))
+        return rows
+
+    @staticmethod
+    def rebuild(sessions, config=None):
+        """Recalcula los disparadores pendientes de las sesiones indicadas.
+
+        Las filas ya disparadas con el mismo instante se conservan (INSERT OR
+        IGNORE) y las etapas cuyo instante ya pasó no se recrean, así que
+        recalcular no repite avisos; si cambia la fecha de la sesión, el nuevo
+        instante crea filas nuevas y los avisos futuros se rearman.
+        """
+        try:
+            for session in sessions:
+                guild_config = config or SessionManager.load_config(session['guild_id'])
+                store.replace_reminders(session['session_id'], ReminderTriggers._rows(session, guild_config))
+        except Exception as e:
+            logger.error(f"Error recalculando avisos: {str(e)}")
+
+    @staticmethod
+    def rebuild_guild(guild_id):
+        """Recalcula los avisos de todas las sesiones de un servidor (tras cambiar su configuración)"""
+        try:
+            sessions = [convert_db_to_session(row) for row in store.guild_sessions(guild_id)]
+            ReminderTriggers.rebuild(sessions, SessionManager.load_config(guild_id))
+        except Exception as e:
+            logger.error(f"Error recalculando avisos del servidor {guild_id}: {str(e)}")
+
+    @staticmethod
+    def backfill():
+        """Genera disparadores para las sesiones pendientes que aún no tienen ninguno"""
+        try:
+            sessions = [convert_db_to_session(row) for row in store.sessions_without_reminders()]
+            if sessions:
+                ReminderTriggers.rebuild(sessions)
+                logger.info(f"Avisos generados para {len(sessions)} sesiones existentes")
+        except Exception as e:
+            logger.error(f"Error generando avisos de sesiones existentes: {str(e)}")
+
+    @staticmethod
+    async def fire_due(bot_instance):
+        """Dispara los avisos vencidos: una consulta por rango sobre el índice"""
+        try:
+            due = store.claim_due_reminders(
+                clock.now(pytz.utc).strftime(ReminderTriggers.TIME_FORMAT), ReminderTriggers.BATCH_SIZE
+            )
+        except Exception as e:
+            logger.error(f"Error leyendo avisos pendientes: {str(e)}")
+            return
+
+        for trigger_id, session_id, kind, stage in due:
+            try:
+                row = SessionManager.get_session(session_id)
+                if not row:
+                    continue
+                session = convert_db_to_session(row)
+                if session['unroutable']:
+                    continue
+                if kind == 'channel':
+                    # La primera etapa publica el mensaje de la sesión; las siguientes lo recuerdan
+                    if not session['notified']:
+                        NotificationOutbox.enqueue('alert', session)
+                    else:
+                        NotificationOutbox.enqueue('stage', session, suffix=stage)
+                elif kind == 'dm':
+                    guild = bot_instance.get_guild(int(session['guild_id']))
+                    if guild:
+                        send_dm_reminders(session, guild)
+            except Exception as e:
+                logger.error(f"Error disparando aviso {trigger_id}: {str(e)}")
+
+class AttendanceStats:
+    """Estadísticas de asistencia mantenidas de forma incremental.
+
+    `attendance_marks` guarda, mientras la sesión está activa, quién llegó a
+    marcarse disponible y con cuánta antelación. Al finalizar la sesión se
+    suman sus resultados a los contadores por usuario y por rol en una sola
+    transacción, y /stats lee una fila por clave primaria.
+
+    - Asistencias: usuarios disponibles al finalizar.
+    - Ausencias (no-shows): se marcaron disponibles y luego se retiraron.
+    - Rechazos: se marcaron no disponibles sin haber estado disponibles.
+    - Sin respuesta: miembros del rol que no marcaron nada.
+    """
+
+    @staticmethod
+    def setup(cursor):
+        """Crea las tablas de asistencia (llamado desde setup_database)"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS attendance_marks (
+                session_id INTEGER,
+                user_id TEXT,
+                ever_ready INTEGER DEFAULT 0,
+                lead_minutes INTEGER,
+                PRIMARY KEY (session_id, user_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS attendance_user_stats (
+                guild_id TEXT,
+                user_id TEXT,
+                attended INTEGER DEFAULT 0,
+                no_shows INTEGER DEFAULT 0,
+                declined INTEGER DEFAULT 0,
+                no_response INTEGER DEFAULT 0,
+                changes INTEGER DEFAULT 0,
+                lead_total INTEGER DEFAULT 0,
+                lead_samples INTEGER DEFAULT 0,
+                PRIMARY KEY (guild_id, user_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS attendance_role_stats (
+                guild_id TEXT,
+                role_id TEXT,
+                sessions INTEGER DEFAULT 0,
+                attended INTEGER DEFAULT 0,
+                no_shows INTEGER DEFAULT 0,
+                declined INTEGER DEFAULT 0,
+                no_response INTEGER DEFAULT 0,
+                PRIMARY KEY (guild_id, role_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS attendance_finalized (
+                session_id INTEGER PRIMARY KEY,
+                finalized_at TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_sessions_marks_delete AFTER DELETE ON sessions
+            BEGIN
+                DELETE FROM attendance_marks WHERE session_id = OLD.session_id;
+            END
+        ''')
+
+    @staticmethod
+    def record_change(session, user_id, status, time_diff):
+        """Registra un cambio de disponibilidad (llamado desde handle_availability)"""
+        try:
+            lead = max(0, int(time_diff)) if status == 'ready' else None
+            store.record_attendance(session['guild_id'], session['session_id'], user_id, lead)
+        except Exception as e:
+            logger.error(f"Error registrando asistencia: {str(e)}")
+
+    @staticmethod
+    def finalize(session, guild):
+        """Suma el resultado de una sesión finalizada a los contadores (una sola vez)"""
+        ready = set(session['status']['ready'])
+        not_ready = set(session['status']['not_ready'])
+        role = guild.get_role(int(session['group'])) if guild else None
+        silent = set()
+        if role:
+            silent = {member.id for member in role.members if not member.bot} - ready - not_ready
+
+        def build(marks):
+            # Incrementos: (attended, no_shows, declined, no_response, lead_total, lead_samples)
+            rows = []
+            for user_id in ready:
+                lead = marks.get(user_id, (1, None))[1]
+                rows.append((user_id, (1, 0, 0, 0, lead or 0, 1 if lead is not None else 0)))
+            for user_id in not_ready:
+                no_show = 1 if marks.get(user_id, (0, None))[0] else 0
+                rows.append((user_id, (0, no_show, 1 - no_show, 0, 0, 0)))
+            for user_id in silent:
+                rows.append((user_id, (0, 0, 0, 1, 0, 0)))
+            no_shows = sum(values[1] for _, values in rows)
+            return rows, (len(ready), no_shows, len(not_ready) - no_shows, len(silent))
+
+        try:
+            store.finalize_attendance(session['session_id'], session['guild_id'], session['group'],
+                                      clock.now().strftime("%Y-%m-%d %H:%M"), build)
+        except Exception as e:
+            logger.error(f"Error consolidando asistencia de {session.get('name', 'unknown')}: {str(e)}")
+
+    @staticmethod
+    def user_stats(guild_id, user_id):
+        try:
+            return store.user_stats(guild_id, user_id)
+        except Exception as e:
+            logger.error(f"Error cargando estadísticas: {str(e)}")
+            return None
+
+    @staticmethod
+    def role_stats(guild_id, role_id):
+        try:
+            return store.role_stats(guild_id, role_id)
+        except Exception as e:
+            logger.error(f"Error cargando estadísticas: {str(e)}")
+            return None
+
+    @staticmethod
+    def reliability(stats):
+        """Porcentaje de compromisos cumplidos: asistencias / (asistencias + ausencias)"""
+        committed = stats['attended'] + stats['no_shows']
+        return round(100 * stats['attended'] / committed) if committed else None
+
+# ===================================================================
+# ÍNDICE DE BÚSQUEDA DE SESIONES (AUTOCOMPLETADO)
+# ===================================================================
+def normalize_search_text(text):
+    """Normaliza un texto para búsqueda: minúsculas y sin tildes"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).strip()
+
+class SessionNameIndex:
+    """Índice en memoria por servidor sobre los nombres de sesión.
+
+    Cada servidor mantiene una lista ordenada de nombres normalizados (búsqueda
+    por prefijo con bisect) y un índice de trigramas (búsqueda por subcadena),
+    de modo que el autocompletado no depende del número total de sesiones.
+    Los servidores se cargan desde la base de datos la primera vez que se
+    consultan y después se mantienen al día desde SessionManager.
+    """
+    MAX_RESULTS = 25
+
+    def __init__(self):
+        self._guilds = {}  # guild_id -> {'entries', 'keys', 'trigrams'}
+        self._owners = {}  # session_id -> guild_id
+
+    @staticmethod
+    def _trigrams(key):
+        return {key[i:i + 3] for i in range(len(key) - 2)}
+
+    def _load_guild(self, guild_id):
+        guild_id = str(guild_id)
+        index = self._guilds.get(guild_id)
+        if index is not None:
+            return index
+
+        index = {'entries': {}, 'keys': [], 'trigrams': {}}
+        self._guilds[guild_id] = index
+        try:
+            for row in store.guild_sessions(guild_id):
+                self._insert(index, guild_id, row[0], row[2], row[3])
+        except Exception as e:
+            logger.error(f"Error cargando índice de sesiones del servidor {guild_id}: {str(e)}")
+            del self._guilds[guild_id]
+        return index
+
+    def _insert(self, index, guild_id, session_id, name, session_datetime):
+        key = normalize_search_text(name)
+        index['entries'][session_id] = (name, session_datetime, key)
+        bisect.insort(index['keys'], (key, session_id))
+        for trigram in self._trigrams(key):
+            index['trigrams'].setdefault(trigram, set()).add(session_id)
+        self._owners[session_id] = guild_id
+
+    def _discard(self, index, session_id):
+        entry = index['entries'].pop(session_id, None)
+        if entry is None:
+            return
+        key = entry[2]
+        pos = bisect.bisect_left(index['keys'], (key, session_id))
+        if pos < len(index['keys']) and index['keys'][pos] == (key, session_id):
+            del index['keys'][pos]
+        for trigram in self._trigrams(key):
+            postings = index['trigrams'].get(trigram)
+            if postings:
+                postings.discard(session_id)
+                if not postings:
+                    del index['trigrams'][trigram]
+
+    def add(self, guild_id, session_id, name, session_datetime):
+        """Inserta o actualiza una sesión (solo si el servidor ya está cargado)"""
+        guild_id = str(guild_id)
+        index = self._guilds.get(guild_id)
+        if index is None:
+            return
+        self._discard(index, session_id)
+        self._insert(index, guild_id, session_id, name, session_datetime)
+
+    def drop_guild(self, guild_id):
+        """Olvida el índice de un servidor (se recargará si vuelve a consultarse)"""
+        index = self._guilds.pop(str(guild_id), None)
+        if index is not None:
+            for session_id in index['entries']:
+                self._owners.pop(session_id, None)
+
+    def remove(self, session_id):
+        guild_id = self._owners.pop(session_id, None)
+        index = self._guilds.get(guild_id)
+        if index is not None:
+            self._discard(index, session_id)
+
+    def count(self, guild_id):
+        return len(self._load_guild(guild_id)['entries'])
+
+    def search(self, guild_id, query, limit=MAX_RESULTS):
+        """Devuelve hasta `limit` tuplas (session_id, name, datetime).
+
+        Primero los nombres que empiezan por la consulta y, si faltan
+        resultados, los que la contienen en cualquier posición.
+        """
+        index = self._load_guild(guild_id)
+        entries = index['entries']
+        keys = index['keys']
+        query = normalize_search_text(query or '')
+
+        matches = []
+        seen = set()
+        pos = bisect.bisect_left(keys, (query,))
+        while pos < len(keys) and len(matches) < limit:
+            key, session_id = keys[pos]
+            if not key.startswith(query):
+                break
+            matches.append(session_id)
+            seen.add(session_id)
+            pos += 1
+
+        if len(matches) < limit and len(query) >= 3:
+            postings = sorted((index['trigrams'].get(t, set()) for t in self._trigrams(query)), key=len)
+            candidates = set(postings[0]) if postings else set()
+            for other in postings[1:]:
+                candidates &= other
+                if not candidates:
+                    break
+            extra = sorted(
+                (entries[sid][2], sid) for sid in candidates
+                if sid not in seen and query in entries[sid][2]
+            )
+            matches.extend(sid for _, sid in extra[:limit - len(matches)])
+
+        return [(sid, entries[sid][0], entries[sid][1]) for sid in matches]
+
+session_index = SessionNameIndex()
+
+class SessionIntervalIndex:
+    """Índice de intervalos por servidor para detectar sesiones solapadas.
+
+    Cada sesión ocupa el intervalo [inicio, inicio + duración) en dos carriles:
+    el de su grupo y el de su canal. Cada carril guarda los inicios ordenados
+    y la duración máxima vista, así que una consulta hace bisect hasta el fin
+    del intervalo pedido y retrocede solo mientras un intervalo anterior aún
+    pueda alcanzarlo. Las fechas son locales del servidor (todas sus sesiones
+    comparten zona horaria) y se guardan en minutos.
+    """
+    EPOCH = datetime(2000, 1, 1)
+
+    def __init__(self):
+        self._guilds = {}  # guild_id -> {'entries', 'lanes'}
+        self._owners = {}  # session_id -> guild_id
+
+    @staticmethod
+    def _interval(session_datetime, duration):
+        start = datetime.strptime(session_datetime, "%d-%m-%Y %H:%M")
+        start_minute = int((start - SessionIntervalIndex.EPOCH).total_seconds() // 60)
+        return start_minute, start_minute + int(duration or 120)
+
+    def _load_guild(self, guild_id):
+        guild_id = str(guild_id)
+        index = self._guilds.get(guild_id)
+        if index is not None:
+            return index
+
+        index = {'entries': {}, 'lanes': {}}
+        self._guilds[guild_id] = index
+        try:
+            for row in store.guild_sessions(guild_id):
+                session = convert_db_to_session(row)
+                if not session['unroutable']:
+                    self._insert(index, guild_id, session['session_id'], session['datetime'],
+                                 session['duration'], session['group'], session['channel'])
+        except Exception as e:
+            logger.error(f"Error cargando intervalos del servidor {guild_id}: {str(e)}")
+            del self._guilds[guild_id]
+        return index
+
+    def _insert(self, index, guild_id, session_id, session_datetime, duration, group_id, channel_id):
+        try:
+            start, end = self._interval(session_datetime, duration)
+        except ValueError:
+            return
+        lanes = (('group', str(group_id)), ('channel', str(channel_id)))
+        index['entries'][session_id] = (start, end, lanes)
+        for lane_key in lanes:
+            lane = index['lanes'].setdefault(lane_key, {'starts': [], 'max_len': 0})
+            bisect.insort(lane['starts'], (start, end, session_id))
+            lane['max_len'] = max(lane['max_len'], end - start)
+        self._owners[session_id] = guild_id
+
+    def _discard(self, index, session_id):
+        entry = index['entries'].pop(session_id, None)
+        if entry is None:
+            return
+        start, end, lanes = entry
+        for lane_key in lanes:
+            starts = index['lanes'][lane_key]['starts']
+            pos = bisect.bisect_left(starts, (start, end, session_id))
+            if pos < len(starts) and starts[pos] == (start, end, session_id):
+                del starts[pos]
+
+    def add(self, guild_id, session_id, session_datetime, duration, group_id, channel_id):
+        """Inserta o actualiza una sesión (solo si el servidor ya está cargado)"""
+        guild_id = str(guild_id)
+        index = self._guilds.get(guild_id)
+        if index is None:
+            return
+        self._discard(index, session_id)
+        self._insert(index, guild_id, session_id, session_datetime, duration, group_id, channel_id)
+
+    def drop_guild(self, guild_id):
+        """Olvida el índice de un servidor (se recargará si vuelve a consultarse)"""
+        index = self._guilds.pop(str(guild_id), None)
+        if index is not None:
+            for session_id in index['entries']:
+                self._owners.pop(session_id, None)
+
+    def remove(self, session_id):
+        guild_id = self._owners.pop(session_id, None)
+        index = self._guilds.get(guild_id)
+        if index is not None:
+            self._discard(index, session_id)
+
+    def overlaps(self, guild_id, session_datetime, duration, group_id, channel_id, exclude=None):
+        """Devuelve [(session_id, carriles)] de las sesiones que se solapan con el
+        intervalo; una sesión del mismo grupo y canal aparece una vez con ambos"""
+        index = self._load_guild(guild_id)
+        start, end = self._interval(session_datetime, duration)
+        found = {}
+        for lane_key in (('group', str(group_id)), ('channel', str(channel_id))):
+            lane = index['lanes'].get(lane_key)
+            if not lane:
+                continue
+            starts = lane['starts']
+            pos = bisect.bisect_left(starts, (end,)) - 1
+            # Ningún intervalo que empiece antes de start - max_len puede llegar a start
+            while pos >= 0 and starts[pos][0] > start - lane['max_len']:
+                other_start, other_end, other_id = starts[pos]
+                if other_end > start and other_id != exclude:
+                    found.setdefault(other_id, []).append(lane_key[0])
+                pos -= 1
+        return [(session_id, tuple(kinds)) for session_id, kinds in found.items()]
+
+    def conflicts(self, guild_id):
+        """Recorre cada carril una vez y devuelve [(session_a, session_b, carriles)]
+        solapadas; un par que comparte grupo y canal aparece una sola vez"""
+        index = self._load_guild(guild_id)
+        found = {}
+        for (kind, _), lane in index['lanes'].items():
+            active = []  # (end, session_id) de los intervalos aún abiertos
+            for start, end, session_id in lane['starts']:
+                active = [item for item in active if item[0] > start]
+                for _, other_id in active:
+                    pair = found.setdefault(frozenset((other_id, session_id)), (other_id, session_id, []))
+                    if kind not in pair[2]:
+                        pair[2].append(kind)
+                active.append((end, session_id))
+        return [(first, second, tuple(kinds)) for first, second, kinds in found.values()]
+
+session_intervals = SessionIntervalIndex()
+
+class TimezoneIndex:
+    """Índice de zonas horarias IANA construido una sola vez al importar.
+
+    Cada zona se indexa por su nombre completo, por cada componente del nombre
+    (continente, ciudad), por su abreviatura actual (CET, EST...) y por los
+    alias de COMMON_ALIASES. Las búsquedas usan prefijo con bisect y, si no
+    hay suficientes resultados, coincidencia aproximada con difflib.
+    """
+    MAX_RESULTS = 25
+    COMMON_ALIASES = {
+        'utc': 'UTC',
+        'gmt': 'Etc/GMT',
+        'espana': 'Europe/Madrid',
+        'spain': 'Europe/Madrid',
+        'canarias': 'Atlantic/Canary',
+        'mexico': 'America/Mexico_City',
+        'argentina': 'America/Argentina/Buenos_Aires',
+        'colombia': 'America/Bogota',
+        'chile': 'America/Santiago',
+        'peru': 'America/Lima',
+        'uk': 'Europe/London',
+        'eastern': 'America/New_York',
+        'central': 'America/Chicago',
+        'mountain': 'America/Denver',
+        'pacific': 'America/Los_Angeles',
+    }
+    DEFAULT_SUGGESTIONS = [
+        'Europe/Madrid', 'Europe/London', 'America/New_York', 'America/Mexico_City',
+        'America/Argentina/Buenos_Aires', 'America/Bogota', 'America/Los_Angeles', 'UTC',
+    ]
+
+    def __init__(self):
+        self.zones = set(pytz.all_timezones)
+        self._common = set(pytz.common_timezones)
+        aliases = {}
+        now = clock.now()
+        for zone in pytz.all_timezones:
+            keys = {normalize_search_text(zone.replace('_', ' '))}
+            keys.update(normalize_search_text(part.replace('_', ' ')) for part in zone.split('/'))
+            try:
+                abbreviation = pytz.timezone(zone).tzname(now, is_dst=False)
+                # Las zonas sin abreviatura propia devuelven offsets como "+03"
+                if abbreviation and abbreviation.isalpha():
+                    keys.add(abbreviation.lower())
+            except Exception:
+                pass
+            for key in keys:
+                aliases.setdefault(key, set()).add(zone)
+        for alias, zone in self.COMMON_ALIASES.items():
+            aliases.setdefault(alias, set()).add(zone)
+
+        # Dentro de cada clave, primero las zonas comunes y después el resto
+        self._aliases = {
+            key: sorted(zones, key=lambda z: (z not in self._common, z))
+            for key, zones in aliases.items()
+        }
+        self._keys = sorted(self._aliases)
+
+    def resolve(self, text):
+        """Devuelve el nombre IANA para un nombre exacto o un alias inequívoco"""
+        if text in self.zones:
+            return text
+        zones = self._aliases.get(normalize_search_text(text.replace('_', ' ')), [])
+        if len(zones) == 1 or (zones and text.lower() in self.COMMON_ALIASES):
+            return zones[0]
+        return None
+
+    def search(self, query, limit=MAX_RESULTS):
+        query = normalize_search_text((query or '').replace('_', ' '))
+        if not query:
+            return self.DEFAULT_SUGGESTIONS[:limit]
+
+        results = []
+        seen = set()
+
+        def collect(key):
+            for zone in self._aliases[key]:
+                if zone not in seen and len(results) < limit:
+                    seen.add(zone)
+                    results.append(zone)
+
+        # Coincidencias por prefijo
+        pos = bisect.bisect_left(self._keys, query)
+        while pos < len(self._keys) and len(results) < limit and self._keys[pos].startswith(query):
+            collect(self._keys[pos])
+            pos += 1
+
+        # Coincidencias aproximadas (errores tipográficos)
+        if len(results) < limit and len(query) >= 3:
+            for key in difflib.get_close_matches(query, self._keys, n=limit, cutoff=0.75):
+                collect(key)
+
+        return results
+
+    @staticmethod
+    def describe(zone):
+        """Etiqueta legible con la abreviatura y el desfase UTC actuales"""
+        local_now = clock.now(pytz.timezone(zone))
+        offset = local_now.strftime('%z')
+        return f"{zone} ({local_now.tzname()}, UTC{offset[:3]}:{offset[3:]})"
+
+timezone_index = TimezoneIndex()
+
+# ===================================================================
+# FUNCIONES AUXILIARES Y UTILIDADES
+# ===================================================================
+class GuildLocales:
+    """Caché del idioma de cada servidor.
+
+    Evita consultar la configuración en cada texto: el catálogo se resuelve
+    una vez por servidor y se invalida al guardar la configuración.
+    """
+    def __init__(self):
+        self._langs = {}
+
+    def get(self, guild_id):
+        guild_id = int(guild_id)
+        lang = self._langs.get(guild_id)
+        if lang is None:
+            lang = SessionManager.load_config(guild_id).get('lang') or DEFAULT_LANG
+            self._langs[guild_id] = lang
+        return load_catalog(lang)
+
+    def invalidate(self, guild_id):
+        self._langs.pop(int(guild_id), None)
+
+guild_locales = GuildLocales()
+
+# Funciones auxiliares
+def get_text(key, guild_id, *args):
+   return guild_locales.get(guild_id)(key, *args)
+
+def catalog_str(key):
+   """Texto de un comando (p. ej. una opción) que Discord muestra en el idioma del usuario.
+
+   El texto por defecto es el del idioma por defecto; CatalogTranslator
+   resuelve las demás traducciones con la misma clave del catálogo.
+   """
+   return app_commands.locale_str(load_catalog(DEFAULT_LANG)(key), key=key)
+
+class CatalogTranslator(app_commands.Translator):
+    """Traduce los textos de comandos creados con catalog_str al sincronizar"""
+
+    async def translate(self, string, locale, context):
+        key = string.extras.get('key')
+        lang = str(locale.value).split('-')[0]
+        if key is None or lang not in LANGUAGES:
+            return None
+        return load_catalog(lang)(key)
+
+def calculate_time_difference(session_time, guild_timezone):
+   try:
        tz = pytz.timezone(guild_timezone)
-       current_time = datetime.now(tz)
+       current_time = clock.now(tz)
        session_time = tz.localize(session_time)
        
        time_diff = (session_time - current_time).total_seconds() / 60
@@ -795,7 +2500,7 @@ def calculate_time_difference(session_time, guild_timezone):
    except pytz.exceptions.UnknownTimeZoneError as e:
        logger.error(f"Error de zona horaria: {str(e)}")
        tz = pytz.timezone(DEFAULT_TIMEZONE)
-       current_time = datetime.now(tz)
+       current_time = clock.now(tz)
        session_time = tz.localize(session_time)
        return (session_time - current_time).total_seconds() / 60
 
@@ -821,54 +2526,220 @@ def convert_db_to_session(db_result):
        },
        "session_id": db_result[0],
        "message_id": db_result[11],
-       "duration": duration
+       "duration": duration,
+       "recurrence_id": db_result[14] if len(db_result) > 14 else None,
+       "end_notification_sent": bool(db_result[13]) if len(db_result) > 13 else False,
+       "unroutable": bool(db_result[15]) if len(db_result) > 15 else False,
+       "reminder_stages": db_result[16] if len(db_result) > 16 else None,
+       "version": db_result[17] if len(db_result) > 17 else 0
    }
-def format_time_remaining(minutes):
+
+# Campo del dict de sesión -> columna de la tabla sessions
+SESSION_FIELD_COLUMNS = {
+   "name": "name",
+   "datetime": "datetime",
+   "group": "group_id",
+   "channel": "channel_id",
+   "creator_id": "creator_id",
+   "guild_id": "guild_id",
+   "created_at": "created_at",
+   "notified": "notified",
+   "message_id": "message_id",
+   "duration": "duration",
+   "end_notification_sent": "end_notification_sent",
+   "recurrence_id": "recurrence_id",
+   "unroutable": "unroutable",
+   "reminder_stages": "reminder_stages",
+}
+
+def convert_session_to_db(session):
+   """Inverso de convert_db_to_session: {columna: valor} de los campos presentes en `session`"""
+   columns = {}
+   for key, value in session.items():
+       column = SESSION_FIELD_COLUMNS.get(key)
+       if column is None:
+           continue
+       if key in ("guild_id", "creator_id"):
+           value = str(value)
+       elif key in ("notified", "end_notification_sent", "unroutable"):
+           value = 1 if value else 0
+       columns[column] = value
+   if "status" in session:
+       columns["ready_users"] = ','.join(map(str, session['status']['ready']))
+       columns["not_ready_users"] = ','.join(map(str, session['status']['not_ready']))
+   return columns
+def validate_session_name(name_text):
+   """Normaliza el nombre de una sesión nueva a una sola línea.
+
+   Lanza ValueError con la clave de traducción del error si queda vacío. Lo
+   usan el formulario de creación y la importación masiva.
+   """
+   name = ' '.join((name_text or '').splitlines()).strip()
+   if not name:
+       raise ValueError('new_session_name_error')
+   return name
+
+def validate_session_input(datetime_text, duration_text, guild_timezone):
+   """Valida fecha y duración de una sesión nueva.
+
+   Devuelve (datetime, duración en minutos) o lanza ValueError cuyo mensaje es
+   la clave de traducción del error. Lo usan el formulario de creación y la
+   importación masiva para aplicar exactamente las mismas reglas.
+   """
+   try:
+       session_datetime = datetime.strptime(datetime_text.strip(), "%d-%m-%Y %H:%M")
+   except ValueError:
+       raise ValueError('new_session_datetime_error')
+   
+   try:
+       duration = int(duration_text)
+   except (TypeError, ValueError):
+       raise ValueError('prevtime_error')
+   if duration <= 0:
+       raise ValueError('prevtime_error')
+   
+   # Verificar si es futura
+   if calculate_time_difference(session_datetime, guild_timezone) <= 0:
+       raise ValueError('new_session_datetime_error')
+   
+   return session_datetime, duration
+
+def format_time_remaining(minutes, locale=None):
    """Formatea el tiempo restante en un formato legible"""
+   locale = locale or load_catalog(DEFAULT_LANG)
    if minutes < 0:
-       return "Finalizada"
+       return locale('time_ended')
    elif minutes < 60:
-       return f"{int(minutes)} minutos"
+       return locale('minutes', int(minutes))
    else:
        hours = int(minutes // 60)
        mins = int(minutes % 60)
        return f"{hours}h {mins}m"
 
-def format_duration(minutes):
+def format_duration(minutes, locale=None):
    """Formatea la duración en minutos a un formato legible (horas y minutos)"""
+   locale = locale or load_catalog(DEFAULT_LANG)
    if minutes < 60:
-       return f"{minutes} minutos"
+       return locale('minutes', minutes)
    else:
        hours = minutes // 60
        mins = minutes % 60
        if mins == 0:
-           return f"{hours} hora{'s' if hours > 1 else ''}"
+           return locale('hours_many' if hours > 1 else 'hours_one', hours)
        else:
            return f"{hours}h {mins}m"
 
-def create_session_embed(session, guild, time_diff):
-   """Crea un embed mejorado para la sesión"""
+class RosterRenderer:
+    """Menciones de los campos de asistencia, con tamaño acotado.
+
+    Un campo de embed admite 1024 caracteres: con unas 50 menciones la edición
+    del mensaje fallaría. Se muestran como mucho MAX_MENTIONS (las primeras en
+    apuntarse) y un "… y N más"; la lista completa se consulta paginada con el
+    botón del mensaje. El texto se guarda por sesión, estado e idioma junto a
+    la versión de la sesión, así que los refrescos sin cambios de asistencia
+    no lo vuelven a construir.
+    """
+    FIELD_LIMIT = 1024
+    MAX_MENTIONS = 36
+    PAGE_SIZE = 36
+    MAX_ENTRIES = 2048
+
+    def __init__(self):
+        self.cache = OrderedDict()  # (session_id, estado, idioma) -> (versión, texto)
+
+    def render(self, session, status, locale):
+        key = (session.get('session_id'), status, getattr(locale, 'lang', None))
+        version = session.get('version')
+        cached = self.cache.get(key)
+        if cached and cached[0] == version:
+            self.cache.move_to_end(key)
+            return cached[1]
+        text = RosterRenderer.mentions(session['status'][status], locale)
+        if key[0] is not None and version is not None:
+            self.cache[key] = (version, text)
+            if len(self.cache) > self.MAX_ENTRIES:
+                self.cache.popitem(last=False)
+        return text
+
+    @staticmethod
+    def mentions(user_ids, locale):
+        """Menciones separadas por comas que caben en un campo, con el resto contado"""
+        if not user_ids:
+            return locale('active_sessions_none')
+        budget = RosterRenderer.FIELD_LIMIT - len(locale('roster_more', len(user_ids))) - 1
+        shown = []
+        length = 0
+        for user_id in user_ids[:RosterRenderer.MAX_MENTIONS]:
+            mention = f"<@{user_id}>"
+            if length + len(mention) + 2 > budget:
+                break
+            shown.append(mention)
+            length += len(mention) + 2
+        text = ', '.join(shown)
+        hidden = len(user_ids) - len(shown)
+        if hidden:
+            text += ' ' + locale('roster_more', hidden)
+        return text
+
+    @staticmethod
+    def page_count(session):
+        longest = max(len(session['status']['ready']), len(session['status']['not_ready']))
+        return max(1, -(-longest // RosterRenderer.PAGE_SIZE))
+
+roster_renderer = RosterRenderer()
+
+def create_roster_embed(session, page, locale):
+   """Página `page` de la lista completa de asistencia de una sesión"""
+   start = page * RosterRenderer.PAGE_SIZE
+   end = start + RosterRenderer.PAGE_SIZE
+   embed = discord.Embed(title=locale('roster_title', session['name']), color=discord.Color.blue())
+   for status, emoji, key in (('ready', '✅', 'session_ready'), ('not_ready', '❌', 'session_not_ready')):
+       user_ids = session['status'][status]
+       value = RosterRenderer.mentions(user_ids[start:end], locale) if user_ids[start:end] else locale('active_sessions_none')
+       embed.add_field(name=f"{emoji} {locale(key)} {len(user_ids)}", value=value, inline=False)
+   embed.set_footer(text=locale('roster_page', page + 1, RosterRenderer.page_count(session)))
+   return embed
+
+def describe_overlaps(guild_id, session_datetime, duration, group_id, channel_id, exclude=None):
+   """Texto de aviso con las sesiones que se solapan (vacío si no hay ninguna)"""
+   overlaps = session_intervals.overlaps(guild_id, session_datetime, duration, group_id, channel_id, exclude)
+   if not overlaps:
+       return ""
+   locale = guild_locales.get(guild_id)
+   lines = []
+   for session_id, kinds in overlaps[:5]:
+       row = SessionManager.get_session(session_id)
+       if row:
+           lane = ', '.join(locale('conflict_group' if kind == 'group' else 'conflict_channel') for kind in kinds)
+           lines.append(f"• **{row[2]}** ({row[3]}, {format_duration(row[12] or 120, locale)}) — {lane}")
+   if len(overlaps) > 5:
+       lines.append(f"• … +{len(overlaps) - 5}")
+   return f"\n\n{locale('conflict_warning')}\n" + "\n".join(lines)
+
+def create_session_embed(session, guild, time_diff, locale=None):
+   """Crea un embed mejorado para la sesión (con el catálogo del servidor si no se pasa)"""
+   locale = locale or guild_locales.get(session['guild_id'])
    role = guild.get_role(int(session['group']))
-   role_name = role.name if role else session['group']
+   role_name = role.name if role else locale('session_group_missing')
    
    # Obtener la duración de la sesión (por defecto 120 minutos)
    duration = session.get('duration', 120)
    
    # Determinar color y estado según el tiempo
    if time_diff <= 0 and time_diff > -duration:
-       status_message = f"{get_text('session_in_progress', session['guild_id'])}"
+       status_message = locale('session_in_progress')
        color = discord.Color.green()
        status_emoji = "🔴 "
    elif time_diff <= -duration:
-       status_message = f"{get_text('session_ended', session['guild_id'])}"
+       status_message = locale('session_ended')
        color = discord.Color.red()
        status_emoji = "⚫ "
    elif time_diff <= 15:
-       status_message = f"{get_text('session_alert_in_minutes', session['guild_id'], int(time_diff))}"
+       status_message = locale('session_alert_in_minutes', int(time_diff))
        color = discord.Color.orange()
        status_emoji = "🟠 "
    else:
-       status_message = f"{get_text('session_alert_in_minutes', session['guild_id'], int(time_diff))}"
+       status_message = locale('session_alert_in_minutes', int(time_diff))
        color = discord.Color.gold()
        status_emoji = "🟡 "
    # Crear barra de progreso
@@ -885,62 +2756,88 @@ def create_session_embed(session, guild, time_diff):
    
    # Detalles de la sesión
    embed.add_field(
-       name="📅 Fecha y Hora",
+       name=locale('embed_datetime'),
        value=session['datetime'],
        inline=True
    )
    
    embed.add_field(
-       name="⏰ Tiempo restante",
-       value=format_time_remaining(time_diff),
+       name=locale('embed_time_left'),
+       value=format_time_remaining(time_diff, locale),
        inline=True
    )
    
    # Añadir información de duración
    embed.add_field(
-       name="⏱️ Duración",
-       value=format_duration(duration),
+       name=locale('embed_duration'),
+       value=format_duration(duration, locale),
        inline=True
    )
    
    embed.add_field(
-       name="👥 Grupo",
+       name=locale('embed_group'),
        value=role_name,
        inline=False
    )
    
-   # Participantes
-   ready_users = ', '.join([f'<@{user_id}>' for user_id in session['status']['ready']]) if session['status']['ready'] else get_text('active_sessions_none', session['guild_id'])
-   not_ready_users = ', '.join([f'<@{user_id}>' for user_id in session['status']['not_ready']]) if session['status']['not_ready'] else get_text('active_sessions_none', session['guild_id'])
-   
+   # Participantes: recuento y menciones recortadas al límite del campo (lista completa con el botón)
    embed.add_field(
-       name=f"✅ {get_text('session_ready', session['guild_id'])}",
-       value=ready_users,
+       name=f"✅ {locale('session_ready')} {len(session['status']['ready'])}",
+       value=roster_renderer.render(session, 'ready', locale),
        inline=False
    )
    
    embed.add_field(
-       name=f"❌ {get_text('session_not_ready', session['guild_id'])}",
-       value=not_ready_users,
+       name=f"❌ {locale('session_not_ready')} {len(session['status']['not_ready'])}",
+       value=roster_renderer.render(session, 'not_ready', locale),
        inline=False
    )
    # Metadata en footer (solo nombre del creador)
    try:
        creator = guild.get_member(session['creator_id'])
-       creator_name = creator.display_name if creator else "Usuario desconocido"
+       creator_name = creator.display_name if creator else locale('unknown_user')
        creator_avatar = creator.display_avatar.url if creator else None
        
        embed.set_footer(
-           text=f"Creada por {creator_name}",
+           text=locale('embed_created_by', creator_name),
            icon_url=creator_avatar
        )
    except:
        embed.set_footer(
-           text="Creada por Usuario desconocido"
+           text=locale('embed_created_by', locale('unknown_user'))
        )
    
    return embed
 
+def session_status_key(time_diff, duration):
+   """Clave de texto del estado de una sesión (programada, inminente, en curso o finalizada)"""
+   if time_diff <= 0 and time_diff > -duration:
+       return 'status_in_progress'
+   elif time_diff <= -duration:
+       return 'status_ended'
+   elif time_diff <= 15:
+       return 'status_imminent'
+   return 'status_scheduled'
+
+def create_digest_embed(sessions, guild, locale=None):
+   """Embed compacto de un mensaje resumen: un campo por sesión"""
+   locale = locale or guild_locales.get(guild.id)
+   timezone = SessionManager.load_config(guild.id)['timezone']
+   embed = discord.Embed(title=locale('digest_title'), color=discord.Color.gold())
+   for session in sessions:
+       time_diff = calculate_time_difference(datetime.strptime(session['datetime'], "%d-%m-%Y %H:%M"), timezone)
+       duration = session.get('duration') or 120
+       role = guild.get_role(int(session['group']))
+       embed.add_field(
+           name=f"{locale(session_status_key(time_diff, duration))} | {session['name']}",
+           value=f"📅 {session['datetime']} · ⏰ {format_time_remaining(time_diff, locale)} · "
+                 f"⏱️ {format_duration(duration, locale)}\n"
+                 f"👥 {role.mention if role else locale('session_group_missing')} · "
+                 f"✅ {len(session['status']['ready'])} · ❌ {len(session['status']['not_ready'])}",
+           inline=False
+       )
+   return embed
+
 def create_progress_bar(minutes_left, total_minutes=60):
    """Crea una barra de progreso visual"""
    if minutes_left <= 0:
@@ -956,52 +2853,29 @@ def create_progress_bar(minutes_left, total_minutes=60):
 # ===================================================================
 # FUNCIONES DE MANEJO DE SESIONES
 # ===================================================================
-async def handle_availability(interaction, session_id, status):
+async def handle_availability(interaction, session_id, status, digest=None):
    try:
-       # Cargar información de la sesión
-       conn = sqlite3.connect(DB_FILE)
-       c = conn.cursor()
-       c.execute('SELECT * FROM sessions WHERE session_id = ?', (session_id,))
-       result = c.fetchone()
-       conn.close()
+       user_id = interaction.user.id
+       trace_recorder.record('availability', session_id=session_id, guild_id=interaction.guild.id,
+                             user_id=user_id, status=status)
+       other = "not_ready" if status == "ready" else "ready"
        
-       if not result:
-           await interaction.response.send_message(get_text('active_sessions_none', interaction.guild.id), ephemeral=True)
-           return
+       def apply(session):
+           if user_id in session['status'][status]:
+               return None
+           if user_id in session['status'][other]:
+               session['status'][other].remove(user_id)
+           session['status'][status].append(user_id)
+           return {'status': session['status']}
        
-       session = convert_db_to_session(result)
-       user_id = interaction.user.id
-       updated = False
+       # Lectura y UPDATE con la versión leída; si otro clic se adelanta, se reintenta
+       session, updated = SessionManager.update_session(session_id, apply)
        
-       if status == "ready":
-           if user_id in session['status']['not_ready']:
-               session['status']['not_ready'].remove(user_id)
-           if user_id not in session['status']['ready']:
-               session['status']['ready'].append(user_id)
-               updated = True
-       elif status == "not_ready":
-           if user_id in session['status']['ready']:
-               session['status']['ready'].remove(user_id)
-           if user_id not in session['status']['not_ready']:
-               session['status']['not_ready'].append(user_id)
-               updated = True
+       if not session:
+           await interaction.response.send_message(get_text('active_sessions_none', interaction.guild.id), ephemeral=True)
+           return
        
        if updated:
-           # Actualizar la base de datos
-           conn = sqlite3.connect(DB_FILE)
-           c = conn.cursor()
-           c.execute('''
-               UPDATE sessions 
-               SET ready_users = ?, not_ready_users = ? 
-               WHERE session_id = ?
-           ''', (
-               ','.join(map(str, session['status']['ready'])),
-               ','.join(map(str, session['status']['not_ready'])),
-               session_id
-           ))
-           conn.commit()
-           conn.close()
-           
            # Actualizar el embed
            server_config = SessionManager.load_config(session['guild_id'])
            time_diff = calculate_time_difference(
@@ -1009,12 +2883,27 @@ async def handle_availability(interaction, session_id, status):
                server_config['timezone']
            )
            
-           embed = create_session_embed(session, interaction.guild, time_diff)
+           AttendanceStats.record_change(session, user_id, status, time_diff)
+           
+           locale = guild_locales.get(interaction.guild.id)
+           version = SessionJournal.current_version(session_id)
+           if digest:
+               # Mensaje resumen: se repinta con el estado actual de todas sus sesiones
+               members = [session if member_id == session_id else SessionManager.get_session(member_id)
+                          for member_id in digest]
+               members = [member if isinstance(member, dict) else convert_db_to_session(member)
+                          for member in members if member]
+               embed = create_digest_embed(members, interaction.guild, locale)
+           else:
+               embed = create_session_embed(session, interaction.guild, time_diff, locale)
            await interaction.response.edit_message(embed=embed)
+           if session.get('message_id'):
+               SessionJournal.record_render(session, session['message_id'], version)
            
            # Mensaje de confirmación
-           status_text = "disponible" if status == "ready" else "no disponible"
-           await interaction.followup.send(f"Has marcado que estás {status_text} para esta sesión.", ephemeral=True)
+           await interaction.followup.send(
+               locale('availability_ready' if status == "ready" else 'availability_not_ready'), ephemeral=True
+           )
        else:
            # Ya tenía ese estado
            await interaction.response.defer()
@@ -1023,28 +2912,42 @@ async def handle_availability(interaction, session_id, status):
        logger.error(f"Error en handle_availability: {str(e)}")
        await interaction.response.send_message(get_text('error_title', interaction.guild.id), ephemeral=True)
 
-async def show_delete_confirmation(interaction, session):
+async def show_full_roster(interaction, session_id):
+   """Envía en un mensaje efímero la lista completa de asistencia, paginada"""
+   try:
+       row = SessionManager.get_session(session_id)
+       if not row:
+           await interaction.response.send_message(get_text('active_sessions_none', interaction.guild.id), ephemeral=True)
+           return
+       session = convert_db_to_session(row)
+       locale = guild_locales.get(interaction.guild.id)
+       view = RosterView(session, locale)
+       await interaction.response.send_message(embed=create_roster_embed(session, 0, locale), view=view, ephemeral=True)
+   except Exception as e:
+       logger.error(f"Error en show_full_roster: {str(e)}")
+       await interaction.response.send_message(get_text('error_title', interaction.guild.id), ephemeral=True)
+
+async def show_delete_confirmation(interaction, session, edit=True):
    session_id = session[0]  # session_id está en la primera posición
+   locale = guild_locales.get(interaction.guild.id)
    
    embed = discord.Embed(
-       title="🗑️ Confirmar Eliminación",
-       description=f"¿Estás seguro de que quieres eliminar la sesión **{session[2]}**?\n\n"
-                  f"Esta acción no se puede deshacer.",
+       title=locale('delete_confirm_title'),
+       description=locale('delete_confirm_desc', session[2]),
        color=discord.Color.red()
    )
    
-   view = ConfirmView(session_id, "delete")
-   await interaction.response.edit_message(embed=embed, view=view)
+   view = ConfirmView(session_id, "delete", locale=locale)
+   if edit:
+       await interaction.response.edit_message(embed=embed, view=view)
+   else:
+       await interaction.response.send_message(embed=embed, view=view)
 
 async def delete_session_confirmed(interaction, session_id):
    try:
        # Obtener mensaje_id antes de eliminar
-       conn = sqlite3.connect(DB_FILE)
-       c = conn.cursor()
-       c.execute('SELECT message_id, channel_id FROM sessions WHERE session_id = ?', (session_id,))
-       result = c.fetchone()
-       
-       message_id, channel_id = result if result else (None, None)
+       result = SessionManager.get_session(session_id)
+       message_id, channel_id = (result[11], result[5]) if result else (None, None)
        
        # Eliminar la sesión
        if SessionManager.delete_session(session_id):
@@ -1077,150 +2980,989 @@ async def delete_session_confirmed(interaction, session_id):
        logger.error(f"Error en delete_session_confirmed: {str(e)}")
        await interaction.response.send_message(get_text('error_title', interaction.guild.id), ephemeral=True)
 
-async def show_edit_options(interaction, session):
-   embed = discord.Embed(
-       title="✏️ Editar Sesión",
-       description=f"**Sesión:** {session[2]}\n"
-                  f"**Fecha:** {session[3]}\n\n"
-                  "Selecciona qué quieres editar:",
-       color=discord.Color.blue()
-   )
-   
-   view = EditOptionsView(session)
-   await interaction.response.edit_message(embed=embed, view=view)
+async def show_edit_options(interaction, session, edit=True):
+   locale = guild_locales.get(interaction.guild.id)
+   embed = discord.Embed(
+       title=locale('edit_title'),
+       description=locale('edit_desc', session[2], session[3]),
+       color=discord.Color.blue()
+   )
+   
+   view = EditOptionsView(session, locale=locale)
+   if edit:
+       await interaction.response.edit_message(embed=embed, view=view)
+   else:
+       await interaction.response.send_message(embed=embed, view=view)
+
+async def update_session_message(session_data, grouped=False):
+    """Actualiza el mensaje de una sesión existente (o el resumen del que forma parte).
+
+    Si el mensaje es un resumen compartido con otras sesiones, se repinta el
+    resumen entero. manage_sessions ya agrupa las sesiones por mensaje y pasa
+    grouped=True para ahorrarse la búsqueda.
+
+    Devuelve True si el mensaje quedó al día o ya no existe (en ese caso se
+    cierra igualmente la sesión si ha finalizado); False si hay que reintentarlo.
+    """
+    if session_data.get('digest'):
+        return await update_digest_message(session_data['digest'])
+    try:
+        message_id = session_data.get('message_id')
+        if not message_id:
+            return False
+        if not grouped:
+            members = SessionManager.message_sessions(session_data['guild_id'], message_id)
+            if len(members) > 1:
+                return await update_digest_message(members)
+        
+        guild = bot.get_guild(int(session_data['guild_id']))
+        if not guild:
+            return False
+            
+        channel = guild.get_channel(int(session_data['channel']))
+        if not channel or not channel_permissions.allowed(channel):
+            return False
+            
+        server_config = SessionManager.load_config(session_data['guild_id'])
+        time_diff = calculate_time_difference(
+            datetime.strptime(session_data['datetime'], "%d-%m-%Y %H:%M"),
+            server_config['timezone']
+        )
+        try:
+            message = await channel.fetch_message(int(message_id))
+            if not message:
+                return False
+            
+            locale = guild_locales.get(guild.id)
+            version = SessionJournal.current_version(session_data['session_id'])
+            embed = create_session_embed(session_data, guild, time_diff, locale)
+            view = ReadyView(session_data['session_id'], locale=locale)
+            
+            await message.edit(embed=embed, view=view)
+            SessionJournal.record_render(session_data, message_id, version)
+            handle_session_end(session_data, guild, time_diff)
+            return True
+            
+        except discord.NotFound:
+            logger.error(f"Mensaje no encontrado para sesión {session_data['name']}")
+            handle_session_end(session_data, guild, time_diff)
+            return True
+        except Exception as e:
+            logger.error(f"Error actualizando mensaje: {str(e)}")
+    
+    except Exception as e:
+        logger.error(f"Error en update_session_message: {str(e)}")
+    return False
+
+def handle_session_end(session_data, guild, time_diff):
+    """Si la sesión ha finalizado (ha pasado la duración completa), cierra su
+    asistencia y encola el mensaje de fin para el creador. La bandeja de salida
+    garantiza un único envío aunque el ciclo se retrase o el bot se reinicie.
+    Las sesiones recurrentes ya tienen programada la siguiente ocurrencia.
+    """
+    duration = session_data.get('duration', 120)
+    if time_diff <= -duration:
+        AttendanceStats.finalize(session_data, guild)
+    if (time_diff <= -duration and not session_data.get('end_notification_sent')
+            and not session_data.get('recurrence_id')):
+        NotificationOutbox.enqueue('end_prompt', session_data)
+
+async def update_digest_message(sessions):
+    """Actualiza un mensaje resumen con el estado de todas sus sesiones.
+
+    Devuelve True o False como update_session_message.
+    """
+    first = sessions[0]
+    try:
+        guild = bot.get_guild(int(first['guild_id']))
+        channel = guild.get_channel(int(first['channel'])) if guild else None
+        if not channel or not channel_permissions.allowed(channel):
+            return False
+        timezone = SessionManager.load_config(guild.id)['timezone']
+        try:
+            message = await channel.fetch_message(int(first['message_id']))
+            
+            locale = guild_locales.get(guild.id)
+            versions = {session['session_id']: SessionJournal.current_version(session['session_id'])
+                        for session in sessions}
+            await message.edit(embed=create_digest_embed(sessions, guild, locale), view=DigestView(sessions, locale))
+            for session in sessions:
+                SessionJournal.record_render(session, first['message_id'], versions[session['session_id']])
+        except discord.NotFound:
+            logger.error(f"Mensaje resumen no encontrado ({len(sessions)} sesiones)")
+        
+        for session in sessions:
+            time_diff = calculate_time_difference(datetime.strptime(session['datetime'], "%d-%m-%Y %H:%M"), timezone)
+            handle_session_end(session, guild, time_diff)
+        return True
+    except Exception as e:
+        logger.error(f"Error actualizando mensaje resumen: {str(e)}")
+        return False
+
+async def send_stage_reminder(session, guild, channel, time_diff, nonce=None):
+    """Recordatorio de una etapa posterior: menciona al grupo respondiendo al mensaje de la sesión"""
+    try:
+        role = guild.get_role(int(session['group']))
+        if not role:
+            return True
+        content = get_text('session_mention', guild.id, role.mention, session['name'], int(time_diff))
+        if session.get('message_id'):
+            await channel.get_partial_message(int(session['message_id'])).reply(content, nonce=nonce)
+        else:
+            await channel.send(content, nonce=nonce)
+        return True
+    except Exception as e:
+        logger.error(f"Error enviando recordatorio de sesión: {str(e)}")
+        return False
+
+async def send_end_prompt(session_data, guild, channel, nonce=None):
+    """Responde al mensaje de la sesión preguntando al creador si quiere programar otra"""
+    try:
+        creator = guild.get_member(session_data['creator_id'])
+        if not creator or not session_data.get('message_id'):
+            # Nada que enviar: el creador ya no está o no hay mensaje al que responder
+            return True
+        
+        # Crear embed informativo
+        locale = guild_locales.get(guild.id)
+        end_embed = discord.Embed(
+            title=locale('end_title'),
+            description=locale('end_desc', session_data['name']),
+            color=discord.Color.blue()
+        )
+        
+        # Creamos vista con botones que solo el creador podrá utilizar
+        end_view = NewSessionAfterEndView(session_data, locale=locale)
+        
+        # Enviar mensaje como respuesta al último mensaje de la sesión
+        last_message = channel.get_partial_message(int(session_data['message_id']))
+        await last_message.reply(
+            content=f"{creator.mention}",
+            embed=end_embed,
+            view=end_view,
+            allowed_mentions=discord.AllowedMentions(users=[creator]),
+            nonce=nonce
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Error enviando notificación de fin de sesión: {str(e)}")
+        return False
+
+# Función para notificaciones
+async def send_session_notification(session, guild, channel, time_diff, nonce=None):
+   try:
+       role = guild.get_role(int(session['group']))
+       locale = guild_locales.get(guild.id)
+       
+       # Mención al rol solo si la sesión aún no ha comenzado. Va en el mismo mensaje
+       # que el embed: un aviso es una sola petición, así un reintento de la bandeja
+       # de salida no puede repetir la mención aunque haya caducado el nonce
+       content = None
+       if time_diff > 0 and role:
+           content = locale('session_mention', role.mention, session['name'], int(time_diff))
+       
+       embed = create_session_embed(session, guild, time_diff, locale)
+       view = ReadyView(session.get('session_id'), timeout=None, locale=locale)
+       message = await channel.send(content=content, embed=embed, view=view, nonce=nonce)
+       
+       session['notified'] = True
+       session['message_id'] = str(message.id)
+       SessionManager.save_session({'session_id': session.get('session_id'), 'notified': True}, str(message.id),
+                                   trace=False)
+       # notified y message_id no cambian la versión del diario: lo pintado sigue al día
+       SessionJournal.record_render(session, message.id, SessionJournal.current_version(session.get('session_id')))
+       
+       return message
+
+   except Exception as e:
+       logger.error(f"Error en send_session_notification: {str(e)}")
+       return None
+
+# Sesiones como máximo en un mensaje resumen (una fila de botones por sesión)
+DIGEST_MAX_SESSIONS = 5
+
+async def send_digest_notification(sessions, guild, channel, nonce=None):
+   """Publica varios avisos del mismo canal en un solo mensaje: una mención
+   conjunta a los grupos, un embed compacto y una fila de botones por sesión"""
+   try:
+       locale = guild_locales.get(guild.id)
+       timezone = SessionManager.load_config(guild.id)['timezone']
+       
+       mentions = []
+       for session in sessions:
+           role = guild.get_role(int(session['group']))
+           time_diff = calculate_time_difference(datetime.strptime(session['datetime'], "%d-%m-%Y %H:%M"), timezone)
+           if role and time_diff > 0 and role.mention not in mentions:
+               mentions.append(role.mention)
+       content = locale('digest_mention', ' '.join(mentions), len(sessions)) if mentions else None
+       
+       embed = create_digest_embed(sessions, guild, locale)
+       view = DigestView(sessions, locale)
+       message = await channel.send(content=content, embed=embed, view=view, nonce=nonce)
+       
+       for session in sessions:
+           session['notified'] = True
+           session['message_id'] = str(message.id)
+           SessionManager.save_session({'session_id': session['session_id'], 'notified': True}, str(message.id),
+                                       trace=False)
+           SessionJournal.record_render(session, message.id, SessionJournal.current_version(session['session_id']))
+       
+       return message
+
+   except Exception as e:
+       logger.error(f"Error en send_digest_notification: {str(e)}")
+       return None
+
+# ===================================================================
+# RECORDATORIOS POR MENSAJE PRIVADO
+# ===================================================================
+class DMDispatcher:
+    """Cola de envío de mensajes privados con concurrencia limitada y ritmo fijo.
+
+    Varios workers comparten un limitador de ritmo (RATE_PER_SECOND peticiones
+    por segundo, dejando margen bajo el límite global de 50 de Discord), de modo
+    que los recordatorios de un rol de cientos de miembros se reparten en unos
+    segundos sin provocar 429. Los canales privados se cachean por usuario para
+    no llamar a create_dm en cada envío, y los usuarios con los MD cerrados se
+    omiten durante CLOSED_DM_TTL.
+    """
+    CONCURRENCY = 5
+    RATE_PER_SECOND = 40
+    CHANNEL_CACHE_SIZE = 10000
+    CLOSED_DM_TTL = timedelta(hours=24)
+
+    def __init__(self):
+        self.bot = None
+        self.queue = None
+        self.workers = []
+        self.dm_channels = OrderedDict()  # user_id -> id del canal privado (LRU)
+        self.closed = {}                  # user_id -> momento en que falló por MD cerrados
+        self._next_slot = 0.0
+
+    def start(self, bot_instance):
+        if self.workers:
+            return
+        self.bot = bot_instance
+        self.queue = asyncio.Queue()
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.CONCURRENCY)]
+
+    def enqueue(self, user_id, content):
+        if self.queue is None:
+            return False
+        closed_at = self.closed.get(user_id)
+        if closed_at and clock.now() - closed_at < self.CLOSED_DM_TTL:
+            return False
+        self.queue.put_nowait((user_id, content))
+        return True
+
+    async def _wait_slot(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1 / self.RATE_PER_SECOND
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _dm_channel_id(self, user_id):
+        channel_id = self.dm_channels.get(user_id)
+        if channel_id is not None:
+            self.dm_channels.move_to_end(user_id)
+            return channel_id
+        user = self.bot.get_user(user_id)
+        dm_channel = user.dm_channel if user else None
+        if dm_channel is None:
+            await self._wait_slot()
+            user = user or await self.bot.fetch_user(user_id)
+            dm_channel = await user.create_dm()
+        self.dm_channels[user_id] = dm_channel.id
+        if len(self.dm_channels) > self.CHANNEL_CACHE_SIZE:
+            self.dm_channels.popitem(last=False)
+        return dm_channel.id
+
+    async def _send(self, user_id, content):
+        try:
+            channel_id = await self._dm_channel_id(user_id)
+            await self._wait_slot()
+            channel = self.bot.get_partial_messageable(channel_id, type=discord.ChannelType.private)
+            await channel.send(content)
+        except discord.Forbidden:
+            # MD cerrados o sin servidores en común
+            self.closed[user_id] = clock.now()
+        except discord.NotFound:
+            self.dm_channels.pop(user_id, None)
+
+    async def _worker(self):
+        while True:
+            user_id, content = await self.queue.get()
+            try:
+                await self._send(user_id, content)
+            except Exception as e:
+                logger.error(f"Error enviando recordatorio privado a {user_id}: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+dm_dispatcher = DMDispatcher()
+
+def parse_reminder_offsets(text):
+    """Convierte '1440,60,10' en [1440, 60, 10]; devuelve None si no es válido"""
+    try:
+        offsets = sorted({int(part) for part in (text or '').split(',') if part.strip()}, reverse=True)
+    except ValueError:
+        return None
+    if not offsets or any(offset <= 0 for offset in offsets):
+        return None
+    return offsets
+
+def send_dm_reminders(session, guild):
+    """Encola los recordatorios privados de una sesión (lo llama ReminderTriggers)"""
+    server_config = SessionManager.load_config(guild.id)
+    mode = server_config.get('dm_mode', 'off')
+    time_diff = calculate_time_difference(
+        datetime.strptime(session['datetime'], "%d-%m-%Y %H:%M"),
+        server_config['timezone']
+    )
+    if mode == 'off' or time_diff <= 0:
+        return
+
+    recipients = set(session['status']['ready'])
+    if mode == 'role':
+        role = guild.get_role(int(session['group']))
+        if role:
+            recipients.update(member.id for member in role.members if not member.bot)
+        recipients.difference_update(session['status']['not_ready'])
+    recipients.difference_update(store.dm_optouts(recipients))
+
+    link = ""
+    if session.get('message_id'):
+        link = f"\nhttps://discord.com/channels/{guild.id}/{session['channel']}/{session['message_id']}"
+    content = get_text('dm_reminder', guild.id, session['name'], guild.name, int(time_diff)) + link
+    for user_id in recipients:
+        dm_dispatcher.enqueue(user_id, content)
+
+# ===================================================================
+# PERMISOS DE CANAL
+# ===================================================================
+class ChannelPermissions:
+    """Caché de los permisos efectivos del bot en los canales de sesiones.
+
+    Si el bot pierde permisos en un canal, cada envío o edición falla con un
+    403 que se registra como error y gasta límite de peticiones, ciclo tras
+    ciclo. Antes de cualquier operación saliente se comprueba aquí el canal:
+    mientras le falte alguno de REQUIRED sus sesiones quedan en pausa (no se
+    refrescan y sus avisos se aplazan sin gastar reintentos). La caché se
+    invalida con los eventos de canales, roles y miembros que pueden cambiar
+    los permisos; al recuperarlos, las sesiones se reanudan solas.
+    """
+    REQUIRED = ('view_channel', 'send_messages', 'embed_links', 'read_message_history')
+
+    def __init__(self):
+        self.cache = {}     # channel_id -> (guild_id, permisos que faltan)
+        self.paused = {}    # channel_id -> guild_id de los canales en pausa
+
+    def missing(self, channel):
+        """Permisos de REQUIRED que le faltan al bot en el canal"""
+        cached = self.cache.get(channel.id)
+        if cached is not None:
+            return cached[1]
+        me = getattr(channel.guild, 'me', None)
+        if me is None or not hasattr(channel, 'permissions_for'):
+            # Sin datos del miembro del bot (caché aún vacía): no se bloquea
+            return ()
+        permissions = channel.permissions_for(me)
+        missing = tuple(name for name in self.REQUIRED if not getattr(permissions, name))
+        self.cache[channel.id] = (channel.guild.id, missing)
+        return missing
+
+    def allowed(self, channel):
+        """¿Puede el bot enviar y editar mensajes de sesión en el canal?"""
+        missing = self.missing(channel)
+        if missing and channel.id not in self.paused:
+            self.paused[channel.id] = channel.guild.id
+            logger.warning(f"Sin permisos en el canal {channel.id} del servidor {channel.guild.id} "
+                           f"({', '.join(missing)}): sus sesiones quedan en pausa")
+        elif not missing and channel.id in self.paused:
+            del self.paused[channel.id]
+            logger.info(f"Permisos recuperados en el canal {channel.id}: se reanudan sus sesiones")
+            NotificationOutbox.resume_guild(channel.guild.id)
+        return not missing
+
+    def invalidate_channel(self, channel_id):
+        self.cache.pop(channel_id, None)
+
+    def invalidate_guild(self, guild_id):
+        self.cache = {
+            channel_id: entry for channel_id, entry in self.cache.items() if entry[0] != guild_id
+        }
+
+    def forget_guild(self, guild_id):
+        self.invalidate_guild(guild_id)
+        self.paused = {
+            channel_id: paused_guild for channel_id, paused_guild in self.paused.items() if paused_guild != guild_id
+        }
+
+channel_permissions = ChannelPermissions()
+
+# ===================================================================
+# CADENCIA DE REFRESCO SEGÚN EL ESTADO
+# ===================================================================
+class RefreshPolicy:
+    """Cada cuánto se refresca el mensaje de una sesión según su estado.
+
+    Una sesión que empieza dentro de tres días no necesita editarse cada
+    minuto: las programadas se refrescan cada `refresh_scheduled` minutos,
+    las inminentes cada `refresh_imminent` (cuenta atrás), las que están en
+    curso cada `refresh_in_progress` y las finalizadas ya no se refrescan
+    (el cambio a finalizada sí se pinta y encola el mensaje de fin). Los
+    valores se configuran por servidor con /config refresh.
+    """
+    CONFIG_KEYS = {
+        'scheduled': 'refresh_scheduled',
+        'imminent': 'refresh_imminent',
+        'in_progress': 'refresh_in_progress',
+    }
+
+    @staticmethod
+    def state(session, timezone):
+        """Estado de la sesión: scheduled, imminent, in_progress o ended"""
+        time_diff = calculate_time_difference(datetime.strptime(session['datetime'], "%d-%m-%Y %H:%M"), timezone)
+        return session_status_key(time_diff, session.get('duration') or 120)[len('status_'):]
+
+    @staticmethod
+    def interval(state, config):
+        """Intervalo entre refrescos para un estado (None = no se refresca)"""
+        key = RefreshPolicy.CONFIG_KEYS.get(state)
+        if key is None:
+            return None
+        return timedelta(minutes=max(1, int(config.get(key) or SessionManager.CONFIG_DEFAULTS[key])))
+
+    @staticmethod
+    def annotate(unit, config):
+        """Anota en una sesión (o resumen) su estado, su cadencia y su versión
+        para que GuildScheduler decida si toca refrescarla"""
+        members = unit.get('digest') or [unit]
+        states = [RefreshPolicy.state(member, config['timezone']) for member in members]
+        intervals = [interval for interval in (RefreshPolicy.interval(state, config) for state in states) if interval]
+        unit['refresh_state'] = tuple(states)
+        unit['refresh_version'] = tuple(member.get('version') for member in members)
+        unit['refresh_every'] = min(intervals) if intervals else None
+        return unit
+
+# ===================================================================
+# REPARTO DEL PLANIFICADOR ENTRE SERVIDORES
+# ===================================================================
+class GuildScheduler:
+    """Reparto por turnos del trabajo de cada ciclo entre servidores.
+
+    Refrescar el mensaje de una sesión cuesta dos peticiones a Discord: sin
+    reparto, un servidor con cientos de sesiones activas agotaría el ciclo de
+    manage_sessions y el límite de peticiones compartido, retrasando los
+    avisos de los servidores pequeños. Cada ciclo refresca como mucho
+    TICK_BUDGET mensajes, repartidos por turnos entre servidores (uno de cada
+    servidor por vuelta) y con un máximo de LIVE_CAP_PER_GUILD por servidor.
+    Dentro de un servidor se refrescan primero los mensajes que llevan más
+    tiempo sin actualizarse, y cada uno solo despierta cuando le toca según
+    su estado (ver RefreshPolicy), cuando cambia de estado o cuando cambian
+    sus datos; lo que no cabe en un ciclo pasa al siguiente.
+
+    También acumula, por servidor, el tiempo que el bot dedica a refrescar
+    mensajes y a entregar notificaciones, y cada METRICS_LOG_INTERVAL deja en
+    el log los servidores que más tiempo consumen.
+    """
+    TICK_BUDGET = 120
+    LIVE_CAP_PER_GUILD = 20
+    REFRESH_SLACK = timedelta(seconds=10)   # Margen para el desfase entre ciclos
+    METRICS_LOG_INTERVAL = timedelta(hours=1)
+    METRICS_TOP = 10
+    MISSING_GUILD_GRACE = timedelta(hours=1)   # Ausencia tras la que un servidor se da por abandonado
+
+    def __init__(self):
+        self.last_refresh = {}      # session_id -> (momento, estado, versión) del último refresco
+        self.last_served = {}       # guild_id -> ciclo en que se atendió por última vez
+        self.seeded = False         # ¿Se tomaron ya los refrescos previos al arranque?
+        self.tick = 0
+        self.metrics = defaultdict(lambda: {'busy': 0.0, 'refreshes': 0, 'deliveries': 0, 'deferred': 0})
+        self.metrics_since = clock.now()
+        self.missing_since = {}     # guild_id -> primer ciclo en que no estaba disponible
+
+    def plan(self, sessions, now=None):
+        """Ordena los refrescos de un ciclo: por turnos entre servidores y con cupos"""
+        now = now or clock.now()
+        self.tick += 1
+        # Olvidar las sesiones que ya no están activas
+        live = {session['session_id'] for session in sessions}
+        self.last_refresh = {
+            session_id: last for session_id, last in self.last_refresh.items() if session_id in live
+        }
+        queues = defaultdict(list)
+        for session in sessions:
+            if self.due(session, now):
+                queues[int(session['guild_id'])].append(session)
+
+        for guild_id, queue in queues.items():
+            # Primero los que nunca se han refrescado y luego los más antiguos
+            queue.sort(key=lambda s: self.last_refresh.get(s['session_id'], (datetime.min,))[0])
+            if len(queue) > self.LIVE_CAP_PER_GUILD:
+                self.metrics[guild_id]['deferred'] += len(queue) - self.LIVE_CAP_PER_GUILD
+                del queue[self.LIVE_CAP_PER_GUILD:]
+
+        # Empieza cada vuelta el servidor que lleva más tiempo sin ser atendido
+        order = sorted(queues, key=lambda guild_id: self.last_served.get(guild_id, 0))
+        taken = dict.fromkeys(order, 0)
+        planned = []
+        while len(planned) < self.TICK_BUDGET:
+            progressed = False
+            for guild_id in order:
+                if taken[guild_id] < len(queues[guild_id]) and len(planned) < self.TICK_BUDGET:
+                    planned.append(queues[guild_id][taken[guild_id]])
+                    taken[guild_id] += 1
+                    progressed = True
+            if not progressed:
+                break
+
+        for guild_id in order:
+            if taken[guild_id]:
+                self.last_served[guild_id] = self.tick
+            self.metrics[guild_id]['deferred'] += len(queues[guild_id]) - taken[guild_id]
+        return planned
+
+    def due(self, session, now):
+        """¿Toca refrescar la sesión? Sin anotar por RefreshPolicy, cada ciclo"""
+        last = self.last_refresh.get(session['session_id'])
+        if last is None:
+            return True
+        moment, state, version = last
+        if state != session.get('refresh_state') or version != session.get('refresh_version'):
+            return True
+        every = session.get('refresh_every', timedelta(0))
+        if every is None:
+            return False
+        return now - moment >= every - self.REFRESH_SLACK
+
+    def seed(self, units, renders):
+        """Toma como último refresco de cada mensaje su último renderizado al día.
+
+        `renders` es el resultado de SessionJournal.clean_renders(). Así, tras un
+        reinicio, los mensajes que ya muestran su estado actual esperan a que
+        les toque según su cadencia en lugar de repintarse todos de golpe. Un
+        resumen solo se toma si todas sus sesiones están al día.
+        """
+        for unit in units:
+            members = unit.get('digest') or [unit]
+            rendered = [renders.get(member['session_id']) for member in members]
+            if any(render is None or render[0] != str(unit['message_id']) for render in rendered):
+                continue
+            moment = min(datetime.strptime(render[1], SessionJournal.TIME_FORMAT) for render in rendered)
+            self.last_refresh[unit['session_id']] = (moment, unit.get('refresh_state'), unit.get('refresh_version'))
+        self.seeded = True
+
+    def mark_refreshed(self, session, now=None):
+        self.last_refresh[session['session_id']] = (
+            now or clock.now(), session.get('refresh_state'), session.get('refresh_version')
+        )
+
+    def record(self, guild_id, elapsed, kind='refreshes'):
+        metrics = self.metrics[int(guild_id)]
+        metrics['busy'] += elapsed
+        metrics[kind] += 1
+
+    def top(self, limit=METRICS_TOP):
+        """Servidores que más tiempo han consumido: [(guild_id, métricas), ...]"""
+        return sorted(self.metrics.items(), key=lambda item: item[1]['busy'], reverse=True)[:limit]
+
+    def log_metrics(self, now=None):
+        now = now or clock.now()
+        if now - self.metrics_since < self.METRICS_LOG_INTERVAL:
+            return
+        total = sum(metrics['busy'] for metrics in self.metrics.values())
+        for guild_id, metrics in self.top():
+            share = metrics['busy'] / total * 100 if total else 0
+            logger.info(
+                f"Servidor {guild_id}: {metrics['busy']:.2f} s ({share:.0f}%) | "
+                f"{metrics['refreshes']} refrescos | {metrics['deliveries']} entregas | "
+                f"{metrics['deferred']} aplazados"
+            )
+        self.metrics.clear()
+        self.metrics_since = now
+
+    def gone_guilds(self, missing, now=None):
+        """Servidores de `missing` que llevan ausentes al menos MISSING_GUILD_GRACE"""
+        now = now or clock.now()
+        self.missing_since = {
+            guild_id: since for guild_id, since in self.missing_since.items() if guild_id in missing
+        }
+        gone = []
+        for guild_id in missing:
+            since = self.missing_since.setdefault(guild_id, now)
+            if now - since >= self.MISSING_GUILD_GRACE:
+                gone.append(guild_id)
+        return gone
+
+    def forget_guild(self, guild_id):
+        self.last_served.pop(int(guild_id), None)
+        self.metrics.pop(int(guild_id), None)
+        self.missing_since.pop(int(guild_id), None)
+
+guild_scheduler = GuildScheduler()
+
+# ===================================================================
+# IMPORTACIÓN Y EXPORTACIÓN DE SESIONES (CSV / ICALENDAR)
+# ===================================================================
+# La importación lee el adjunto línea a línea desde la red y la exportación
+# escribe en un fichero temporal a medida que recorre el cursor, de modo que
+# la memoria usada no depende del número de sesiones.
+CSV_COLUMNS = ['name', 'datetime', 'duration', 'group', 'channel']
+ICS_DATETIME_FORMAT = "%Y%m%dT%H%M%S"
+
+async def iter_attachment_lines(attachment):
+    """Descarga un adjunto en streaming y devuelve sus líneas decodificadas"""
+    async with aiohttp.ClientSession() as http:
+        async with http.get(attachment.url) as response:
+            response.raise_for_status()
+            line_no = 0
+            async for raw_line in response.content:
+                line_no += 1
+                line = raw_line.decode('utf-8', errors='replace').rstrip('\r\n')
+                if line_no == 1:
+                    line = line.lstrip('\ufeff')
+                yield line_no, line
+
+async def iter_csv_records(lines):
+    """Agrupa líneas físicas en registros CSV (admite campos entrecomillados multilínea)"""
+    buffer = None
+    start_line = 0
+    async for line_no, line in lines:
+        if buffer is None:
+            buffer, start_line = line, line_no
+        else:
+            buffer += '\n' + line
+        # Un registro está completo cuando las comillas están emparejadas
+        if buffer.count('"') % 2 == 0:
+            yield start_line, next(csv.reader([buffer]), [])
+            buffer = None
+    if buffer is not None:
+        yield start_line, next(csv.reader([buffer]), [])
 
-async def update_session_message(session_data):
-    """Actualiza el mensaje de una sesión existente"""
+def ics_escape(text):
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+def ics_unescape(text):
+    return re.sub(r'\\([\\;,nN])', lambda m: '\n' if m.group(1) in 'nN' else m.group(1), text)
+
+def ics_fold(line):
+    """Pliega una línea de iCalendar a 75 caracteres (RFC 5545)"""
+    parts = [line[i:i + 74] for i in range(0, len(line), 74)] or ['']
+    return '\r\n '.join(parts) + '\r\n'
+
+def parse_ics_duration(text):
+    """Convierte una duración ISO 8601 (P1DT2H30M) a minutos"""
+    match = re.fullmatch(r'P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?', text.strip())
+    if not match:
+        raise ValueError(text)
+    weeks, days, hours, minutes, _ = (int(g) if g else 0 for g in match.groups())
+    return ((weeks * 7 + days) * 24 + hours) * 60 + minutes
+
+async def iter_ics_events(lines):
+    """Devuelve (línea, propiedades) por cada VEVENT, desplegando líneas plegadas"""
+    async def unfolded():
+        pending, pending_no = None, 0
+        async for line_no, line in lines:
+            if line[:1] in (' ', '\t') and pending is not None:
+                pending += line[1:]
+                continue
+            if pending is not None:
+                yield pending_no, pending
+            pending, pending_no = line, line_no
+        if pending is not None:
+            yield pending_no, pending
+
+    event, event_line = None, 0
+    async for line_no, line in unfolded():
+        if line == 'BEGIN:VEVENT':
+            event, event_line = {}, line_no
+        elif line == 'END:VEVENT' and event is not None:
+            yield event_line, event
+            event = None
+        elif event is not None and ':' in line:
+            head, value = line.split(':', 1)
+            name, *params = head.split(';')
+            event[name.upper()] = (dict(p.split('=', 1) for p in params if '=' in p), value)
+
+def ics_event_to_fields(event, guild_timezone):
+    """Traduce un VEVENT a los mismos campos de texto que una fila CSV"""
+    if 'DTSTART' not in event:
+        raise ValueError('new_session_datetime_error')
+    params, value = event['DTSTART']
     try:
-        message_id = session_data.get('message_id')
-        if not message_id:
+        start = datetime.strptime(value.rstrip('Z'), ICS_DATETIME_FORMAT)
+    except ValueError:
+        raise ValueError('new_session_datetime_error')
+    # Convertir a la hora local del servidor si la fecha viene en UTC o con TZID
+    guild_tz = pytz.timezone(guild_timezone)
+    source_tz = pytz.utc if value.endswith('Z') else (
+        pytz.timezone(params['TZID']) if params.get('TZID') in timezone_index.zones else None
+    )
+    if source_tz is not None:
+        start = source_tz.localize(start).astimezone(guild_tz).replace(tzinfo=None)
+
+    if 'DURATION' in event:
+        duration = parse_ics_duration(event['DURATION'][1])
+    elif 'DTEND' in event:
+        end = datetime.strptime(event['DTEND'][1].rstrip('Z'), ICS_DATETIME_FORMAT)
+        if event['DTEND'][1].endswith('Z'):
+            end = pytz.utc.localize(end).astimezone(guild_tz).replace(tzinfo=None)
+        elif event['DTEND'][0].get('TZID') in timezone_index.zones:
+            end = pytz.timezone(event['DTEND'][0]['TZID']).localize(end).astimezone(guild_tz).replace(tzinfo=None)
+        duration = int((end - start).total_seconds() // 60)
+    else:
+        duration = 120
+
+    return {
+        'name': ics_unescape(event.get('SUMMARY', ({}, ''))[1]),
+        'datetime': start.strftime("%d-%m-%Y %H:%M"),
+        'duration': str(duration),
+        'group': event.get('X-ROLSESSIONS-GROUP', ({}, ''))[1],
+        'channel': event.get('X-ROLSESSIONS-CHANNEL', ({}, ''))[1],
+    }
+
+class SessionImporter:
+    """Valida filas importadas e inserta las válidas en transacciones por lotes"""
+    BATCH_SIZE = 500
+    MAX_REPORTED_ERRORS = 20
+
+    def __init__(self, guild, creator_id, default_group=None, default_channel=None):
+        self.guild = guild
+        self.creator_id = creator_id
+        self.default_group = default_group
+        self.default_channel = default_channel
+        self.timezone = SessionManager.load_config(guild.id)['timezone']
+        self.created_at = clock.now().strftime("%d-%m-%Y %H:%M")
+        self.batch = []
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self._roles_by_name = None
+        self._channels_by_name = None
+
+    def _resolve(self, text, getter, by_name, default):
+        text = (text or '').strip()
+        if not text:
+            return default
+        match = re.fullmatch(r'<[@#]&?(\d+)>|(\d+)', text)
+        if match:
+            return getter(int(match.group(1) or match.group(2)))
+        return by_name.get(text.lstrip('@#').lower())
+
+    def resolve_role(self, text):
+        if self._roles_by_name is None:
+            self._roles_by_name = {role.name.lower(): role for role in self.guild.roles}
+        return self._resolve(text, self.guild.get_role, self._roles_by_name, self.default_group)
+
+    def resolve_channel(self, text):
+        if self._channels_by_name is None:
+            self._channels_by_name = {channel.name.lower(): channel for channel in self.guild.text_channels}
+        channel = self._resolve(text, self.guild.get_channel, self._channels_by_name, self.default_channel)
+        return channel if isinstance(channel, discord.TextChannel) else None
+
+    def error(self, line_no, message):
+        self.failed += 1
+        if len(self.errors) < self.MAX_REPORTED_ERRORS:
+            self.errors.append(f"{line_no}: {message}")
+
+    def add(self, line_no, fields):
+        guild_id = self.guild.id
+        try:
+            name = validate_session_name(fields.get('name'))
+            session_datetime, duration = validate_session_input(
+                fields.get('datetime') or '', fields.get('duration') or '120', self.timezone
+            )
+        except ValueError as e:
+            self.error(line_no, get_text(str(e), guild_id))
             return
-        
-        guild = bot.get_guild(int(session_data['guild_id']))
-        if not guild:
+        role = self.resolve_role(fields.get('group'))
+        if not role:
+            self.error(line_no, get_text('import_group_error', guild_id))
             return
-            
-        channel = guild.get_channel(int(session_data['channel']))
+        channel = self.resolve_channel(fields.get('channel'))
         if not channel:
+            self.error(line_no, get_text('import_channel_error', guild_id))
             return
-            
+
+        self.batch.append((line_no, {
+            "session_id": session_ids.next(),
+            "name": name,
+            "datetime": session_datetime.strftime("%d-%m-%Y %H:%M"),
+            "group": str(role.id),
+            "channel": str(channel.id),
+            "duration": duration,
+        }))
+        if len(self.batch) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Inserta el lote actual en una sola transacción"""
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
         try:
-            message = await channel.fetch_message(int(message_id))
-            if not message:
-                return
-                
-            server_config = SessionManager.load_config(session_data['guild_id'])
-            time_diff = calculate_time_difference(
-                datetime.strptime(session_data['datetime'], "%d-%m-%Y %H:%M"),
-                server_config['timezone']
+            # Una sesión ya existente con el mismo nombre y fecha se considera duplicada
+            # (p. ej. al importar dos veces el mismo fichero)
+            taken = store.existing_names(self.guild.id, {row['name'] for _, row in batch})
+
+            rows = []
+            for line_no, row in batch:
+                if (row['name'], row['datetime']) in taken:
+                    self.error(line_no, get_text('import_duplicate_error', self.guild.id))
+                    continue
+                taken.add((row['name'], row['datetime']))
+                rows.append(row)
+
+            store.insert_sessions([build_session_row(row['session_id'], {
+                'guild_id': str(self.guild.id), 'name': row['name'], 'datetime': row['datetime'],
+                'group_id': row['group'], 'channel_id': row['channel'], 'creator_id': str(self.creator_id),
+                'created_at': self.created_at, 'duration': row['duration']
+            }) for row in rows])
+
+            trace_recorder.record('sessions_imported', guild_id=self.guild.id, creator_id=self.creator_id,
+                                  sessions=rows)
+            for row in rows:
+                session_index.add(self.guild.id, row['session_id'], row['name'], row['datetime'])
+                session_intervals.add(self.guild.id, row['session_id'], row['datetime'], row['duration'],
+                                      row['group'], row['channel'])
+            ReminderTriggers.rebuild(
+                [dict(row, guild_id=self.guild.id) for row in rows],
+                SessionManager.load_config(self.guild.id)
             )
-            
-            embed = create_session_embed(session_data, guild, time_diff)
-            view = ReadyView(session_data['session_id'])
-            
-            await message.edit(embed=embed, view=view)
-            
-            # Verificar si la sesión acaba de finalizar
-            # Consideramos que una sesión acaba de finalizar si el tiempo restante es negativo
-            # y además es menor que la duración negativa (es decir, ha pasado la duración completa)
-            duration = session_data.get('duration', 120)
-            
-            # Si la sesión acaba de finalizar (margen de 5 minutos para evitar mensajes repetidos)
-            if time_diff <= -duration and time_diff > -(duration + 5):
-                # Verificar si ya se envió el mensaje de fin de sesión
-                conn = sqlite3.connect(DB_FILE)
-                c = conn.cursor()
-                c.execute('SELECT end_notification_sent FROM sessions WHERE session_id = ?', (session_data['session_id'],))
-                result = c.fetchone()
-                
-                if not result or not result[0]:  # Si no se ha enviado notificación
-                    creator = guild.get_member(session_data['creator_id'])
-                    if creator:
-                        # Crear embed informativo
-                        end_embed = discord.Embed(
-                            title="🏁 Sesión Finalizada",
-                            description=f"La sesión **{session_data['name']}** ha finalizado.\n\n"
-                                      f"¿Deseas programar una nueva sesión?",
-                            color=discord.Color.blue()
-                        )
-                        
-                        # Creamos vista con botones que solo el creador podrá utilizar
-                        end_view = NewSessionAfterEndView(session_data)
-                        
-                        try:
-                            # Buscar el último mensaje de la sesión
-                            last_message = await channel.fetch_message(int(message_id))
-                            
-                            # Enviar mensaje como respuesta al último mensaje de la sesión
-                            await last_message.reply(
-                                content=f"{creator.mention}",
-                                embed=end_embed,
-                                view=end_view,
-                                allowed_mentions=discord.AllowedMentions(users=[creator])
-                            )
-                            
-                            # Marcar que ya se envió la notificación
-                            c.execute('UPDATE sessions SET end_notification_sent = 1 WHERE session_id = ?', (session_data['session_id'],))
-                            conn.commit()
-                        except Exception as e:
-                            logger.error(f"Error enviando notificación de fin de sesión: {str(e)}")
-                
-                conn.close()
-            
-        except discord.NotFound:
-            logger.error(f"Mensaje no encontrado para sesión {session_data['name']}")
+            self.imported += len(rows)
         except Exception as e:
-            logger.error(f"Error actualizando mensaje: {str(e)}")
-    
-    except Exception as e:
-        logger.error(f"Error en update_session_message: {str(e)}")
+            logger.error(f"Error importando lote de sesiones: {str(e)}")
+            for line_no, _ in batch:
+                self.error(line_no, get_text('error_title', self.guild.id))
 
-# Función para notificaciones
-async def send_session_notification(session, guild, channel, time_diff):
-   try:
-       role = guild.get_role(int(session['group']))
-       
-       # Añadir mensaje de aviso con mención al rol solo si la sesión aún no ha comenzado
-       if time_diff > 0 and role:
-           await channel.send(f"¡Hey {role.mention}! Vuestra sesión de **{session['name']}** comenzará en {int(time_diff)} minutos!")
-       
-       embed = create_session_embed(session, guild, time_diff)
-       view = ReadyView(session.get('session_id'), timeout=None)
-       message = await channel.send(embed=embed, view=view)
-       
-       session['notified'] = True
-       SessionManager.save_session(session, str(message.id))
-       
-       return message
+async def import_sessions_from_attachment(importer, attachment):
+    """Procesa un adjunto .csv o .ics fila a fila"""
+    lines = iter_attachment_lines(attachment)
+    if attachment.filename.lower().endswith('.ics'):
+        async for line_no, event in iter_ics_events(lines):
+            try:
+                fields = ics_event_to_fields(event, importer.timezone)
+            except ValueError as e:
+                key = str(e) if str(e) in load_catalog(DEFAULT_LANG) else 'new_session_datetime_error'
+                importer.error(line_no, get_text(key, importer.guild.id))
+                continue
+            importer.add(line_no, fields)
+            if line_no % SessionImporter.BATCH_SIZE == 0:
+                await asyncio.sleep(0)
+    else:
+        header = None
+        async for line_no, record in iter_csv_records(lines):
+            if header is None:
+                header = [column.strip().lower() for column in record]
+                continue
+            if not any(field.strip() for field in record):
+                continue
+            importer.add(line_no, dict(zip(header, record)))
+            if line_no % SessionImporter.BATCH_SIZE == 0:
+                await asyncio.sleep(0)
+    importer.flush()
 
-   except Exception as e:
-       logger.error(f"Error en send_session_notification: {str(e)}")
-       return None
+def export_sessions_to_file(guild_id, export_format):
+    """Escribe las sesiones del servidor en un fichero temporal y lo devuelve"""
+    tmp = tempfile.TemporaryFile()
+    out = io.TextIOWrapper(tmp, encoding='utf-8', newline='')
+    timezone = SessionManager.load_config(guild_id)['timezone']
+
+    # Las filas se leen de una en una: el export no carga todo el servidor en memoria
+    cursor = ((row[0], row[2], row[3], row[12], row[4], row[5], row[9], row[10])
+              for row in store.iter_guild_sessions(guild_id))
+
+    if export_format == 'ics':
+        stamp = clock.utcnow().strftime(ICS_DATETIME_FORMAT) + 'Z'
+        out.write('BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//RolSessions//ES\r\n')
+        for session_id, name, session_datetime, duration, group_id, channel_id, _, _ in cursor:
+            start = datetime.strptime(session_datetime, "%d-%m-%Y %H:%M")
+            out.write('BEGIN:VEVENT\r\n')
+            out.write(ics_fold(f"UID:{session_id}@rolsessions"))
+            out.write(f"DTSTAMP:{stamp}\r\n")
+            out.write(ics_fold(f"DTSTART;TZID={timezone}:{start.strftime(ICS_DATETIME_FORMAT)}"))
+            out.write(f"DURATION:PT{duration or 120}M\r\n")
+            out.write(ics_fold(f"SUMMARY:{ics_escape(name)}"))
+            out.write(f"X-ROLSESSIONS-GROUP:{group_id}\r\n")
+            out.write(f"X-ROLSESSIONS-CHANNEL:{channel_id}\r\n")
+            out.write('END:VEVENT\r\n')
+        out.write('END:VCALENDAR\r\n')
+    else:
+        writer = csv.writer(out)
+        writer.writerow(CSV_COLUMNS + ['ready', 'not_ready'])
+        for _, name, session_datetime, duration, group_id, channel_id, ready, not_ready in cursor:
+            writer.writerow([name, session_datetime, duration or 120, group_id, channel_id,
+                             (ready or '').replace(',', ' '), (not_ready or '').replace(',', ' ')])
+
+    out.flush()
+    out.detach()
+    tmp.seek(0)
+    return tmp
 
 # ===================================================================
 # COMANDOS SLASH (APLICACIÓN)
 # ===================================================================
 @bot.tree.command(name="newsession", description="Crea una nueva sesión")
-async def new_session(interaction: discord.Interaction):
-   modal = NewSessionModal()
+@app_commands.describe(
+   repeat="Repetir la sesión automáticamente",
+   every="Cada cuántas semanas (Semanal) o días (Cada N días). Por defecto 1",
+   weekdays="Días para 'Días de la semana' (Ej: lun,mie,vie)"
+)
+@app_commands.choices(repeat=[
+   app_commands.Choice(name=catalog_str(key), value=rule_type)
+   for rule_type, key in RecurrenceManager.RULE_LABELS.items()
+])
+async def new_session(interaction: discord.Interaction, repeat: str = None,
+                      every: app_commands.Range[int, 1, 365] = 1, weekdays: str = None):
+   recurrence = None
+   if repeat:
+       recurrence = RecurrenceManager.build_rule(repeat, every, weekdays)
+       if recurrence is None:
+           await interaction.response.send_message(get_text('weekdays_error', interaction.guild.id), ephemeral=True)
+           return
+   modal = NewSessionModal(recurrence, locale=guild_locales.get(interaction.guild.id))
    await interaction.response.send_modal(modal)
 
+@bot.tree.command(name="stoprecurrence", description="Detiene la repetición de una sesión recurrente")
+@app_commands.describe(recurrence="Sesión recurrente (escribe para buscar por nombre)")
+async def stop_recurrence(interaction: discord.Interaction, recurrence: str):
+   if not recurrence.isdigit() or not RecurrenceManager.stop_recurrence(int(recurrence), interaction.guild.id):
+       await interaction.response.send_message(get_text('active_sessions_none', interaction.guild.id), ephemeral=True)
+       return
+   embed = discord.Embed(
+       title=get_text('success_title', interaction.guild.id),
+       description=get_text('recurrence_stopped', interaction.guild.id),
+       color=discord.Color.green()
+   )
+   await interaction.response.send_message(embed=embed)
+
+@stop_recurrence.autocomplete('recurrence')
+async def recurrence_autocomplete(interaction: discord.Interaction, current: str):
+   choices = []
+   locale = guild_locales.get(interaction.guild.id)
+   for recurrence_id, name, rule_type, interval, weekdays in RecurrenceManager.search_recurrences(interaction.guild.id, current):
+       rule = {'rule_type': rule_type, 'interval': interval or 1, 'weekdays': [int(d) for d in (weekdays or '').split(',') if d]}
+       label = f"{name} · {RecurrenceManager.describe_rule(rule, locale)}"
+       choices.append(app_commands.Choice(name=label[:100], value=str(recurrence_id)))
+   return choices
+
 @bot.tree.command(name="activesessions", description="Muestra las sesiones activas")
 async def active_sessions(interaction: discord.Interaction):
    # Cargar sesiones activas del servidor
-   conn = sqlite3.connect(DB_FILE)
-   c = conn.cursor()
-   c.execute('SELECT * FROM sessions WHERE guild_id = ?', (str(interaction.guild.id),))
-   results = c.fetchall()
-   conn.close()
+   results = store.guild_sessions(interaction.guild.id)
 
    if not results:
        await interaction.response.send_message(get_text('active_sessions_none', interaction.guild.id))
        return
 
+   locale = guild_locales.get(interaction.guild.id)
+   server_config = SessionManager.load_config(interaction.guild.id)
    embed = discord.Embed(
-       title=get_text('active_sessions_title', interaction.guild.id),
-       description="Lista de todas las sesiones programadas en este servidor:",
+       title=locale('active_sessions_title'),
+       description=locale('active_sessions_desc'),
        color=discord.Color.blue()
    )
    
@@ -1229,81 +3971,261 @@ async def active_sessions(interaction: discord.Interaction):
        role = interaction.guild.get_role(int(session_data['group']))
        channel = interaction.guild.get_channel(int(session_data['channel']))
        
-       role_name = role.name if role else session_data['group']
+       role_name = role.name if role else locale('session_group_missing')
        channel_name = channel.name if channel else session_data['channel']
        
-       server_config = SessionManager.load_config(interaction.guild.id)
        time_diff = calculate_time_difference(
            datetime.strptime(session_data['datetime'], "%d-%m-%Y %H:%M"),
            server_config['timezone']
        )
        
        # Determinar estado
-       if time_diff <= 0 and time_diff > -session_data['duration']:
-           status = "🔴 En curso"
-       elif time_diff <= -session_data['duration']:
-           status = "⚫ Finalizada"
-       elif time_diff <= 15:
-           status = "🟠 Inminente"
-       else:
-           status = "🟡 Programada"
+       status = locale(session_status_key(time_diff, session_data['duration']))
        embed.add_field(
            name=f"{status} | {session_data['name']}",
-           value=f"📅 {get_text('active_sessions_date', interaction.guild.id)} {session_data['datetime']}\n"
-                 f"⏰ En: {format_time_remaining(time_diff)}\n"
-                 f"⏱️ Duración: {format_duration(session_data['duration'])}\n"
-                 f"👥 {get_text('active_sessions_group', interaction.guild.id)} {role_name}\n"
-                 f"📢 {get_text('active_sessions_channel', interaction.guild.id)} {channel_name}\n"
-                 f"✅ {get_text('session_ready', interaction.guild.id)} {len(session_data['status']['ready'])}",
+           value=f"📅 {locale('active_sessions_date')} {session_data['datetime']}\n"
+                 f"⏰ {locale('active_sessions_in')} {format_time_remaining(time_diff, locale)}\n"
+                 f"⏱️ {locale('active_sessions_duration')} {format_duration(session_data['duration'], locale)}\n"
+                 f"👥 {locale('active_sessions_group')} {role_name}\n"
+                 f"📢 {locale('active_sessions_channel')} {channel_name}\n"
+                 f"✅ {locale('session_ready')} {len(session_data['status']['ready'])}",
            inline=False
        )
    
    await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name="deletesession", description="Elimina una sesión existente")
-async def delete_session(interaction: discord.Interaction):
-   # Cargar sesiones activas del servidor
-   conn = sqlite3.connect(DB_FILE)
-   c = conn.cursor()
-   c.execute('SELECT * FROM sessions WHERE guild_id = ?', (str(interaction.guild.id),))
-   results = c.fetchall()
-   conn.close()
+@app_commands.describe(session="Sesión a eliminar (escribe para buscar por nombre)")
+async def delete_session(interaction: discord.Interaction, session: str = None):
+   if session:
+       result = SessionManager.get_session(session, interaction.guild.id)
+       if not result:
+           await interaction.response.send_message(get_text('active_sessions_none', interaction.guild.id), ephemeral=True)
+           return
+       await show_delete_confirmation(interaction, result, edit=False)
+       return
 
+   # Sin parámetro: mostrar las primeras sesiones del índice
+   results = session_index.search(interaction.guild.id, '')
    if not results:
        await interaction.response.send_message(get_text('active_sessions_none', interaction.guild.id))
        return
 
+   locale = guild_locales.get(interaction.guild.id)
    embed = discord.Embed(
-       title="🗑️ Eliminar Sesión",
-       description="Selecciona la sesión que deseas eliminar:",
+       title=locale('delete_title'),
+       description=locale('delete_desc') + session_picker_hint(interaction.guild.id, len(results)),
        color=discord.Color.red()
    )
    
-   view = SessionSelectView(results, "delete")
+   view = SessionSelectView(results, "delete", locale)
    await interaction.response.send_message(embed=embed, view=view)
 
 @bot.tree.command(name="editsession", description="Edita una sesión existente")
-async def edit_session(interaction: discord.Interaction):
-   # Cargar sesiones activas del servidor
-   conn = sqlite3.connect(DB_FILE)
-   c = conn.cursor()
-   c.execute('SELECT * FROM sessions WHERE guild_id = ?', (str(interaction.guild.id),))
-   results = c.fetchall()
-   conn.close()
+@app_commands.describe(session="Sesión a editar (escribe para buscar por nombre)")
+async def edit_session(interaction: discord.Interaction, session: str = None):
+   if session:
+       result = SessionManager.get_session(session, interaction.guild.id)
+       if not result:
+           await interaction.response.send_message(get_text('active_sessions_none', interaction.guild.id), ephemeral=True)
+           return
+       await show_edit_options(interaction, result, edit=False)
+       return
 
+   # Sin parámetro: mostrar las primeras sesiones del índice
+   results = session_index.search(interaction.guild.id, '')
    if not results:
        await interaction.response.send_message(get_text('active_sessions_none', interaction.guild.id))
        return
 
+   locale = guild_locales.get(interaction.guild.id)
    embed = discord.Embed(
-       title="✏️ Editar Sesión",
-       description="Selecciona la sesión que deseas modificar:",
+       title=locale('edit_title'),
+       description=locale('edit_select_desc') + session_picker_hint(interaction.guild.id, len(results)),
        color=discord.Color.blue()
    )
    
-   view = SessionSelectView(results, "edit")
+   view = SessionSelectView(results, "edit", locale)
    await interaction.response.send_message(embed=embed, view=view)
 
+@delete_session.autocomplete('session')
+@edit_session.autocomplete('session')
+async def session_autocomplete(interaction: discord.Interaction, current: str):
+   """Sugiere sesiones del servidor a partir del índice de nombres"""
+   choices = []
+   for session_id, name, session_datetime in session_index.search(interaction.guild.id, current):
+       label = f"{name} · {session_datetime}"
+       choices.append(app_commands.Choice(name=label[:100], value=str(session_id)))
+   return choices
+
+def session_picker_hint(guild_id, shown):
+   """Aviso cuando el selector no puede mostrar todas las sesiones"""
+   total = session_index.count(guild_id)
+   if total <= shown:
+       return ""
+   return f"\n\n*{get_text('picker_hint', guild_id, shown, total)}*"
+
+@bot.tree.command(name="importsessions", description="Importa sesiones desde un fichero CSV o iCalendar (.ics)")
+@app_commands.describe(
+   file="Fichero .csv (name,datetime,duration,group,channel) o .ics",
+   group="Grupo para las filas que no indiquen uno",
+   channel="Canal para las filas que no indiquen uno"
+)
+@app_commands.default_permissions(manage_guild=True)
+async def import_sessions(interaction: discord.Interaction, file: discord.Attachment,
+                          group: discord.Role = None, channel: discord.TextChannel = None):
+   if not file.filename.lower().endswith(('.csv', '.ics')):
+       await interaction.response.send_message(get_text('import_format_error', interaction.guild.id), ephemeral=True)
+       return
+
+   await interaction.response.defer(thinking=True)
+   importer = SessionImporter(interaction.guild, interaction.user.id, group, channel)
+   try:
+       await import_sessions_from_attachment(importer, file)
+   except Exception as e:
+       logger.error(f"Error importando sesiones: {str(e)}")
+       importer.flush()
+       importer.error('-', get_text('error_title', interaction.guild.id))
+
+   embed = discord.Embed(
+       title=get_text('import_title', interaction.guild.id),
+       description=get_text('import_result', interaction.guild.id, importer.imported, importer.failed),
+       color=discord.Color.green() if not importer.failed else discord.Color.orange()
+   )
+   if importer.errors:
+       embed.add_field(
+           name=get_text('import_errors', interaction.guild.id, len(importer.errors)),
+           value="\n".join(importer.errors)[:1024],
+           inline=False
+       )
+   await interaction.followup.send(embed=embed)
+
+@bot.tree.command(name="exportsessions", description="Exporta las sesiones del servidor a CSV o iCalendar")
+@app_commands.describe(format="Formato del fichero")
+@app_commands.choices(format=[
+   app_commands.Choice(name="CSV", value="csv"),
+   app_commands.Choice(name="iCalendar (.ics)", value="ics")
+])
+async def export_sessions(interaction: discord.Interaction, format: str = "csv"):
+   await interaction.response.defer(thinking=True, ephemeral=True)
+   try:
+       # Recorrer las sesiones y escribir el fichero fuera del bucle de eventos
+       export_file = await asyncio.to_thread(export_sessions_to_file, interaction.guild.id, format)
+       await interaction.followup.send(
+           file=discord.File(export_file, filename=f"sesiones_{interaction.guild.id}.{format}"),
+           ephemeral=True
+       )
+       export_file.close()
+   except Exception as e:
+       logger.error(f"Error exportando sesiones: {str(e)}")
+       await interaction.followup.send(get_text('error_title', interaction.guild.id), ephemeral=True)
+
+@bot.tree.command(name="sessionhistory", description="Muestra las últimas sesiones finalizadas")
+async def session_history(interaction: discord.Interaction):
+   results = DatabaseManager.load_archived_sessions(interaction.guild.id)
+   if not results:
+       await interaction.response.send_message(get_text('active_sessions_none', interaction.guild.id))
+       return
+
+   locale = guild_locales.get(interaction.guild.id)
+   embed = discord.Embed(
+       title=locale('history_title'),
+       description=locale('history_desc'),
+       color=discord.Color.dark_grey()
+   )
+   for name, starts_at, duration, group_id, ready_users, not_ready_users in results:
+       role = interaction.guild.get_role(int(group_id)) if group_id and group_id.isdigit() else None
+       starts = datetime.strptime(starts_at, "%Y-%m-%d %H:%M")
+       embed.add_field(
+           name=f"⚫ {name}",
+           value=f"📅 {starts.strftime('%d-%m-%Y %H:%M')} · ⏱️ {format_duration(duration or 120, locale)}\n"
+                 f"👥 {role.name if role else group_id}\n"
+                 f"✅ {len([u for u in (ready_users or '').split(',') if u])} · "
+                 f"❌ {len([u for u in (not_ready_users or '').split(',') if u])}",
+           inline=False
+       )
+   await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="stats", description="Muestra las estadísticas de asistencia de un usuario o rol")
+@app_commands.describe(user="Usuario a consultar (por defecto, tú)", role="Rol a consultar")
+async def stats_cmd(interaction: discord.Interaction, user: discord.Member = None, role: discord.Role = None):
+   guild_id = interaction.guild.id
+   if role:
+       stats = AttendanceStats.role_stats(guild_id, role.id)
+       title = get_text('stats_title', guild_id, role.name)
+   else:
+       user = user or interaction.user
+       stats = AttendanceStats.user_stats(guild_id, user.id)
+       title = get_text('stats_title', guild_id, user.display_name)
+   if not stats:
+       await interaction.response.send_message(get_text('stats_none', guild_id), ephemeral=True)
+       return
+
+   reliability = AttendanceStats.reliability(stats)
+   embed = discord.Embed(title=title, color=discord.Color.blue())
+   embed.add_field(name=get_text('stats_reliability', guild_id),
+                   value=f"{reliability}%" if reliability is not None else "—")
+   embed.add_field(name=get_text('stats_attended', guild_id), value=str(stats['attended']))
+   embed.add_field(name=get_text('stats_no_shows', guild_id), value=str(stats['no_shows']))
+   embed.add_field(name=get_text('stats_declined', guild_id), value=str(stats['declined']))
+   embed.add_field(name=get_text('stats_no_response', guild_id), value=str(stats['no_response']))
+   if role:
+       embed.add_field(name=get_text('stats_sessions', guild_id), value=str(stats['sessions']))
+   elif stats['lead_samples']:
+       embed.add_field(name=get_text('stats_lead', guild_id),
+                       value=format_duration(stats['lead_total'] // stats['lead_samples'], guild_locales.get(guild_id)))
+   await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="conflicts", description="Muestra las sesiones que se solapan en el mismo grupo o canal")
+async def conflicts_cmd(interaction: discord.Interaction):
+   conflicts = session_intervals.conflicts(interaction.guild.id)
+   if not conflicts:
+       await interaction.response.send_message(get_text('conflict_none', interaction.guild.id), ephemeral=True)
+       return
+
+   names = {}
+   def describe(session_id):
+       if session_id not in names:
+           row = SessionManager.get_session(session_id)
+           names[session_id] = f"**{row[2]}** ({row[3]})" if row else session_id
+       return names[session_id]
+
+   lines = []
+   for first, second, kinds in conflicts:
+       lane = ', '.join(get_text('conflict_group' if kind == 'group' else 'conflict_channel', interaction.guild.id)
+                        for kind in kinds)
+       line = f"• {describe(first)} ↔ {describe(second)} — {lane}"
+       # El embed admite 4096 caracteres de descripción
+       if sum(len(l) + 1 for l in lines) + len(line) > 3900:
+           lines.append(f"… +{len(conflicts) - len(lines)}")
+           break
+       lines.append(line)
+
+   embed = discord.Embed(
+       title=get_text('conflict_title', interaction.guild.id),
+       description="\n".join(lines),
+       color=discord.Color.orange()
+   )
+   await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="backup", description="Crea una copia de seguridad de la base de datos (solo propietario del bot)")
+async def backup_cmd(interaction: discord.Interaction):
+   if not await bot.is_owner(interaction.user):
+       await interaction.response.send_message(get_text('error_title', interaction.guild.id), ephemeral=True)
+       return
+
+   await interaction.response.defer(thinking=True, ephemeral=True)
+   try:
+       path = await asyncio.to_thread(create_snapshot, DB_FILE)
+       snapshots = "\n".join(list_snapshots())
+       await interaction.followup.send(
+           get_text('backup_created', interaction.guild.id, os.path.basename(path), snapshots),
+           ephemeral=True
+       )
+   except Exception as e:
+       logger.error(f"Error en /backup: {str(e)}")
+       await interaction.followup.send(get_text('error_title', interaction.guild.id), ephemeral=True)
+
 @bot.tree.command(name="donate", description="Muestra información para donaciones")
 async def donate_cmd(interaction: discord.Interaction):
    try:
@@ -1312,41 +4234,37 @@ async def donate_cmd(interaction: discord.Interaction):
    except discord.Forbidden:
        await interaction.response.send_message(get_text('donate_error', interaction.guild.id))
 
+# Secciones de /help: clave de la sección y comandos (cada uno con su clave help_<comando>)
+HELP_SECTIONS = [
+   ('help_sessions', ["/newsession", "/stoprecurrence", "/importsessions", "/exportsessions", "/activesessions",
+                      "/editsession", "/sessionhistory", "/conflicts", "/stats", "/deletesession"]),
+   ('help_config', ["/config timezone", "/config lang", "/config prevtime", "/config stages",
+                    "/config reminders", "/config digest", "/config refresh",
+                    "/dmreminders"]),
+   ('help_other', ["/help", "/donate"]),
+]
+
 @bot.tree.command(name="help", description="Muestra la ayuda del bot")
 async def help_command(interaction: discord.Interaction):
+   locale = guild_locales.get(interaction.guild.id)
    embed = discord.Embed(
-       title="📖 Ayuda del Bot",
-       description="Lista de comandos disponibles:",
+       title=locale('help_title'),
+       description=locale('help_desc'),
        color=discord.Color.blue()
    )
-   commands_info = {
-       "Gestión de Sesiones": {
-           "/newsession": "Crea una nueva sesión. Podrás establecer nombre, fecha, grupo, canal y duración.",
-           "/activesessions": "Muestra todas las sesiones activas en el servidor.",
-           "/editsession": "Permite modificar una sesión existente (fecha, duración, grupo, canal).",
-           "/deletesession": "Elimina una sesión existente."
-       },
-       "Configuración": {
-           "/config timezone": "Configura la zona horaria del servidor (Ej: Europe/Madrid).",
-           "/config lang": "Configura el idioma del bot (Español/English)."
-       },
-       "Otros": {
-           "/help": "Muestra este mensaje de ayuda.",
-           "/donate": "Muestra información sobre donaciones."
-       }
-   }
    
-   for category, commands in commands_info.items():
+   for category, commands in HELP_SECTIONS:
        field_text = ""
-       for cmd, desc in commands.items():
+       for cmd in commands:
+           desc = locale('help_' + cmd.lstrip('/').replace(' ', '_'))
            field_text += f"**{cmd}**\n{desc}\n\n"
        embed.add_field(
-           name=f"📌 {category}",
+           name=f"📌 {locale(category)}",
            value=field_text,
            inline=False
        )
    
-   embed.set_footer(text="Tip: Para confirmar asistencia, usa los botones ⭐ y ⛔ en los mensajes de sesión")
+   embed.set_footer(text=locale('help_footer'))
    
    await interaction.response.send_message(embed=embed)
 
@@ -1361,10 +4279,13 @@ bot.tree.add_command(config_group)
 @app_commands.describe(timezone="Zona horaria (Ej: Europe/Madrid, America/New_York)")
 async def config_timezone(interaction: discord.Interaction, timezone: str):
    try:
+       # Aceptar también alias inequívocos (Madrid, CET, spain...)
+       timezone = timezone_index.resolve(timezone) or timezone
        pytz.timezone(timezone)
        config = SessionManager.load_config(interaction.guild.id)
        config['timezone'] = timezone
        SessionManager.save_config(interaction.guild.id, config)
+       ReminderTriggers.rebuild_guild(interaction.guild.id)
        
        embed = discord.Embed(
            title=get_text('success_title', interaction.guild.id),
@@ -1381,11 +4302,61 @@ async def config_timezone(interaction: discord.Interaction, timezone: str):
        )
        await interaction.response.send_message(embed=embed)
 
+@config_timezone.autocomplete('timezone')
+async def timezone_autocomplete(interaction: discord.Interaction, current: str):
+   """Sugiere zonas horarias a partir del índice precalculado"""
+   return [
+       app_commands.Choice(name=timezone_index.describe(zone)[:100], value=zone)
+       for zone in timezone_index.search(current)
+   ]
+
+@config_group.command(name="prevtime", description="Configura el tiempo de aviso previo")
+@app_commands.describe(minutes="Minutos de antelación del aviso (Ej: 15)")
+async def config_prevtime(interaction: discord.Interaction, minutes: app_commands.Range[int, 1, 10080]):
+   config = SessionManager.load_config(interaction.guild.id)
+   config['prevtime'] = minutes
+   SessionManager.save_config(interaction.guild.id, config)
+   ReminderTriggers.rebuild_guild(interaction.guild.id)
+
+   embed = discord.Embed(
+       title=get_text('success_title', interaction.guild.id),
+       description=get_text('prevtime_success', interaction.guild.id, minutes),
+       color=discord.Color.green()
+   )
+   await interaction.response.send_message(embed=embed)
+
+@config_group.command(name="stages", description="Configura varias etapas de aviso en el canal")
+@app_commands.describe(stages="Minutos de antelación separados por comas (Ej: 1440,60,10). Vacío = solo prevtime")
+async def config_stages(interaction: discord.Interaction, stages: str = None):
+   config = SessionManager.load_config(interaction.guild.id)
+   if stages:
+       parsed = parse_reminder_offsets(stages)
+       if parsed is None:
+           embed = discord.Embed(
+               title=get_text('error_title', interaction.guild.id),
+               description=get_text('prevtime_error', interaction.guild.id),
+               color=discord.Color.red()
+           )
+           await interaction.response.send_message(embed=embed, ephemeral=True)
+           return
+       config['reminder_stages'] = ','.join(map(str, parsed))
+   else:
+       config['reminder_stages'] = ''
+   SessionManager.save_config(interaction.guild.id, config)
+   ReminderTriggers.rebuild_guild(interaction.guild.id)
+
+   embed = discord.Embed(
+       title=get_text('success_title', interaction.guild.id),
+       description=get_text('stages_success', interaction.guild.id,
+                            config['reminder_stages'] or get_text('stages_default', interaction.guild.id)),
+       color=discord.Color.green()
+   )
+   await interaction.response.send_message(embed=embed)
+
 @config_group.command(name="lang", description="Configura el idioma del bot")
-@app_commands.describe(language="Idioma (es: Español, en: English)")
+@app_commands.describe(language="Idioma del bot")
 @app_commands.choices(language=[
-   app_commands.Choice(name="Español", value="es"),
-   app_commands.Choice(name="English", value="en")
+   app_commands.Choice(name=name, value=code) for code, name in LANGUAGES.items()
 ])
 async def config_lang(interaction: discord.Interaction, language: str):
    config = SessionManager.load_config(interaction.guild.id)
@@ -1394,62 +4365,226 @@ async def config_lang(interaction: discord.Interaction, language: str):
 
    embed = discord.Embed(
        title=get_text('success_title', interaction.guild.id),
-       description=f"{get_text('lang_success', interaction.guild.id)} {'Español' if language == 'es' else 'English'}",
+       description=f"{get_text('lang_success', interaction.guild.id)} {LANGUAGES[language]}",
+       color=discord.Color.green()
+   )
+   await interaction.response.send_message(embed=embed)
+
+@config_group.command(name="reminders", description="Configura los recordatorios por mensaje privado")
+@app_commands.describe(
+   mode="A quién enviar recordatorios privados",
+   offsets="Minutos de antelación separados por comas (Ej: 1440,60,10)"
+)
+@app_commands.choices(mode=[
+   app_commands.Choice(name=catalog_str(f'reminders_mode_{mode}'), value=mode)
+   for mode in ('off', 'ready', 'role')
+])
+async def config_reminders(interaction: discord.Interaction, mode: str, offsets: str = None):
+   config = SessionManager.load_config(interaction.guild.id)
+   if offsets is not None:
+       parsed = parse_reminder_offsets(offsets)
+       if parsed is None:
+           embed = discord.Embed(
+               title=get_text('error_title', interaction.guild.id),
+               description=get_text('prevtime_error', interaction.guild.id),
+               color=discord.Color.red()
+           )
+           await interaction.response.send_message(embed=embed, ephemeral=True)
+           return
+       config['dm_offsets'] = ','.join(map(str, parsed))
+   config['dm_mode'] = mode
+   SessionManager.save_config(interaction.guild.id, config)
+   ReminderTriggers.rebuild_guild(interaction.guild.id)
+
+   embed = discord.Embed(
+       title=get_text('success_title', interaction.guild.id),
+       description=get_text('reminders_success', interaction.guild.id,
+                            get_text(f'reminders_mode_{mode}', interaction.guild.id), config['dm_offsets']),
+       color=discord.Color.green()
+   )
+   await interaction.response.send_message(embed=embed)
+
+@config_group.command(name="digest", description="Agrupa los avisos que coinciden en un mismo canal")
+@app_commands.describe(enabled="¿Enviar en un solo mensaje los avisos simultáneos de un canal?")
+async def config_digest(interaction: discord.Interaction, enabled: bool):
+   config = SessionManager.load_config(interaction.guild.id)
+   config['digest_mode'] = 'on' if enabled else 'off'
+   SessionManager.save_config(interaction.guild.id, config)
+
+   embed = discord.Embed(
+       title=get_text('success_title', interaction.guild.id),
+       description=get_text('digest_success_on' if enabled else 'digest_success_off', interaction.guild.id),
+       color=discord.Color.green()
+   )
+   await interaction.response.send_message(embed=embed)
+
+@config_group.command(name="refresh", description="Configura cada cuánto se actualizan los mensajes de sesión")
+@app_commands.describe(
+   scheduled="Minutos entre actualizaciones de las sesiones programadas (Ej: 15)",
+   imminent="Minutos entre actualizaciones de las sesiones a punto de empezar (Ej: 1)",
+   in_progress="Minutos entre actualizaciones de las sesiones en curso (Ej: 10)"
+)
+async def config_refresh(interaction: discord.Interaction,
+                         scheduled: app_commands.Range[int, 1, 1440] = None,
+                         imminent: app_commands.Range[int, 1, 15] = None,
+                         in_progress: app_commands.Range[int, 1, 240] = None):
+   config = SessionManager.load_config(interaction.guild.id)
+   for key, value in (('refresh_scheduled', scheduled), ('refresh_imminent', imminent),
+                      ('refresh_in_progress', in_progress)):
+       if value is not None:
+           config[key] = value
+   SessionManager.save_config(interaction.guild.id, config)
+
+   embed = discord.Embed(
+       title=get_text('success_title', interaction.guild.id),
+       description=get_text('refresh_success', interaction.guild.id, config['refresh_scheduled'],
+                            config['refresh_imminent'], config['refresh_in_progress']),
        color=discord.Color.green()
    )
    await interaction.response.send_message(embed=embed)
 
+@bot.tree.command(name="dmreminders", description="Activa o desactiva los recordatorios privados para ti")
+@app_commands.describe(enabled="¿Quieres recibir recordatorios por mensaje privado?")
+async def dm_reminders_cmd(interaction: discord.Interaction, enabled: bool):
+   store.set_dm_optout(interaction.user.id, not enabled)
+   dm_dispatcher.closed.pop(interaction.user.id, None)
+   await interaction.response.send_message(
+       get_text('dm_optin' if enabled else 'dm_optout', interaction.guild.id), ephemeral=True
+   )
+
 # ===================================================================
 # TAREAS PROGRAMADAS Y EVENTOS
 # ===================================================================
 # Tarea programada para gestionar sesiones
 # Esta tarea se ejecuta cada minuto y realiza las siguientes funciones:
 # 1. Limpia sesiones antiguas automáticamente
-# 2. Verifica las sesiones próximas y envía notificaciones
+#    y materializa las próximas ocurrencias de sesiones recurrentes
+# 2. Verifica las sesiones próximas y encola sus notificaciones (ver process_outbox)
 # 3. Actualiza los mensajes de sesiones existentes
 @tasks.loop(minutes=1)
 async def manage_sessions():
+   started = time.monotonic()
    try:
        # Limpiar sesiones antiguas automáticamente
        DatabaseManager.clean_old_sessions()
        
-       current_time = datetime.now()
+       # Crear las ocurrencias de sesiones recurrentes que entran en el horizonte
+       RecurrenceManager.materialize_due()
+       
+       # Disparar los avisos vencidos (consulta por rango sobre fire_at)
+       await ReminderTriggers.fire_due(bot)
+       
        sessions = SessionManager.load_sessions()
+       live_sessions = []
+       missing_guilds = set()
        
        for session in sessions:
            try:
                guild = bot.get_guild(int(session['guild_id']))
                if not guild:
+                   missing_guilds.add(int(session['guild_id']))
                    continue
 
                channel = guild.get_channel(int(session['channel']))
                if not channel:
+                   # Canal eliminado sin que llegase el evento (p. ej. con el bot apagado):
+                   # marcar la sesión para no volver a revisarla en cada ciclo
+                   affected = SessionManager.mark_unroutable('session_id', session['session_id'], guild.id)
+                   await notify_unroutable_sessions(guild, affected, 'session_unroutable_channel')
+                   continue
+
+               # Canal sin permisos: la sesión queda en pausa hasta recuperarlos
+               if not channel_permissions.allowed(channel):
                    continue
 
-               # Obtener zona horaria del servidor
-               server_config = SessionManager.load_config(session['guild_id'])
-               server_timezone = server_config.get('timezone', DEFAULT_TIMEZONE)
-               
-               # Verificar tiempo y actualizar
-               session_time = datetime.strptime(session['datetime'], "%d-%m-%Y %H:%M")
-               time_diff = calculate_time_difference(session_time, server_timezone)
-               
-               if time_diff <= 60 and not session.get('notified', False):
-                   await send_session_notification(session, guild, channel, time_diff)
-               elif session.get('notified', False):
-                   await update_session_message(session)
+               # Los avisos (primer mensaje, recordatorios y MD) los dispara
+               # ReminderTriggers.fire_due; aquí solo se refrescan los mensajes
+               if session.get('notified', False) and session.get('message_id'):
+                   live_sessions.append(session)
 
            except Exception as e:
                logger.error(f"Error procesando sesión {session.get('name', 'unknown')}: {str(e)}")
                continue
+       
+       # Servidores que el bot dejó estando apagado (no llegó on_guild_remove):
+       # tras un margen, para no confundirlos con una caída, se archivan una vez
+       if bot.is_ready():
+           for guild_id in guild_scheduler.gone_guilds(missing_guilds):
+               archived = SessionManager.purge_guild(guild_id)
+               guild_scheduler.forget_guild(guild_id)
+               channel_permissions.forget_guild(guild_id)
+               logger.info(f"Servidor {guild_id} no disponible desde hace "
+                           f"{GuildScheduler.MISSING_GUILD_GRACE}: {archived} sesiones archivadas")
+       
+       # Las sesiones de un mismo mensaje resumen se refrescan juntas, en una sola edición
+       by_message = defaultdict(list)
+       for session in live_sessions:
+           by_message[(session['guild_id'], session['message_id'])].append(session)
+       live_messages = [
+           dict(members[0], digest=members) if len(members) > 1 else members[0]
+           for members in by_message.values()
+       ]
+       
+       # Cadencia de cada mensaje según el estado de sus sesiones (ver RefreshPolicy)
+       configs = {}
+       for unit in live_messages:
+           if unit['guild_id'] not in configs:
+               configs[unit['guild_id']] = SessionManager.load_config(unit['guild_id'])
+           RefreshPolicy.annotate(unit, configs[unit['guild_id']])
+       
+       # En el primer ciclo tras arrancar, los mensajes al día no se repintan
+       if not guild_scheduler.seeded:
+           guild_scheduler.seed(live_messages, SessionJournal.clean_renders())
+       
+       # Refrescar los mensajes por turnos entre servidores (ver GuildScheduler)
+       for session in guild_scheduler.plan(live_messages):
+           refresh_started = time.monotonic()
+           refreshed = False
+           try:
+               refreshed = await update_session_message(session, grouped=True)
+           except Exception as e:
+               logger.error(f"Error procesando sesión {session.get('name', 'unknown')}: {str(e)}")
+           # Si falla, la sesión vuelve a tocar en el siguiente ciclo (también al finalizar,
+           # cuando ya no tiene cadencia y el refresco es el que encola el mensaje de fin)
+           if refreshed:
+               guild_scheduler.mark_refreshed(session)
+           guild_scheduler.record(session['guild_id'], time.monotonic() - refresh_started)
+       
+       guild_scheduler.log_metrics()
 
    except Exception as e:
        logger.error(f"Error en manage_sessions: {str(e)}")
+   
+   trace_recorder.record('tick', task='manage_sessions', elapsed_ms=round((time.monotonic() - started) * 1000, 2))
+   trace_recorder.flush()
+
+# Worker de la bandeja de salida: entrega avisos pendientes y reintenta los fallidos
+@tasks.loop(seconds=10)
+async def process_outbox():
+   started = time.monotonic()
+   await NotificationOutbox.drain(bot)
+   trace_recorder.record('tick', task='process_outbox', elapsed_ms=round((time.monotonic() - started) * 1000, 2))
+
+# Copia de seguridad periódica en caliente. Se ejecuta en un hilo aparte para
+# que los pasos de la copia no bloqueen el bucle de eventos del bot.
+@tasks.loop(hours=BACKUP_INTERVAL_HOURS)
+async def backup_task():
+   try:
+       await asyncio.to_thread(create_snapshot, DB_FILE)
+   except Exception as e:
+       logger.error(f"Error en la copia de seguridad: {str(e)}")
+
+# Tarea diaria de compactación del archivo de sesiones
+@tasks.loop(hours=24)
+async def compact_archive_task():
+   DatabaseManager.compact_archive()
+   NotificationOutbox.prune()
 
 # Evento que se ejecuta cuando el bot está listo y conectado
 # Realiza las siguientes acciones:
 # 1. Configura archivos y base de datos
-# 2. Recrea los mensajes de sesiones existentes
+# 2. Registra las vistas de los mensajes publicados y reconcilia los que
+#    cambiaron mientras estaba desconectado
 # 3. Inicia la tarea programada de gestión de sesiones
 # 4. Sincroniza los comandos slash con Discord
 @bot.event
@@ -1460,14 +4595,38 @@ async def on_ready():
    # Configurar archivos y base de datos
    SessionManager.setup_files()
    
-   # Recrear mensajes de sesiones
+   # Enlazar los botones de los mensajes publicados (sin peticiones a Discord)
+   DatabaseManager.register_persistent_views(bot)
+   
+   # Reconciliar los mensajes de sesiones desactualizados
    await DatabaseManager.recreate_session_messages(bot)
    
+   # Generar los avisos de las sesiones creadas antes de existir la tabla de disparadores
+   ReminderTriggers.backfill()
+   
+   # La traza empieza con una copia de la base de datos, que es el estado inicial de la simulación
+   if trace_recorder.enabled and not trace_recorder.started:
+       try:
+           snapshot = await asyncio.to_thread(create_snapshot, DB_FILE)
+           trace_recorder.start(os.path.basename(snapshot))
+           logger.info(f"Grabando traza en {TRACE_FILE}")
+       except Exception as e:
+           logger.error(f"Error iniciando la traza: {str(e)}")
+   
    # Iniciar tarea de gestión de sesiones
    manage_sessions.start()
+   dm_dispatcher.start(bot)
+   if not process_outbox.is_running():
+       process_outbox.start()
+   if not compact_archive_task.is_running():
+       compact_archive_task.start()
+   if not backup_task.is_running():
+       backup_task.start()
    
    # Sincronizar comandos con Discord
    try:
+       if bot.tree.translator is None:
+           await bot.tree.set_translator(CatalogTranslator())
        logger.info("Sincronizando comandos slash...")
        synced = await bot.tree.sync()
        logger.info(f"Comandos sincronizados correctamente: {len(synced)} comandos")
@@ -1476,6 +4635,86 @@ async def on_ready():
 
    logger.info("Bot listo y operativo")
 
+# Los comandos slash se graban en la traza con sus opciones (los ID de usuario,
+# rol, canal o adjunto tal cual); el simulador los vuelve a ejecutar
+@bot.listen('on_interaction')
+async def trace_interaction(interaction):
+   if not trace_recorder.enabled or interaction.type != discord.InteractionType.application_command:
+       return
+   data = interaction.data or {}
+   name = data.get('name')
+   options = data.get('options', [])
+   # Subcomandos (p. ej. /config lang): el nombre completo y sus propias opciones
+   while options and options[0].get('type') in (1, 2):
+       name = f"{name} {options[0]['name']}"
+       options = options[0].get('options', [])
+   trace_recorder.record('command', name=name, guild_id=interaction.guild_id, channel_id=interaction.channel_id,
+                         user_id=interaction.user.id,
+                         options=[[option['name'], option['type'], option.get('value')] for option in options])
+
+async def notify_unroutable_sessions(guild, affected, text_key):
+   """Avisa por mensaje privado a los creadores de sesiones que han quedado sin canal o grupo"""
+   for session_id, name, creator_id in affected:
+       creator = guild.get_member(int(creator_id))
+       if not creator:
+           continue
+       try:
+           await creator.send(get_text(text_key, guild.id, name, guild.name))
+       except (discord.Forbidden, discord.HTTPException):
+           pass
+
+# Eventos del gateway que dejan sesiones huérfanas: se actualizan al momento
+# con borrados/marcados por índice en lugar de revisarlas en cada ciclo
+@bot.event
+async def on_guild_remove(guild):
+   trace_recorder.record('guild_removed', guild_id=guild.id)
+   archived = SessionManager.purge_guild(guild.id)
+   guild_scheduler.forget_guild(guild.id)
+   channel_permissions.forget_guild(guild.id)
+   logger.info(f"Bot eliminado del servidor {guild.id}: {archived} sesiones archivadas")
+
+@bot.event
+async def on_guild_channel_delete(channel):
+   trace_recorder.record('channel_deleted', guild_id=channel.guild.id, channel_id=channel.id)
+   channel_permissions.invalidate_channel(channel.id)
+   affected = SessionManager.mark_unroutable('channel_id', channel.id, channel.guild.id)
+   if affected:
+       logger.info(f"Canal {channel.id} eliminado: {len(affected)} sesiones sin canal")
+       await notify_unroutable_sessions(channel.guild, affected, 'session_unroutable_channel')
+
+@bot.event
+async def on_guild_role_delete(role):
+   trace_recorder.record('role_deleted', guild_id=role.guild.id, role_id=role.id)
+   channel_permissions.invalidate_guild(role.guild.id)
+   affected = SessionManager.mark_unroutable('group_id', role.id, role.guild.id)
+   if affected:
+       logger.info(f"Rol {role.id} eliminado: {len(affected)} sesiones sin grupo")
+       await notify_unroutable_sessions(role.guild, affected, 'session_unroutable_role')
+
+# Eventos que pueden cambiar los permisos del bot en los canales de sesiones
+@bot.event
+async def on_guild_channel_update(before, after):
+   if isinstance(after, discord.CategoryChannel):
+       # Los canales sincronizados heredan los permisos de la categoría
+       channel_permissions.invalidate_guild(after.guild.id)
+   else:
+       channel_permissions.invalidate_channel(after.id)
+
+@bot.event
+async def on_guild_role_update(before, after):
+   channel_permissions.invalidate_guild(after.guild.id)
+
+@bot.event
+async def on_member_update(before, after):
+   if bot.user and after.id == bot.user.id and before.roles != after.roles:
+       channel_permissions.invalidate_guild(after.guild.id)
+
+# Tras una reanudación de la conexión se reconcilian solo los mensajes desactualizados
+@bot.event
+async def on_resumed():
+   logger.info("Conexión reanudada")
+   await DatabaseManager.recreate_session_messages(bot)
+
 # Ejecutar el bot
 if __name__ == "__main__":
    try:
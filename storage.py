@@ -0,0 +1,1100 @@
+# storage.py
+# Capa de almacenamiento de sesiones, configuración, recordatorios, asistencia,
+# recurrencias, bandeja de salida y diario de renderizado.
+#
+# El bot habla con un objeto SessionStore en lugar de escribir SQL en cada
+# vista o comando; fuera de aquí solo DatabaseManager.setup_database usa SQL,
+# para crear y migrar el esquema. Hay dos implementaciones:
+#   - SQLiteSessionStore: la del bot, sobre sessions.db (esquema y migraciones
+#     en DatabaseManager.setup_database).
+#   - MemorySessionStore: diccionarios en memoria, para pruebas y mediciones.
+#
+# Las sesiones se intercambian como tuplas con las columnas de SESSION_COLUMNS,
+# en ese orden, que es lo que espera convert_db_to_session.
+#
+# Cada sesión lleva un número de versión que incrementa cada update_session. Las
+# escrituras de tipo lectura-modificación-escritura (p. ej. las listas de
+# disponibilidad) pasan la versión leída y, si otra escritura se adelantó, el
+# UPDATE no se aplica y el llamador vuelve a leer y reintenta.
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+SESSION_COLUMNS = (
+    'session_id', 'guild_id', 'name', 'datetime', 'group_id', 'channel_id',
+    'creator_id', 'created_at', 'notified', 'ready_users', 'not_ready_users',
+    'message_id', 'duration', 'end_notification_sent', 'recurrence_id',
+    'unroutable', 'reminder_stages', 'version'
+)
+COLUMN_INDEX = {name: i for i, name in enumerate(SESSION_COLUMNS)}
+SESSION_DEFAULTS = {
+    'notified': 0, 'ready_users': '', 'not_ready_users': '', 'duration': 120,
+    'end_notification_sent': 0, 'unroutable': 0, 'version': 0,
+}
+SELECT_SESSION = f"SELECT {', '.join(SESSION_COLUMNS)} FROM sessions"
+ROUTING_COLUMNS = ('channel_id', 'group_id', 'session_id')
+USER_STATS_COLUMNS = ('attended', 'no_shows', 'declined', 'no_response', 'lead_total', 'lead_samples')
+ROLE_STATS_COLUMNS = ('attended', 'no_shows', 'declined', 'no_response')
+# Columnas que nunca se escriben con update_session
+FIXED_COLUMNS = ('session_id', 'version')
+# Columnas visibles en el mensaje de la sesión: al cambiar, su render queda desactualizado
+JOURNAL_COLUMNS = (
+    'name', 'datetime', 'group_id', 'channel_id', 'creator_id', 'ready_users', 'not_ready_users', 'duration'
+)
+RECURRENCE_COLUMNS = (
+    'recurrence_id', 'guild_id', 'name', 'rule_type', 'interval', 'weekdays',
+    'group_id', 'channel_id', 'creator_id', 'duration', 'next_at'
+)
+RECURRENCE_DEFAULTS = {'interval': 1, 'duration': 120}
+
+
+class SessionConflict(Exception):
+    """Otra escritura modificó la sesión entre la lectura y el UPDATE (tras agotar reintentos)"""
+
+
+def build_session_row(session_id, values):
+    """Fila completa para una sesión nueva a partir de {columna: valor}"""
+    row = dict(SESSION_DEFAULTS, **values)
+    row['session_id'] = session_id
+    row['version'] = 0
+    return tuple(row.get(column) for column in SESSION_COLUMNS)
+
+
+def _check_columns(columns):
+    for column in columns:
+        if column not in COLUMN_INDEX or column in FIXED_COLUMNS:
+            raise ValueError(column)
+
+
+class SessionStore:
+    """Interfaz de almacenamiento. Las implementaciones deben ser seguras entre hilos."""
+
+    def setup(self):
+        """Prepara el almacenamiento (el esquema SQLite lo crea DatabaseManager)"""
+
+    # --- Sesiones -------------------------------------------------------
+    def get_session(self, session_id, guild_id=None):
+        """Fila de una sesión, opcionalmente restringida a un servidor"""
+        raise NotImplementedError
+
+    def insert_session(self, row):
+        """Inserta una sesión nueva (fila completa, ver build_session_row)"""
+        raise NotImplementedError
+
+    def update_session(self, session_id, changes, expected_version=None):
+        """Actualiza solo las columnas de `changes` en una sentencia e incrementa la versión.
+
+        Con `expected_version` el cambio solo se aplica si la fila sigue en esa
+        versión. Devuelve la fila ya actualizada, o None si la sesión no existe
+        o la versión no coincide.
+        """
+        raise NotImplementedError
+
+    def insert_sessions(self, rows):
+        """Inserta un lote de sesiones nuevas en una sola transacción"""
+        raise NotImplementedError
+
+    def delete_session(self, session_id):
+        """Elimina una sesión; devuelve True si existía"""
+        raise NotImplementedError
+
+    def guild_sessions(self, guild_id):
+        """Sesiones de un servidor"""
+        raise NotImplementedError
+
+    def iter_guild_sessions(self, guild_id):
+        """Como guild_sessions, pero sin cargarlas todas en memoria"""
+        return iter(self.guild_sessions(guild_id))
+
+    def routable_sessions(self):
+        """Sesiones con canal y grupo válidos (las que revisa el planificador)"""
+        raise NotImplementedError
+
+    def session_starts(self):
+        """Pares (session_id, datetime) de todas las sesiones"""
+        raise NotImplementedError
+
+    def mark_unroutable(self, column, value, guild_id):
+        """Marca sesiones sin canal/grupo válido; devuelve (session_id, name, creator_id)"""
+        raise NotImplementedError
+
+    def existing_names(self, guild_id, names):
+        """Pares (name, datetime) ya guardados en el servidor para esos nombres"""
+        raise NotImplementedError
+
+    def occurrence_exists(self, recurrence_id, session_datetime):
+        raise NotImplementedError
+
+    def max_session_id(self):
+        raise NotImplementedError
+
+    # --- Archivo --------------------------------------------------------
+    def archive_sessions(self, session_ids, archived_at):
+        """Mueve sesiones al archivo; devuelve cuántas se movieron"""
+        raise NotImplementedError
+
+    def archived_sessions(self, guild_id, limit):
+        """Últimas sesiones archivadas: (name, starts_at, duration, group_id, ready_users, not_ready_users)"""
+        raise NotImplementedError
+
+    def expire_archive(self, cutoff, limit):
+        """Borra hasta `limit` sesiones archivadas que empezaron antes de `cutoff`; devuelve cuántas"""
+        raise NotImplementedError
+
+    def compact(self):
+        """Devuelve al sistema el espacio libre tras borrar filas"""
+
+    # --- Configuración --------------------------------------------------
+    def load_config(self, guild_id):
+        """Valores guardados del servidor (dict) o None"""
+        raise NotImplementedError
+
+    def save_config(self, guild_id, values):
+        raise NotImplementedError
+
+    def set_dm_optout(self, user_id, opted_out):
+        raise NotImplementedError
+
+    def dm_optouts(self, user_ids):
+        """Subconjunto de user_ids que no quiere recordatorios privados"""
+        raise NotImplementedError
+
+    # --- Recordatorios --------------------------------------------------
+    def replace_reminders(self, session_id, triggers):
+        """Sustituye los disparadores pendientes; triggers = [(kind, stage_minutes, fire_at)].
+        Los ya disparados con el mismo instante se conservan."""
+        raise NotImplementedError
+
+    def claim_due_reminders(self, now, limit):
+        """Marca como disparados y devuelve [(id, session_id, kind, stage_minutes)] vencidos"""
+        raise NotImplementedError
+
+    def sessions_without_reminders(self):
+        """Sesiones pendientes de aviso que aún no tienen disparadores"""
+        raise NotImplementedError
+
+    # --- Recurrencias ---------------------------------------------------
+    def create_recurrence(self, values):
+        """Guarda una regla ({columna: valor} de RECURRENCE_COLUMNS) y devuelve su ID"""
+        raise NotImplementedError
+
+    def stop_recurrence(self, recurrence_id, guild_id):
+        """Desactiva una regla del servidor; devuelve True si existía"""
+        raise NotImplementedError
+
+    def deactivate_recurrences(self, guild_id, column=None, value=None):
+        """Desactiva las reglas del servidor (solo las de ese canal o grupo, si se indica)"""
+        raise NotImplementedError
+
+    def search_recurrences(self, guild_id, query, limit):
+        """Reglas activas cuyo nombre contiene `query`: (recurrence_id, name, rule_type, interval, weekdays)"""
+        raise NotImplementedError
+
+    def due_recurrences(self, latest):
+        """Reglas activas con `next_at` <= latest, como tuplas de RECURRENCE_COLUMNS"""
+        raise NotImplementedError
+
+    def set_recurrence_next(self, recurrence_id, next_at):
+        raise NotImplementedError
+
+    # --- Bandeja de salida ----------------------------------------------
+    def enqueue_notification(self, idempotency_key, kind, session_id, guild_id, now):
+        """Encola una notificación; si la clave ya existe no hace nada"""
+        raise NotImplementedError
+
+    def pending_notifications(self, now, limit):
+        """Pendientes cuyo turno ha llegado, por turnos entre servidores:
+        [(id, kind, session_id, attempts, guild_id)]"""
+        raise NotImplementedError
+
+    def finish_notification(self, outbox_id, status, error, closed_at, session_id=None, session_changes=None):
+        """Cierra una entrada y, en la misma transacción, aplica `session_changes` a la sesión"""
+        raise NotImplementedError
+
+    def retry_notification(self, outbox_id, attempts, next_attempt_at, error):
+        raise NotImplementedError
+
+    def defer_notification(self, outbox_id, next_attempt_at, error):
+        """Aplaza una entrada sin contar el intento"""
+        raise NotImplementedError
+
+    def resume_notifications(self, guild_id, now, error):
+        """Adelanta a `now` las pendientes del servidor aplazadas con `error`"""
+        raise NotImplementedError
+
+    def cancel_notifications(self, session_ids, error):
+        """Cancela las pendientes de esas sesiones"""
+        raise NotImplementedError
+
+    def prune_notifications(self, cutoff):
+        """Elimina las entradas cerradas antes de `cutoff`"""
+        raise NotImplementedError
+
+    # --- Diario de renderizado ------------------------------------------
+    def journal_version(self, session_id):
+        """Versión de los datos visibles de la sesión (0 si no consta)"""
+        raise NotImplementedError
+
+    def record_render(self, session_id, message_id, version, bucket_until, rendered_at):
+        """Registra que el mensaje muestra esa versión; queda sucio si ya hay una posterior"""
+        raise NotImplementedError
+
+    def stale_sessions(self, now):
+        """Sesiones enrutables cuyo render está sucio o cuyo tramo de estado caducó antes de `now`"""
+        raise NotImplementedError
+
+    def clean_renders(self, now):
+        """{session_id: (message_id, rendered_at)} de los renders al día en `now`"""
+        raise NotImplementedError
+
+    # --- Asistencia -----------------------------------------------------
+    def record_attendance(self, guild_id, session_id, user_id, lead_minutes=None):
+        """Cuenta un cambio de disponibilidad; con lead_minutes, el usuario se marcó disponible"""
+        raise NotImplementedError
+
+    def finalize_attendance(self, session_id, guild_id, role_id, finalized_at, build):
+        """Consolida una sesión una sola vez.
+
+        `build(marks)` recibe {user_id: (ever_ready, lead_minutes)} y devuelve
+        (user_rows, role_row) con los incrementos; se aplica en la misma
+        transacción. Devuelve False si la sesión ya estaba consolidada.
+        """
+        raise NotImplementedError
+
+    def user_stats(self, guild_id, user_id):
+        raise NotImplementedError
+
+    def role_stats(self, guild_id, role_id):
+        raise NotImplementedError
+
+
+class SQLiteSessionStore(SessionStore):
+    """Implementación sobre SQLite.
+
+    Cada hilo reutiliza su conexión (en lugar de abrir una por consulta) y las
+    escrituras de varias sentencias van en transacciones BEGIN IMMEDIATE, que
+    toman el bloqueo de escritura al empezar en vez de a mitad de transacción.
+    """
+    PRAGMAS = (
+        'PRAGMA synchronous = NORMAL',
+        'PRAGMA busy_timeout = 5000',
+        'PRAGMA temp_store = MEMORY',
+        'PRAGMA cache_size = -8000',
+    )
+
+    def __init__(self, db_file, factory=sqlite3.Connection):
+        self.db_file = db_file
+        self.factory = factory
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, factory=self.factory)
+            for pragma in self.PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn.cursor()
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def _fetchall(self, query, params=()):
+        conn = self._connection()
+        rows = conn.execute(query, params).fetchall()
+        conn.commit()
+        return rows
+
+    def _fetchone(self, query, params=()):
+        conn = self._connection()
+        row = conn.execute(query, params).fetchone()
+        conn.commit()
+        return row
+
+    def setup(self):
+        # WAL: las lecturas no esperan a las escrituras (se guarda en el fichero)
+        self._fetchone('PRAGMA journal_mode = WAL')
+
+    # --- Sesiones -------------------------------------------------------
+    def get_session(self, session_id, guild_id=None):
+        if guild_id is None:
+            return self._fetchone(f'{SELECT_SESSION} WHERE session_id = ?', (session_id,))
+        return self._fetchone(f'{SELECT_SESSION} WHERE session_id = ? AND guild_id = ?',
+                              (session_id, str(guild_id)))
+
+    def insert_session(self, row):
+        self.insert_sessions([row])
+
+    @staticmethod
+    def _update_query(session_id, changes):
+        _check_columns(changes)
+        assignments = [f'{column} = ?' for column in changes] + ['version = version + 1']
+        query = f'UPDATE sessions SET {", ".join(assignments)} WHERE session_id = ?'
+        return query, list(changes.values()) + [session_id]
+
+    def update_session(self, session_id, changes, expected_version=None):
+        query, params = self._update_query(session_id, changes)
+        if expected_version is not None:
+            query += ' AND version = ?'
+            params.append(expected_version)
+        # RETURNING: la fila resultante sale de la misma sentencia, sin releerla
+        with self._transaction() as c:
+            c.execute(f'{query} RETURNING {", ".join(SESSION_COLUMNS)}', params)
+            rows = c.fetchall()
+        return rows[0] if rows else None
+
+    def insert_sessions(self, rows):
+        with self._transaction() as c:
+            c.executemany(f'''
+                INSERT INTO sessions ({', '.join(SESSION_COLUMNS)})
+                VALUES ({', '.join(['?'] * len(SESSION_COLUMNS))})
+            ''', rows)
+
+    def delete_session(self, session_id):
+        with self._transaction() as c:
+            c.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+            return c.rowcount > 0
+
+    def guild_sessions(self, guild_id):
+        return self._fetchall(f'{SELECT_SESSION} WHERE guild_id = ?', (str(guild_id),))
+
+    def iter_guild_sessions(self, guild_id):
+        # Conexión propia: el cursor se recorre mientras se escribe el fichero
+        conn = sqlite3.connect(self.db_file)
+        try:
+            yield from conn.execute(f'{SELECT_SESSION} WHERE guild_id = ?', (str(guild_id),))
+        finally:
+            conn.close()
+
+    def routable_sessions(self):
+        return self._fetchall(f'{SELECT_SESSION} WHERE unroutable = 0')
+
+    def session_starts(self):
+        return self._fetchall('SELECT session_id, datetime FROM sessions')
+
+    def mark_unroutable(self, column, value, guild_id):
+        if column not in ROUTING_COLUMNS:
+            raise ValueError(column)
+        with self._transaction() as c:
+            c.execute(f'''
+                SELECT session_id, name, creator_id FROM sessions
+                WHERE {column} = ? AND guild_id = ? AND unroutable = 0
+            ''', (str(value), str(guild_id)))
+            affected = c.fetchall()
+            if affected:
+                c.executemany('UPDATE sessions SET unroutable = 1 WHERE session_id = ?',
+                              [(row[0],) for row in affected])
+            return affected
+
+    def existing_names(self, guild_id, names):
+        names = list(names)
+        if not names:
+            return set()
+        return set(self._fetchall(f'''
+            SELECT name, datetime FROM sessions
+            WHERE guild_id = ? AND name IN ({",".join("?" * len(names))})
+        ''', [str(guild_id)] + names))
+
+    def occurrence_exists(self, recurrence_id, session_datetime):
+        return self._fetchone('SELECT 1 FROM sessions WHERE recurrence_id = ? AND datetime = ?',
+                              (recurrence_id, session_datetime)) is not None
+
+    def max_session_id(self):
+        return self._fetchone('SELECT MAX(session_id) FROM sessions')[0]
+
+    # --- Archivo --------------------------------------------------------
+    def archive_sessions(self, session_ids, archived_at):
+        placeholders = ','.join(['?'] * len(session_ids))
+        with self._transaction() as c:
+            c.execute(f'''
+                INSERT OR REPLACE INTO sessions_archive
+                (session_id, guild_id, name, starts_at, duration, group_id, channel_id,
+                creator_id, ready_users, not_ready_users, archived_at)
+                SELECT session_id, guild_id, name,
+                       substr(datetime, 7, 4) || '-' || substr(datetime, 4, 2) || '-' ||
+                       substr(datetime, 1, 2) || ' ' || substr(datetime, 12, 5),
+                       duration, group_id, channel_id, creator_id, ready_users, not_ready_users, ?
+                FROM sessions WHERE session_id IN ({placeholders})
+            ''', [archived_at] + list(session_ids))
+            c.execute(f'DELETE FROM sessions WHERE session_id IN ({placeholders})', list(session_ids))
+            return c.rowcount
+
+    def archived_sessions(self, guild_id, limit):
+        return self._fetchall('''
+            SELECT name, starts_at, duration, group_id, ready_users, not_ready_users
+            FROM sessions_archive WHERE guild_id = ?
+            ORDER BY starts_at DESC LIMIT ?
+        ''', (str(guild_id), limit))
+
+    def expire_archive(self, cutoff, limit):
+        with self._transaction() as c:
+            c.execute('''
+                DELETE FROM sessions_archive WHERE rowid IN (
+                    SELECT rowid FROM sessions_archive WHERE starts_at < ? LIMIT ?
+                )
+            ''', (cutoff, limit))
+            return max(c.rowcount, 0)
+
+    def compact(self):
+        self._fetchall('PRAGMA incremental_vacuum')
+        self._fetchall('PRAGMA optimize')
+
+    # --- Configuración --------------------------------------------------
+    def load_config(self, guild_id):
+        conn = self._connection()
+        cursor = conn.execute('SELECT * FROM config WHERE guild_id = ?', (str(guild_id),))
+        row = cursor.fetchone()
+        names = [column[0] for column in cursor.description]
+        conn.commit()
+        return dict(zip(names, row)) if row else None
+
+    def save_config(self, guild_id, values):
+        columns = list(values)
+        with self._transaction() as c:
+            c.execute(f'''
+                INSERT OR REPLACE INTO config (guild_id, {', '.join(columns)})
+                VALUES (?, {', '.join(['?'] * len(columns))})
+            ''', [str(guild_id)] + [values[key] for key in columns])
+
+    def set_dm_optout(self, user_id, opted_out):
+        with self._transaction() as c:
+            if opted_out:
+                c.execute('INSERT OR IGNORE INTO dm_optout (user_id) VALUES (?)', (str(user_id),))
+            else:
+                c.execute('DELETE FROM dm_optout WHERE user_id = ?', (str(user_id),))
+
+    def dm_optouts(self, user_ids):
+        ids = [str(user_id) for user_id in user_ids]
+        if not ids:
+            return set()
+        rows = self._fetchall(f'SELECT user_id FROM dm_optout WHERE user_id IN ({",".join("?" * len(ids))})', ids)
+        return {int(row[0]) for row in rows}
+
+    # --- Recordatorios --------------------------------------------------
+    def replace_reminders(self, session_id, triggers):
+        with self._transaction() as c:
+            c.execute('DELETE FROM reminder_triggers WHERE session_id = ? AND fired = 0', (session_id,))
+            c.executemany('''
+                INSERT OR IGNORE INTO reminder_triggers (session_id, kind, stage_minutes, fire_at)
+                VALUES (?, ?, ?, ?)
+            ''', [(session_id, kind, stage, fire_at) for kind, stage, fire_at in triggers])
+
+    def claim_due_reminders(self, now, limit):
+        with self._transaction() as c:
+            c.execute('''
+                SELECT id, session_id, kind, stage_minutes FROM reminder_triggers
+                WHERE fired = 0 AND fire_at <= ?
+                ORDER BY fire_at LIMIT ?
+            ''', (now, limit))
+            due = c.fetchall()
+            if due:
+                c.executemany('UPDATE reminder_triggers SET fired = 1 WHERE id = ?', [(row[0],) for row in due])
+            return due
+
+    def sessions_without_reminders(self):
+        return self._fetchall(f'''
+            {SELECT_SESSION} s
+            WHERE s.notified = 0 AND s.unroutable = 0
+            AND NOT EXISTS (SELECT 1 FROM reminder_triggers t WHERE t.session_id = s.session_id)
+        ''')
+
+    # --- Recurrencias ---------------------------------------------------
+    def create_recurrence(self, values):
+        columns = [column for column in RECURRENCE_COLUMNS if column in values and column != 'recurrence_id']
+        with self._transaction() as c:
+            c.execute(f'''
+                INSERT INTO recurrences ({', '.join(columns)})
+                VALUES ({', '.join(['?'] * len(columns))})
+            ''', [values[column] for column in columns])
+            return c.lastrowid
+
+    def stop_recurrence(self, recurrence_id, guild_id):
+        with self._transaction() as c:
+            c.execute('UPDATE recurrences SET active = 0 WHERE recurrence_id = ? AND guild_id = ?',
+                      (recurrence_id, str(guild_id)))
+            return c.rowcount > 0
+
+    def deactivate_recurrences(self, guild_id, column=None, value=None):
+        query, params = 'UPDATE recurrences SET active = 0 WHERE guild_id = ?', [str(guild_id)]
+        if column is not None:
+            if column not in ('channel_id', 'group_id'):
+                raise ValueError(column)
+            query += f' AND {column} = ?'
+            params.append(str(value))
+        with self._transaction() as c:
+            c.execute(query, params)
+
+    def search_recurrences(self, guild_id, query, limit):
+        return self._fetchall('''
+            SELECT recurrence_id, name, rule_type, interval, weekdays FROM recurrences
+            WHERE guild_id = ? AND active = 1 AND name LIKE ?
+            ORDER BY name LIMIT ?
+        ''', (str(guild_id), f"%{query}%", limit))
+
+    def due_recurrences(self, latest):
+        return self._fetchall(f'''
+            SELECT {', '.join(RECURRENCE_COLUMNS)} FROM recurrences
+            WHERE active = 1 AND next_at <= ?
+        ''', (latest,))
+
+    def set_recurrence_next(self, recurrence_id, next_at):
+        with self._transaction() as c:
+            c.execute('UPDATE recurrences SET next_at = ? WHERE recurrence_id = ?', (next_at, recurrence_id))
+
+    # --- Bandeja de salida ----------------------------------------------
+    def enqueue_notification(self, idempotency_key, kind, session_id, guild_id, now):
+        with self._transaction() as c:
+            c.execute('''
+                INSERT OR IGNORE INTO notification_outbox
+                (idempotency_key, kind, session_id, guild_id, status, attempts, next_attempt_at, created_at)
+                VALUES (?, ?, ?, ?, 'pending', 0, ?, ?)
+            ''', (idempotency_key, kind, session_id, str(guild_id), now, now))
+
+    def pending_notifications(self, now, limit):
+        return self._fetchall('''
+            SELECT id, kind, session_id, attempts, guild_id FROM (
+                SELECT id, kind, session_id, attempts, guild_id,
+                       ROW_NUMBER() OVER (PARTITION BY guild_id ORDER BY id) AS turn
+                FROM notification_outbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+            )
+            ORDER BY turn, id LIMIT ?
+        ''', (now, limit))
+
+    def finish_notification(self, outbox_id, status, error, closed_at, session_id=None, session_changes=None):
+        with self._transaction() as c:
+            if session_changes:
+                c.execute(*self._update_query(session_id, session_changes))
+            c.execute('''
+                UPDATE notification_outbox SET status = ?, last_error = ?, sent_at = ?
+                WHERE id = ?
+            ''', (status, error, closed_at, outbox_id))
+
+    def retry_notification(self, outbox_id, attempts, next_attempt_at, error):
+        with self._transaction() as c:
+            c.execute('''
+                UPDATE notification_outbox SET attempts = ?, next_attempt_at = ?, last_error = ?
+                WHERE id = ?
+            ''', (attempts, next_attempt_at, error, outbox_id))
+
+    def defer_notification(self, outbox_id, next_attempt_at, error):
+        with self._transaction() as c:
+            c.execute('UPDATE notification_outbox SET next_attempt_at = ?, last_error = ? WHERE id = ?',
+                      (next_attempt_at, error, outbox_id))
+
+    def resume_notifications(self, guild_id, now, error):
+        with self._transaction() as c:
+            c.execute('''
+                UPDATE notification_outbox SET next_attempt_at = ?
+                WHERE status = 'pending' AND guild_id = ? AND last_error = ?
+            ''', (now, str(guild_id), error))
+
+    def cancel_notifications(self, session_ids, error):
+        ids = list(session_ids)
+        if not ids:
+            return
+        with self._transaction() as c:
+            c.execute(f'''
+                UPDATE notification_outbox SET status = 'cancelled', last_error = ?
+                WHERE status = 'pending' AND session_id IN ({','.join(['?'] * len(ids))})
+            ''', [error] + ids)
+
+    def prune_notifications(self, cutoff):
+        with self._transaction() as c:
+            c.execute("DELETE FROM notification_outbox WHERE status != 'pending' AND sent_at < ?", (cutoff,))
+
+    # --- Diario de renderizado ------------------------------------------
+    # La versión la mantienen los triggers de SessionJournal.setup
+    def journal_version(self, session_id):
+        row = self._fetchone('SELECT version FROM session_journal WHERE session_id = ?', (session_id,))
+        return row[0] if row else 0
+
+    def record_render(self, session_id, message_id, version, bucket_until, rendered_at):
+        with self._transaction() as c:
+            c.execute('''
+                INSERT INTO message_renders (session_id, message_id, rendered_version, bucket_until, dirty, rendered_at)
+                VALUES (?1, ?2, ?3, ?4,
+                        ?3 < COALESCE((SELECT version FROM session_journal WHERE session_id = ?1), 0), ?5)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    message_id = excluded.message_id,
+                    rendered_version = excluded.rendered_version,
+                    bucket_until = excluded.bucket_until,
+                    dirty = excluded.dirty,
+                    rendered_at = excluded.rendered_at
+            ''', (session_id, str(message_id), version, bucket_until, rendered_at))
+
+    def stale_sessions(self, now):
+        fields = ', '.join(f's.{column}' for column in SESSION_COLUMNS)
+        return self._fetchall(f'''
+            SELECT {fields} FROM message_renders r JOIN sessions s ON s.session_id = r.session_id
+            WHERE r.dirty = 1 AND s.unroutable = 0
+            UNION
+            SELECT {fields} FROM message_renders r JOIN sessions s ON s.session_id = r.session_id
+            WHERE r.bucket_until <= ? AND s.unroutable = 0
+        ''', (now,))
+
+    def clean_renders(self, now):
+        rows = self._fetchall('''
+            SELECT session_id, message_id, rendered_at FROM message_renders
+            WHERE dirty = 0 AND bucket_until > ? AND rendered_at IS NOT NULL
+        ''', (now,))
+        return {session_id: (message_id, rendered_at) for session_id, message_id, rendered_at in rows}
+
+    # --- Asistencia -----------------------------------------------------
+    def record_attendance(self, guild_id, session_id, user_id, lead_minutes=None):
+        with self._transaction() as c:
+            if lead_minutes is not None:
+                # Solo cuenta la primera vez que se marca disponible
+                c.execute('''
+                    INSERT INTO attendance_marks (session_id, user_id, ever_ready, lead_minutes)
+                    VALUES (?, ?, 1, ?)
+                    ON CONFLICT (session_id, user_id) DO UPDATE SET
+                        ever_ready = 1,
+                        lead_minutes = COALESCE(lead_minutes, excluded.lead_minutes)
+                ''', (session_id, str(user_id), lead_minutes))
+            c.execute('''
+                INSERT INTO attendance_user_stats (guild_id, user_id, changes) VALUES (?, ?, 1)
+                ON CONFLICT (guild_id, user_id) DO UPDATE SET changes = changes + 1
+            ''', (str(guild_id), str(user_id)))
+
+    def finalize_attendance(self, session_id, guild_id, role_id, finalized_at, build):
+        with self._transaction() as c:
+            c.execute('INSERT OR IGNORE INTO attendance_finalized (session_id, finalized_at) VALUES (?, ?)',
+                      (session_id, finalized_at))
+            if c.rowcount == 0:
+                return False
+            c.execute('SELECT user_id, ever_ready, lead_minutes FROM attendance_marks WHERE session_id = ?',
+                      (session_id,))
+            marks = {int(user_id): (ever_ready, lead) for user_id, ever_ready, lead in c.fetchall()}
+            user_rows, role_row = build(marks)
+            c.executemany(f'''
+                INSERT INTO attendance_user_stats (guild_id, user_id, {', '.join(USER_STATS_COLUMNS)})
+                VALUES (?, ?, {', '.join(['?'] * len(USER_STATS_COLUMNS))})
+                ON CONFLICT (guild_id, user_id) DO UPDATE SET
+                {', '.join(f'{col} = {col} + excluded.{col}' for col in USER_STATS_COLUMNS)}
+            ''', [(str(guild_id), str(user_id)) + tuple(values) for user_id, values in user_rows])
+            c.execute(f'''
+                INSERT INTO attendance_role_stats (guild_id, role_id, sessions, {', '.join(ROLE_STATS_COLUMNS)})
+                VALUES (?, ?, 1, {', '.join(['?'] * len(ROLE_STATS_COLUMNS))})
+                ON CONFLICT (guild_id, role_id) DO UPDATE SET sessions = sessions + 1,
+                {', '.join(f'{col} = {col} + excluded.{col}' for col in ROLE_STATS_COLUMNS)}
+            ''', (str(guild_id), str(role_id)) + tuple(role_row))
+            c.execute('DELETE FROM attendance_marks WHERE session_id = ?', (session_id,))
+            return True
+
+    def _stats(self, table, key_column, guild_id, key):
+        conn = self._connection()
+        cursor = conn.execute(f'SELECT * FROM {table} WHERE guild_id = ? AND {key_column} = ?',
+                              (str(guild_id), str(key)))
+        row = cursor.fetchone()
+        names = [column[0] for column in cursor.description]
+        conn.commit()
+        return dict(zip(names, row)) if row else None
+
+    def user_stats(self, guild_id, user_id):
+        return self._stats('attendance_user_stats', 'user_id', guild_id, user_id)
+
+    def role_stats(self, guild_id, role_id):
+        return self._stats('attendance_role_stats', 'role_id', guild_id, role_id)
+
+
+class MemorySessionStore(SessionStore):
+    """Implementación en memoria (sin persistencia) para pruebas y mediciones"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.sessions = {}       # session_id -> fila
+        self.archive = {}        # session_id -> fila del archivo
+        self.configs = {}        # guild_id -> dict
+        self.optouts = set()
+        self.reminders = {}      # id -> [session_id, kind, stage_minutes, fire_at, fired]
+        self._next_reminder = 1
+        self.marks = {}          # (session_id, user_id) -> [ever_ready, lead_minutes]
+        self.finalized = set()
+        self.user_counters = {}  # (guild_id, user_id) -> dict
+        self.role_counters = {}  # (guild_id, role_id) -> dict
+        self.recurrences = {}    # recurrence_id -> dict (RECURRENCE_COLUMNS + active)
+        self._next_recurrence = 1
+        self.outbox = {}         # id -> dict con las columnas de notification_outbox
+        self._next_outbox = 1
+        self.journal = {}        # session_id -> versión de los datos visibles
+        self.renders = {}        # session_id -> dict con las columnas de message_renders
+
+    @staticmethod
+    def _key(session_id):
+        return int(session_id)
+
+    # --- Sesiones -------------------------------------------------------
+    def get_session(self, session_id, guild_id=None):
+        with self._lock:
+            row = self.sessions.get(self._key(session_id))
+        if row is None or (guild_id is not None and row[1] != str(guild_id)):
+            return None
+        return row
+
+    def insert_session(self, row):
+        self.insert_sessions([row])
+
+    def update_session(self, session_id, changes, expected_version=None):
+        _check_columns(changes)
+        session_id = self._key(session_id)
+        with self._lock:
+            row = self.sessions.get(session_id)
+            if row is None:
+                return None
+            version = row[COLUMN_INDEX['version']]
+            if expected_version is not None and version != expected_version:
+                return None
+            self._update(session_id, version=version + 1, **changes)
+            if any(column in JOURNAL_COLUMNS for column in changes):
+                self._bump_journal(session_id)
+            return self.sessions[session_id]
+
+    def insert_sessions(self, rows):
+        with self._lock:
+            if any(self._key(row[0]) in self.sessions for row in rows):
+                raise sqlite3.IntegrityError("UNIQUE constraint failed: sessions.session_id")
+            for row in rows:
+                self.sessions[self._key(row[0])] = tuple(row)
+                self._bump_journal(self._key(row[0]))
+
+    def _bump_journal(self, session_id):
+        # Equivalente a los triggers del diario de SQLite (ver SessionJournal.setup)
+        self.journal[session_id] = self.journal.get(session_id, 0) + 1
+        if session_id in self.renders:
+            self.renders[session_id]['dirty'] = 1
+
+    def _drop(self, session_id):
+        # Equivalente a los triggers AFTER DELETE de SQLite
+        self.sessions.pop(session_id, None)
+        self.reminders = {k: v for k, v in self.reminders.items() if v[0] != session_id}
+        self.marks = {k: v for k, v in self.marks.items() if k[0] != session_id}
+        self.journal.pop(session_id, None)
+        self.renders.pop(session_id, None)
+
+    def delete_session(self, session_id):
+        with self._lock:
+            if self._key(session_id) not in self.sessions:
+                return False
+            self._drop(self._key(session_id))
+            return True
+
+    def guild_sessions(self, guild_id):
+        with self._lock:
+            return [row for row in self.sessions.values() if row[1] == str(guild_id)]
+
+    def routable_sessions(self):
+        with self._lock:
+            return [row for row in self.sessions.values() if not row[COLUMN_INDEX['unroutable']]]
+
+    def session_starts(self):
+        with self._lock:
+            return [(row[0], row[3]) for row in self.sessions.values()]
+
+    def _update(self, session_id, **values):
+        row = list(self.sessions[session_id])
+        for column, value in values.items():
+            row[COLUMN_INDEX[column]] = value
+        self.sessions[session_id] = tuple(row)
+
+    def mark_unroutable(self, column, value, guild_id):
+        if column not in ROUTING_COLUMNS:
+            raise ValueError(column)
+        index = COLUMN_INDEX[column]
+        with self._lock:
+            affected = [
+                (row[0], row[2], row[6]) for row in self.sessions.values()
+                if str(row[index]) == str(value) and row[1] == str(guild_id)
+                and not row[COLUMN_INDEX['unroutable']]
+            ]
+            for session_id, _, _ in affected:
+                self._update(session_id, unroutable=1)
+            return affected
+
+    def existing_names(self, guild_id, names):
+        names = set(names)
+        with self._lock:
+            return {(row[2], row[3]) for row in self.sessions.values()
+                    if row[1] == str(guild_id) and row[2] in names}
+
+    def occurrence_exists(self, recurrence_id, session_datetime):
+        with self._lock:
+            return any(row[COLUMN_INDEX['recurrence_id']] == recurrence_id and row[3] == session_datetime
+                       for row in self.sessions.values())
+
+    def max_session_id(self):
+        with self._lock:
+            return max(self.sessions, default=None)
+
+    # --- Archivo --------------------------------------------------------
+    def archive_sessions(self, session_ids, archived_at):
+        moved = 0
+        with self._lock:
+            for session_id in map(self._key, session_ids):
+                row = self.sessions.get(session_id)
+                if row is None:
+                    continue
+                day, month, rest = row[3].split('-', 2)
+                year, clock = rest.split(' ')
+                self.archive[session_id] = (row[1], row[2], f"{year}-{month}-{day} {clock}", row[12],
+                                            row[4], row[9], row[10], archived_at)
+                self._drop(session_id)
+                moved += 1
+        return moved
+
+    def archived_sessions(self, guild_id, limit):
+        with self._lock:
+            rows = [entry for entry in self.archive.values() if entry[0] == str(guild_id)]
+        rows.sort(key=lambda entry: entry[2], reverse=True)
+        return [entry[1:7] for entry in rows[:limit]]
+
+    def expire_archive(self, cutoff, limit):
+        with self._lock:
+            expired = [session_id for session_id, entry in self.archive.items() if entry[2] < cutoff][:limit]
+            for session_id in expired:
+                del self.archive[session_id]
+            return len(expired)
+
+    # --- Configuración --------------------------------------------------
+    def load_config(self, guild_id):
+        with self._lock:
+            values = self.configs.get(str(guild_id))
+            return dict(values) if values else None
+
+    def save_config(self, guild_id, values):
+        with self._lock:
+            self.configs[str(guild_id)] = dict(values)
+
+    def set_dm_optout(self, user_id, opted_out):
+        with self._lock:
+            if opted_out:
+                self.optouts.add(int(user_id))
+            else:
+                self.optouts.discard(int(user_id))
+
+    def dm_optouts(self, user_ids):
+        with self._lock:
+            return {int(user_id) for user_id in user_ids} & self.optouts
+
+    # --- Recordatorios --------------------------------------------------
+    def replace_reminders(self, session_id, triggers):
+        session_id = self._key(session_id)
+        with self._lock:
+            self.reminders = {k: v for k, v in self.reminders.items() if not (v[0] == session_id and not v[4])}
+            existing = {tuple(v[1:4]) for v in self.reminders.values() if v[0] == session_id}
+            for kind, stage, fire_at in triggers:
+                if (kind, stage, fire_at) in existing:
+                    continue
+                self.reminders[self._next_reminder] = [session_id, kind, stage, fire_at, 0]
+                self._next_reminder += 1
+
+    def claim_due_reminders(self, now, limit):
+        with self._lock:
+            due = sorted(
+                ((v[3], k) for k, v in self.reminders.items() if not v[4] and v[3] <= now)
+            )[:limit]
+            claimed = []
+            for _, reminder_id in due:
+                entry = self.reminders[reminder_id]
+                entry[4] = 1
+                claimed.append((reminder_id, entry[0], entry[1], entry[2]))
+            return claimed
+
+    def sessions_without_reminders(self):
+        with self._lock:
+            with_reminders = {v[0] for v in self.reminders.values()}
+            return [row for sid, row in self.sessions.items()
+                    if not row[COLUMN_INDEX['notified']] and not row[COLUMN_INDEX['unroutable']]
+                    and sid not in with_reminders]
+
+    # --- Recurrencias ---------------------------------------------------
+    def create_recurrence(self, values):
+        with self._lock:
+            recurrence_id = self._next_recurrence
+            self._next_recurrence += 1
+            rule = dict(RECURRENCE_DEFAULTS, **values)
+            self.recurrences[recurrence_id] = {
+                **{column: rule.get(column) for column in RECURRENCE_COLUMNS},
+                'recurrence_id': recurrence_id, 'active': 1
+            }
+            return recurrence_id
+
+    def stop_recurrence(self, recurrence_id, guild_id):
+        with self._lock:
+            rule = self.recurrences.get(int(recurrence_id))
+            if rule is None or rule['guild_id'] != str(guild_id):
+                return False
+            rule['active'] = 0
+            return True
+
+    def deactivate_recurrences(self, guild_id, column=None, value=None):
+        if column is not None and column not in ('channel_id', 'group_id'):
+            raise ValueError(column)
+        with self._lock:
+            for rule in self.recurrences.values():
+                if rule['guild_id'] == str(guild_id) and (column is None or str(rule[column]) == str(value)):
+                    rule['active'] = 0
+
+    def search_recurrences(self, guild_id, query, limit):
+        query = query.lower()
+        with self._lock:
+            rules = [rule for rule in self.recurrences.values()
+                     if rule['guild_id'] == str(guild_id) and rule['active'] and query in rule['name'].lower()]
+        rules.sort(key=lambda rule: rule['name'])
+        return [(rule['recurrence_id'], rule['name'], rule['rule_type'], rule['interval'], rule['weekdays'])
+                for rule in rules[:limit]]
+
+    def due_recurrences(self, latest):
+        with self._lock:
+            return [tuple(rule[column] for column in RECURRENCE_COLUMNS) for rule in self.recurrences.values()
+                    if rule['active'] and rule['next_at'] <= latest]
+
+    def set_recurrence_next(self, recurrence_id, next_at):
+        with self._lock:
+            rule = self.recurrences.get(int(recurrence_id))
+            if rule is not None:
+                rule['next_at'] = next_at
+
+    # --- Bandeja de salida ----------------------------------------------
+    def enqueue_notification(self, idempotency_key, kind, session_id, guild_id, now):
+        with self._lock:
+            if any(entry['idempotency_key'] == idempotency_key for entry in self.outbox.values()):
+                return
+            self.outbox[self._next_outbox] = {
+                'idempotency_key': idempotency_key, 'kind': kind, 'session_id': session_id,
+                'guild_id': str(guild_id), 'status': 'pending', 'attempts': 0, 'next_attempt_at': now,
+                'last_error': None, 'created_at': now, 'sent_at': None,
+            }
+            self._next_outbox += 1
+
+    def pending_notifications(self, now, limit):
+        with self._lock:
+            turns = {}
+            pending = []
+            for outbox_id in sorted(self.outbox):
+                entry = self.outbox[outbox_id]
+                if entry['status'] != 'pending' or entry['next_attempt_at'] > now:
+                    continue
+                turns[entry['guild_id']] = turns.get(entry['guild_id'], 0) + 1
+                pending.append((turns[entry['guild_id']], outbox_id, entry))
+        pending.sort(key=lambda item: item[:2])
+        return [(outbox_id, entry['kind'], entry['session_id'], entry['attempts'], entry['guild_id'])
+                for _, outbox_id, entry in pending[:limit]]
+
+    def _set_notification(self, outbox_id, **values):
+        entry = self.outbox.get(outbox_id)
+        if entry is not None:
+            entry.update(values)
+
+    def finish_notification(self, outbox_id, status, error, closed_at, session_id=None, session_changes=None):
+        with self._lock:
+            if session_changes:
+                self.update_session(session_id, session_changes)
+            self._set_notification(outbox_id, status=status, last_error=error, sent_at=closed_at)
+
+    def retry_notification(self, outbox_id, attempts, next_attempt_at, error):
+        with self._lock:
+            self._set_notification(outbox_id, attempts=attempts, next_attempt_at=next_attempt_at, last_error=error)
+
+    def defer_notification(self, outbox_id, next_attempt_at, error):
+        with self._lock:
+            self._set_notification(outbox_id, next_attempt_at=next_attempt_at, last_error=error)
+
+    def resume_notifications(self, guild_id, now, error):
+        with self._lock:
+            for entry in self.outbox.values():
+                if entry['status'] == 'pending' and entry['guild_id'] == str(guild_id) and entry['last_error'] == error:
+                    entry['next_attempt_at'] = now
+
+    def cancel_notifications(self, session_ids, error):
+        session_ids = set(map(self._key, session_ids))
+        with self._lock:
+            for entry in self.outbox.values():
+                if entry['status'] == 'pending' and self._key(entry['session_id']) in session_ids:
+                    entry.update(status='cancelled', last_error=error)
+
+    def prune_notifications(self, cutoff):
+        with self._lock:
+            self.outbox = {
+                outbox_id: entry for outbox_id, entry in self.outbox.items()
+                if entry['status'] == 'pending' or entry['sent_at'] is None or entry['sent_at'] >= cutoff
+            }
+
+    # --- Diario de renderizado ------------------------------------------
+    def journal_version(self, session_id):
+        with self._lock:
+            return self.journal.get(self._key(session_id), 0)
+
+    def record_render(self, session_id, message_id, version, bucket_until, rendered_at):
+        session_id = self._key(session_id)
+        with self._lock:
+            self.renders[session_id] = {
+                'message_id': str(message_id), 'rendered_version': version, 'bucket_until': bucket_until,
+                'dirty': int(version < self.journal.get(session_id, 0)), 'rendered_at': rendered_at,
+            }
+
+    def stale_sessions(self, now):
+        with self._lock:
+            return [self.sessions[session_id] for session_id, render in self.renders.items()
+                    if session_id in self.sessions and not self.sessions[session_id][COLUMN_INDEX['unroutable']]
+                    and (render['dirty'] or render['bucket_until'] <= now)]
+
+    def clean_renders(self, now):
+        with self._lock:
+            return {session_id: (render['message_id'], render['rendered_at'])
+                    for session_id, render in self.renders.items()
+                    if not render['dirty'] and render['bucket_until'] > now and render['rendered_at'] is not None}
+
+    # --- Asistencia -----------------------------------------------------
+    def _counters(self, table, key, columns):
+        return table.setdefault(key, dict.fromkeys(columns, 0))
+
+    def record_attendance(self, guild_id, session_id, user_id, lead_minutes=None):
+        with self._lock:
+            if lead_minutes is not None:
+                mark = self.marks.setdefault((self._key(session_id), int(user_id)), [1, lead_minutes])
+                mark[0] = 1
+                if mark[1] is None:
+                    mark[1] = lead_minutes
+            counters = self._counters(self.user_counters, (str(guild_id), str(user_id)),
+                                      USER_STATS_COLUMNS + ('changes',))
+            counters['changes'] += 1
+
+    def finalize_attendance(self, session_id, guild_id, role_id, finalized_at, build):
+        session_id = self._key(session_id)
+        with self._lock:
+            if session_id in self.finalized:
+                return False
+            self.finalized.add(session_id)
+            marks = {user_id: tuple(mark) for (sid, user_id), mark in self.marks.items() if sid == session_id}
+            user_rows, role_row = build(marks)
+            for user_id, values in user_rows:
+                counters = self._counters(self.user_counters, (str(guild_id), str(user_id)),
+                                          USER_STATS_COLUMNS + ('changes',))
+                for column, value in zip(USER_STATS_COLUMNS, values):
+                    counters[column] += value
+            counters = self._counters(self.role_counters, (str(guild_id), str(role_id)),
+                                      ('sessions',) + ROLE_STATS_COLUMNS)
+            counters['sessions'] += 1
+            for column, value in zip(ROLE_STATS_COLUMNS, role_row):
+                counters[column] += value
+            self.marks = {k: v for k, v in self.marks.items() if k[0] != session_id}
+            return True
+
+    def user_stats(self, guild_id, user_id):
+        with self._lock:
+            counters = self.user_counters.get((str(guild_id), str(user_id)))
+            return dict(counters, guild_id=str(guild_id), user_id=str(user_id)) if counters else None
+
+    def role_stats(self, guild_id, role_id):
+        with self._lock:
+            counters = self.role_counters.get((str(guild_id), str(role_id)))
+            return dict(counters, guild_id=str(guild_id), role_id=str(role_id)) if counters else None
@@ -0,0 +1,83 @@
+# tracing.py
+# Grabación de trazas de producción para el simulador (replay.py).
+#
+# Con TRACE_FILE configurado, el bot añade al fichero una línea JSON por cada
+# evento que llega de fuera: comandos slash, pulsaciones de disponibilidad,
+# sesiones creadas, editadas, importadas o eliminadas desde la interfaz,
+# reglas recurrentes nuevas y canales, roles o servidores eliminados. También
+# se graba la duración de cada ciclo de las tareas programadas, para comparar
+# producción con la simulación.
+#
+# Lo que el planificador deriva de esos eventos (avisos, refrescos de
+# mensajes, ocurrencias de recurrencias, limpieza de sesiones antiguas) no se
+# reproduce desde la traza: el simulador lo vuelve a ejecutar con su reloj.
+# Solo se anota qué sesión creó cada ocurrencia para poder traducir sus IDs.
+import json
+import logging
+import threading
+
+import clock
+
+logger = logging.getLogger(__name__)
+
+
+class TraceRecorder:
+    """Escribe eventos en un fichero JSONL, en bloques de FLUSH_EVERY líneas"""
+    FLUSH_EVERY = 50
+
+    def __init__(self, path=None):
+        self.path = path
+        self.started = False
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def start(self, snapshot=None):
+        """Abre la traza indicando la copia de la base de datos de la que parte"""
+        if not self.path or self.started:
+            return
+        self.started = True
+        self.record('start', snapshot=snapshot)
+        self.flush()
+
+    def record(self, kind, **fields):
+        if not self.path:
+            return
+        event = {'t': clock.utcnow().isoformat(timespec='milliseconds'), 'type': kind}
+        event.update(fields)
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.FLUSH_EVERY:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer or not self.path:
+            return
+        try:
+            with open(self.path, 'a', encoding='utf-8') as trace_file:
+                trace_file.write('\n'.join(self._buffer) + '\n')
+        except OSError as e:
+            logger.error(f"Error escribiendo la traza {self.path}: {str(e)}")
+        self._buffer = []
+
+
+def read_trace(path):
+    """Devuelve los eventos de una traza en orden de fichero"""
+    with open(path, encoding='utf-8') as trace_file:
+        for line_no, line in enumerate(trace_file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Última línea a medias si el bot se detuvo mientras escribía
+                logger.warning(f"Línea {line_no} de la traza ilegible; se omite")
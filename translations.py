@@ -1,95 +1,89 @@
 # translations.py
-TEXTS = {
-    'es': {
-        'config_title': 'Configuración del Bot',
-        'config_desc': 'Selecciona qué quieres configurar:',
-        'config_timezone_desc': 'Configura tu zona horaria',
-        'config_prevtime_desc': 'Configura el tiempo de aviso previo',
-        'config_lang_desc': 'Configura el idioma del bot',
-        'timezone_title': 'Configuración de Zona Horaria',
-        'timezone_examples': 'Ejemplos de zonas horarias válidas:',
-        'timezone_input': 'Por favor, introduce tu zona horaria:',
-        'timezone_success': 'Zona horaria configurada a:',
-        'timezone_error': 'Zona horaria no válida. Por favor, usa un formato válido como los ejemplos mostrados.',
-        'prevtime_title': 'Configuración de Tiempo de Aviso',
-        'prevtime_desc': '¿Con cuántos minutos de antelación quieres recibir los avisos?',
-        'prevtime_input': 'Por favor, introduce un número (por ejemplo: 15)',
-        'prevtime_success': 'Tiempo de aviso previo configurado a: {} minutos',
-        'prevtime_error': 'Por favor, introduce un número positivo válido.',
-        'lang_title': 'Configuración de Idioma',
-        'lang_desc': 'Idiomas disponibles:',
-        'lang_input': 'Por favor, escribe \'es\' o \'en\':',
-        'lang_success': 'Idioma configurado a:',
-        'lang_error': 'Idioma no válido. Por favor, usa \'es\' para Español o \'en\' para English',
-        'timeout_error': '⏰ Operación Cancelada.',
-        'success_title': '✅ Configuración Exitosa',
-        'error_title': '❌ Error',
-        'new_session_name': '¿Nombre de la sesión?',
-        'new_session_datetime': 'Fecha y hora (formato DD-MM-YYYY HH:MM)',
-        'new_session_datetime_error': 'Formato de fecha y hora incorrecto. Usa DD-MM-YYYY HH:MM',
-        'new_session_group': 'Grupo al que avisa (@grupo)',
-        'new_session_channel': 'Canal en el que se manda el aviso (#canal)',
-        'new_session_success': 'Sesión creada correctamente',
-        'active_sessions_title': 'Sesiones Activas',
-        'active_sessions_none': 'Ninguno',
-        'active_sessions_date': 'Fecha:',
-        'active_sessions_group': 'Grupo:',
-        'active_sessions_channel': 'Canal:',
-        'purge_sessions_result': 'Se han eliminado {} sesiones antiguas',
-        'donate_dm': '¡Gracias por considerar una donación! Puedes donar en: {}',
-        'donate_response': 'Te he enviado un mensaje privado con la información de donación',
-        'donate_error': 'No pude enviarte un mensaje privado. Por favor, habilita los mensajes privados del servidor',
-        'session_alert_title': 'Aviso:',
-        'session_alert_in_minutes': 'Sesión en {} minutos',
-        'session_ready': 'Listos:',
-        'session_not_ready': 'No listos:',
-        'session_in_progress': '⚔️ Sesión en curso',
-        'session_ended': '🏁 Sesión finalizada',
-    },
-    'en': {
-        'config_title': 'Bot Configuration',
-        'config_desc': 'Select what you want to configure:',
-        'config_timezone_desc': 'Configure your timezone',
-        'config_prevtime_desc': 'Configure alert preview time',
-        'config_lang_desc': 'Configure bot language',
-        'timezone_title': 'Timezone Configuration',
-        'timezone_examples': 'Valid timezone examples:',
-        'timezone_input': 'Please enter your timezone:',
-        'timezone_success': 'Timezone set to:',
-        'timezone_error': 'Invalid timezone. Please use a valid format like the examples shown.',
-        'prevtime_title': 'Alert Time Configuration',
-        'prevtime_desc': 'How many minutes in advance do you want to receive alerts?',
-        'prevtime_input': 'Please enter a number (example: 15)',
-        'prevtime_success': 'Preview time set to: {} minutes',
-        'prevtime_error': 'Please enter a valid positive number.',
-        'lang_title': 'Language Configuration',
-        'lang_desc': 'Available languages:',
-        'lang_input': 'Please type \'es\' or \'en\':',
-        'lang_success': 'Language set to:',
-        'lang_error': 'Invalid language. Please use \'es\' for Spanish or \'en\' for English',
-        'timeout_error': '⏰ Operation Cancelled.',
-        'success_title': '✅ Success',
-        'error_title': '❌ Error',
-        'new_session_name': 'Session name?',
-        'new_session_datetime': 'Date and time (format DD-MM-YYYY HH:MM)',
-        'new_session_datetime_error': 'Incorrect date and time format. Use DD-MM-YYYY HH:MM',
-        'new_session_group': 'Target group (@group)',
-        'new_session_channel': 'Target channel (#channel)',
-        'new_session_success': 'Session created successfully',
-        'active_sessions_title': 'Active Sessions',
-        'active_sessions_none': 'None',
-        'active_sessions_date': 'Date:',
-        'active_sessions_group': 'Group:',
-        'active_sessions_channel': 'Channel:',
-        'purge_sessions_result': '{} old sessions have been deleted',
-        'donate_dm': 'Thank you for considering a donation! You can donate at: {}',
-        'donate_response': 'I\'ve sent you a private message with donation information',
-        'donate_error': 'Couldn\'t send you a private message. Please enable private messages from server members',
-        'session_alert_title': 'Alert:',
-        'session_alert_in_minutes': 'Session in {} minutes',
-        'session_ready': 'Ready:',
-        'session_not_ready': 'Not ready:',
-        'session_in_progress': '⚔️ Session in progress',
-        'session_ended': '🏁 Session ended',
-    }
-}
\ No newline at end of file
+# Catálogos de textos por idioma, cargados bajo demanda.
+#
+# Cada idioma vive en locales/<código>.py y solo se importa la primera vez que
+# un servidor lo usa, así que añadir idiomas no cuesta nada al arrancar. Al
+# cargar un catálogo sus plantillas se analizan una sola vez: las que solo
+# tienen marcadores `{}` se traducen a plantillas `%s`, que se rellenan sin
+# volver a interpretar la plantilla en cada llamada.
+# Las claves que falten en un idioma se toman del idioma por defecto.
+import importlib
+import threading
+from string import Formatter
+
+DEFAULT_LANG = 'es'
+LANGUAGES = {
+    'es': 'Español',
+    'en': 'English',
+    'fr': 'Français',
+    'de': 'Deutsch',
+}
+
+_catalogs = {}
+_lock = threading.Lock()
+
+
+def compile_template(template):
+    """Analiza una plantilla una vez y devuelve (plantilla compilada, nº de argumentos).
+
+    Si solo usa marcadores `{}`, la plantilla compilada es su equivalente con
+    `%s` y se rellena con el operador %, que no tiene que interpretar llaves ni
+    buscar argumentos por posición. Si usa campos con nombre, índice o formato
+    se devuelve el método format de la plantilla y None.
+    """
+    compiled = []
+    fields = 0
+    for literal, field, spec, conversion in Formatter().parse(template):
+        if field or spec or conversion:
+            return template.format, None
+        compiled.append(literal.replace('%', '%%'))
+        if field is not None:
+            compiled.append('%s')
+            fields += 1
+    return ''.join(compiled), fields
+
+
+class Catalog:
+    """Textos de un idioma con sus plantillas ya compiladas.
+
+    Se usa como función: catalog('clave', *args). Sin argumentos devuelve el
+    texto tal cual, igual que hacía get_text.
+    """
+
+    def __init__(self, lang, texts, fallback=None):
+        self.lang = lang
+        self.texts = dict(fallback.texts) if fallback else {}
+        self.texts.update(texts)
+        self._compiled = {key: compile_template(text) for key, text in self.texts.items()}
+
+    def __call__(self, key, *args):
+        if not args:
+            return self.texts[key]
+        compiled, fields = self._compiled[key]
+        if fields is None:
+            return compiled(*args)
+        # Como str.format, los argumentos sobrantes se ignoran
+        return compiled % args[:fields]
+
+    def __contains__(self, key):
+        return key in self.texts
+
+
+def load_catalog(lang):
+    """Catálogo de un idioma (los desconocidos usan el idioma por defecto)"""
+    catalog = _catalogs.get(lang)
+    if catalog is not None:
+        return catalog
+    if lang not in LANGUAGES:
+        return load_catalog(DEFAULT_LANG)
+    fallback = load_catalog(DEFAULT_LANG) if lang != DEFAULT_LANG else None
+    with _lock:
+        if lang not in _catalogs:
+            module = importlib.import_module(f'locales.{lang}')
+            _catalogs[lang] = Catalog(lang, module.TEXTS, fallback)
+        return _catalogs[lang]
+
+
+def loaded_languages():
+    """Idiomas cargados hasta ahora"""
+    return sorted(_catalogs)